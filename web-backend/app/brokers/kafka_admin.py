@@ -1,8 +1,10 @@
+import asyncio
 import os
-from contextlib import asynccontextmanager
-from typing import Final, Optional
+from time import monotonic
+from typing import Any, Final, Optional
 
-from aiokafka.admin import AIOKafkaAdminClient, NewTopic
+from aiokafka.admin import AIOKafkaAdminClient, NewPartitions, NewTopic
+from aiokafka.admin.config_resource import ConfigResource, ConfigResourceType
 from aiokafka.errors import (
     KafkaConnectionError,
     KafkaError,
@@ -21,6 +23,11 @@ load_dotenv()
 KAFKA_HOSTNAME: Final[Optional[str]] = os.getenv("KAFKA_HOSTNAME")
 KAFKA_PORT: Final[Optional[str]] = os.getenv("KAFKA_PORT")
 KAFKA_TOPIC_ALREADY_EXISTS_ERROR: Final[int] = 36
+KAFKA_TOPIC_PARTITIONS: Final[int] = int(os.getenv("KAFKA_TOPIC_PARTITIONS", "6"))
+KAFKA_TOPIC_REPLICATION_FACTOR: Final[int] = int(
+    os.getenv("KAFKA_TOPIC_REPLICATION_FACTOR", "1")
+)
+KAFKA_METADATA_EXPIRE: Final[float] = float(os.getenv("KAFKA_METADATA_EXPIRE", "30"))
 
 
 class KafkaAdmin:
@@ -28,17 +35,24 @@ class KafkaAdmin:
     Manage Kafka topics using the Kafka Admin Client
 
     This class provides methods for creation, deleting and listing Kafka topics,
-    as well as to start and stop the Kafka Admin client
+    as well as to start and stop the Kafka Admin client. One client is kept
+    open between the start and stop, and topics metadata is cached for the
+    metadata TTL and dropped after topics changes
     """
 
-    def __init__(self, bootstrap_servers: str):
+    def __init__(self, bootstrap_servers: str, metadata_expire: float = KAFKA_METADATA_EXPIRE):
         """
         Initialize Kafka Admin instance
 
         :param str bootstrap_servers: Kafka connecting servers
+        :param float metadata_expire: Topics metadata cache TTL in seconds
         """
         self.bootstrap_servers = bootstrap_servers
+        self.metadata_expire = metadata_expire
         self.admin_client: Optional[AIOKafkaAdminClient] = None
+        self.topics: Optional[list[dict[str, Any]]] = None
+        self.topics_fetched_at = 0.0
+        self._lock = asyncio.Lock()
 
     async def start(self) -> None:
         """
@@ -70,32 +84,18 @@ class KafkaAdmin:
                 detail=f"Failed to start Kafka, because of {str(exception)}",
             ) from exception
 
-    @asynccontextmanager
-    async def start_context_manager(self) -> AIOKafkaAdminClient:
+    def _client(self) -> AIOKafkaAdminClient:
         """
-        Asynchronous context manager to start the Kafka admin client
+        Started Kafka admin client obtaining
 
-        :yield AIOKafkaAdminClient: The Kafka admin client instance
+        :return AIOKafkaAdminClient: The Kafka admin client instance
         """
-        try:
-            await self.start()
-            logger.info("Admin client Kafka context manager was started")
-            yield self.admin_client
-        except KafkaConnectionError as error:
-            logger.exception("Unable to connect to Kafka server")
-            raise HTTPException(
-                status_code=status.HTTP_408_REQUEST_TIMEOUT,
-                detail="Unable to connect to Kafka server",
-            ) from error
-        except Exception as exception:
-            logger.exception("Failed to start Kafka, because of %s", exception)
+        if self.admin_client is None:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to start Kafka, because of {str(exception)}",
-            ) from exception
-        finally:
-            if self.admin_client:
-                await self.admin_client.close()
+                detail="Kafka admin client is not initialized",
+            )
+        return self.admin_client
 
     async def stop(self) -> None:
         """
@@ -104,6 +104,8 @@ class KafkaAdmin:
         try:
             if self.admin_client:
                 await self.admin_client.close()
+                self.admin_client = None
+                self.topics = None
                 logger.info("Admin client Kafka instance was finished")
         except KafkaError as error:
             logger.exception("Common base broker error - %s", error)
@@ -121,8 +123,8 @@ class KafkaAdmin:
     async def create_topic(
         self,
         topic_name: str,
-        num_partitions: int = 1,
-        replication_factor: int = 1,
+        num_partitions: int = KAFKA_TOPIC_PARTITIONS,
+        replication_factor: int = KAFKA_TOPIC_REPLICATION_FACTOR,
     ) -> dict[str, str]:
         """
         Creation of new Kafka topic
@@ -134,14 +136,13 @@ class KafkaAdmin:
         :return dict: Message indicating the success of the topic creation
         """
         try:
-            response_result = {"topic_errors": [("Test", 0, "Test")]}
-            async with self.start_context_manager() as admin_client:
-                new_topic = NewTopic(
-                    name=topic_name,
-                    num_partitions=num_partitions,
-                    replication_factor=replication_factor,
-                )
-                response_result = await admin_client.create_topics([new_topic])
+            new_topic = NewTopic(
+                name=topic_name,
+                num_partitions=num_partitions,
+                replication_factor=replication_factor,
+            )
+            response_result = await self._client().create_topics([new_topic])
+            self.topics = None
             if (
                 KAFKA_TOPIC_ALREADY_EXISTS_ERROR in response_result.topic_errors[0]
                 and "already exists" in response_result.topic_errors[0][2]
@@ -174,6 +175,48 @@ class KafkaAdmin:
                 detail=f"Failed to create topic '{topic_name}', because {str(exception)}",
             ) from exception
 
+    async def ensure_partitions(
+        self, topic_name: str, num_partitions: int = KAFKA_TOPIC_PARTITIONS
+    ) -> int:
+        """
+        Growing partitions of existing Kafka topic up to the configured number
+
+        Partitions are never removed. Keys of new messages are mapped over
+        the grown partitions, so per-key ordering only holds for messages
+        sent after the growth
+
+        :param str topic_name: The existing topic name
+        :param int num_partitions: The required number of partitions
+        :return int: The number of topic partitions
+        """
+        try:
+            admin_client = self._client()
+            topics = await admin_client.describe_topics([topic_name])
+            current_partitions = len(topics[0]["partitions"])
+            if current_partitions >= num_partitions:
+                return current_partitions
+            await admin_client.create_partitions(
+                {topic_name: NewPartitions(total_count=num_partitions)}
+            )
+            self.topics = None
+            logger.info(
+                "Topic '%s' partitions were grown from %s to %s",
+                topic_name,
+                current_partitions,
+                num_partitions,
+            )
+            return num_partitions
+        except KafkaError as error:
+            logger.exception(
+                "Common base broker error for partitions of topic '%s' - %s",
+                topic_name,
+                error,
+            )
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Common base broker error for partitions of topic '{topic_name}' - {str(error)}",
+            ) from error
+
     async def delete_topic(self, topic_name: str) -> dict[str, str]:
         """
         Deleting Kafka topic
@@ -183,12 +226,8 @@ class KafkaAdmin:
         :return dict: Message indicating the success of the topic deleting
         """
         try:
-            if self.admin_client is None:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="Kafka admin client is not initialized",
-                )
-            await self.admin_client.delete_topics([topic_name])
+            await self._client().delete_topics([topic_name])
+            self.topics = None
             logger.info("Topic '%s' was deleted successfully", topic_name)
             return {"message": f"Topic '{topic_name}' was deleted successfully"}
         except KafkaError as error:
@@ -210,31 +249,87 @@ class KafkaAdmin:
                 detail=f"Failed to delete topic '{topic_name}', because {str(exception)}",
             ) from exception
 
-    async def list_topics(self) -> None:
+    async def _fetch_topics(self) -> list[dict[str, Any]]:
         """
-        Listing all Kafka topics
+        Topics partitions and configs fetching from the cluster
+
+        :return list: Topics metadata sorted by name
+        """
+        admin_client = self._client()
+        topics = await admin_client.describe_topics()
+        configs: dict[str, dict[str, Optional[str]]] = {}
+        if topics:
+            responses = await admin_client.describe_configs(
+                [ConfigResource(ConfigResourceType.TOPIC, topic["topic"]) for topic in topics]
+            )
+            for response in responses:
+                for resource in response.to_object()["resources"]:
+                    configs[resource["resource_name"]] = {
+                        entry["config_names"]: (
+                            None if entry["is_sensitive"] else entry["config_value"]
+                        )
+                        for entry in resource["config_entries"]
+                    }
+        self.topics = sorted(
+            (
+                {
+                    "name": topic["topic"],
+                    "internal": bool(topic.get("is_internal", False)),
+                    "partitions": sorted(
+                        (
+                            {
+                                "partition": partition["partition"],
+                                "leader": partition["leader"],
+                                "replicas": partition["replicas"],
+                                "isr": partition["isr"],
+                            }
+                            for partition in topic["partitions"]
+                        ),
+                        key=lambda partition: partition["partition"],
+                    ),
+                    "configs": configs.get(topic["topic"], {}),
+                }
+                for topic in topics
+            ),
+            key=lambda topic: topic["name"],
+        )
+        self.topics_fetched_at = monotonic()
+        logger.info("Metadata of %s Kafka topics was fetched", len(self.topics))
+        return self.topics
+
+    async def describe_topics(self) -> list[dict[str, Any]]:
+        """
+        Topics partitions and configs obtaining, refetched after the metadata TTL
+
+        :return list: Topics metadata sorted by name
         """
         try:
-            if self.admin_client is None:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="Kafka admin client is not initialized",
-                )
-            topics = await self.admin_client.list_topics()
-            for topic in topics:
-                logger.info(topic)
+            if (
+                self.topics is not None
+                and monotonic() - self.topics_fetched_at < self.metadata_expire
+            ):
+                return self.topics
+            async with self._lock:
+                if (
+                    self.topics is not None
+                    and monotonic() - self.topics_fetched_at < self.metadata_expire
+                ):
+                    return self.topics
+                return await self._fetch_topics()
         except KafkaError as error:
-            logger.exception("Common base broker error for topic listing - %s", error)
+            logger.exception("Common base broker error for topics describing - %s", error)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Common base broker error for topic listing - {str(error)}",
+                detail=f"Common base broker error for topics describing - {str(error)}",
             ) from error
-        except Exception as exception:
-            logger.exception("Failed to list topics, because %s", exception)
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to list topics, because {str(exception)}",
-            ) from exception
+
+    async def list_topics(self) -> list[str]:
+        """
+        Listing all Kafka topics
+
+        :return list[str]: Topic names from the cached metadata
+        """
+        return [topic["name"] for topic in await self.describe_topics()]
 
 
 kafka_admin = KafkaAdmin(bootstrap_servers=f"{KAFKA_HOSTNAME}:{KAFKA_PORT}")
@@ -0,0 +1,356 @@
+import asyncio
+import os
+import signal
+from collections import defaultdict
+from time import perf_counter
+from typing import Awaitable, Callable, Final, Optional, Sequence
+
+from aiokafka import AIOKafkaConsumer, AIOKafkaProducer, ConsumerRecord, TopicPartition
+from aiokafka.errors import KafkaConnectionError, KafkaError, KafkaTimeoutError
+from dotenv import load_dotenv
+from fastapi import HTTPException, status
+
+from app.brokers.message_codec import schema_registry
+from app.configs.logging_handler import configure_logging_handler
+from app.utils.metrics import metrics_registry
+
+logger = configure_logging_handler()
+
+load_dotenv()
+
+KAFKA_HOSTNAME: Final[Optional[str]] = os.getenv("KAFKA_HOSTNAME", "")
+KAFKA_PORT: Final[Optional[str]] = os.getenv("KAFKA_PORT", "")
+KAFKA_CONSUMER_ENABLED: Final[bool] = (
+    os.getenv("KAFKA_CONSUMER_ENABLED", "false").lower() == "true"
+)
+KAFKA_CONSUMER_GROUP_ID: Final[str] = os.getenv("KAFKA_CONSUMER_GROUP_ID", "super-auth")
+KAFKA_CONSUMER_MAX_RECORDS: Final[int] = int(os.getenv("KAFKA_CONSUMER_MAX_RECORDS", "500"))
+KAFKA_CONSUMER_POLL_TIMEOUT_MS: Final[int] = int(
+    os.getenv("KAFKA_CONSUMER_POLL_TIMEOUT_MS", "1000")
+)
+KAFKA_CONSUMER_CONCURRENCY: Final[int] = int(os.getenv("KAFKA_CONSUMER_CONCURRENCY", "8"))
+KAFKA_CONSUMER_OFFSET_RESET: Final[str] = os.getenv("KAFKA_CONSUMER_OFFSET_RESET", "earliest")
+KAFKA_CONSUMER_MAX_ATTEMPTS: Final[int] = int(os.getenv("KAFKA_CONSUMER_MAX_ATTEMPTS", "5"))
+KAFKA_CONSUMER_DEAD_LETTER_TOPIC: Final[str] = os.getenv("KAFKA_CONSUMER_DEAD_LETTER_TOPIC", "")
+
+MessageHandler = Callable[[ConsumerRecord], Awaitable[None]]
+
+messages_consumed = metrics_registry.counter(
+    name="kafka_consumer_messages_total",
+    description="Kafka consumed messages by topic and handling outcome",
+)
+handling_duration = metrics_registry.histogram(
+    name="kafka_consumer_handling_seconds",
+    description="Time handling one consumed Kafka message",
+)
+
+
+class KafkaConsumer:
+    """
+    Consuming Kafka topics with registered message handlers
+
+    Records are polled in batches and handled concurrently within every
+    partition, while records sharing a key are handled one by one in the
+    offset order. Offsets are committed manually after the handlers
+    finish, so delivery is at least once. A record failing max attempts
+    times is sent to the dead-letter topic, or only logged without one,
+    and skipped, so it never stalls its partition
+    """
+
+    def __init__(  # pylint: disable=R0913
+        self,
+        bootstrap_servers: str,
+        group_id: str = KAFKA_CONSUMER_GROUP_ID,
+        max_records: int = KAFKA_CONSUMER_MAX_RECORDS,
+        poll_timeout_ms: int = KAFKA_CONSUMER_POLL_TIMEOUT_MS,
+        concurrency: int = KAFKA_CONSUMER_CONCURRENCY,
+        auto_offset_reset: str = KAFKA_CONSUMER_OFFSET_RESET,
+        max_attempts: int = KAFKA_CONSUMER_MAX_ATTEMPTS,
+        dead_letter_topic: str = KAFKA_CONSUMER_DEAD_LETTER_TOPIC,
+    ):
+        """
+        Initialize the KafkaConsumer instance
+
+        :param str bootstrap_servers: Kafka connecting server
+        :param str group_id: Consumer group sharing the topics partitions
+        :param int max_records: Maximum number of records polled at once
+        :param int poll_timeout_ms: Time waiting for records in one poll
+        :param int concurrency: Maximum number of keys handled at once per partition
+        :param str auto_offset_reset: Starting position without a committed offset
+        :param int max_attempts: Handling attempts of one record before skipping it
+        :param str dead_letter_topic: Topic receiving skipped records, empty disables it
+        """
+        self.bootstrap_servers = bootstrap_servers
+        self.group_id = group_id
+        self.max_records = max_records
+        self.poll_timeout_ms = poll_timeout_ms
+        self.concurrency = concurrency
+        self.auto_offset_reset = auto_offset_reset
+        self.max_attempts = max_attempts
+        self.dead_letter_topic = dead_letter_topic
+        self.handlers: defaultdict[str, list[MessageHandler]] = defaultdict(list)
+        self.attempts: dict[tuple[TopicPartition, int], int] = {}  # Failures by record
+        self.consumer: Optional[AIOKafkaConsumer] = None
+        self.dead_letter_producer: Optional[AIOKafkaProducer] = None
+
+    def handler(self, topic: str) -> Callable[[MessageHandler], MessageHandler]:
+        """
+        Message handler registration for the topic
+
+        :param str topic: Handled Kafka topic
+        :return Callable: Decorator registering the handler
+        """
+
+        def register(function: MessageHandler) -> MessageHandler:
+            self.handlers[topic].append(function)
+            return function
+
+        return register
+
+    async def start(self) -> AIOKafkaConsumer:
+        """
+        Creation of active Kafka consumer subscribed to the handled topics
+
+        :returns AIOKafkaConsumer: The AIOKafkaConsumer instance
+        """
+        try:
+            if self.consumer is None:
+                self.consumer = AIOKafkaConsumer(
+                    *self.handlers,
+                    bootstrap_servers=self.bootstrap_servers,
+                    group_id=self.group_id,
+                    enable_auto_commit=False,
+                    auto_offset_reset=self.auto_offset_reset,
+                )
+            await self.consumer.start()
+            if self.dead_letter_topic and self.dead_letter_producer is None:
+                self.dead_letter_producer = AIOKafkaProducer(
+                    bootstrap_servers=self.bootstrap_servers, acks="all"
+                )
+                await self.dead_letter_producer.start()
+            logger.info("Kafka consumer of topics %s was started", sorted(self.handlers))
+            return self.consumer
+        except KafkaTimeoutError as error:
+            logger.exception("Timeout Kafka connection error")
+            raise HTTPException(
+                status_code=status.HTTP_408_REQUEST_TIMEOUT,
+                detail="Timeout Kafka connection error",
+            ) from error
+        except KafkaConnectionError as error:
+            logger.exception("Unable to connect to Kafka server")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Unable to connect to Kafka server",
+            ) from error
+
+    async def _handle(self, record: ConsumerRecord) -> None:
+        """
+        Record handling by every handler of its topic
+
+        :param ConsumerRecord record: Consumed record
+        """
+        started = perf_counter()
+        try:
+            for message_handler in self.handlers[record.topic]:
+                await message_handler(record)
+        except Exception:
+            messages_consumed.inc(topic=record.topic, outcome="failed")
+            raise
+        finally:
+            handling_duration.observe(perf_counter() - started, topic=record.topic)
+        messages_consumed.inc(topic=record.topic, outcome="handled")
+
+    async def _dead_letter(self, record: ConsumerRecord, error: Exception) -> None:
+        """
+        Skipped record sending to the dead-letter topic, or logging without it
+
+        :param ConsumerRecord record: Record failed max attempts times
+        :param Exception error: Last handling error
+        """
+        if self.dead_letter_producer is not None:
+            await self.dead_letter_producer.send_and_wait(
+                self.dead_letter_topic,
+                value=record.value,
+                key=record.key,
+                headers=[
+                    *(record.headers or ()),
+                    ("source", f"{record.topic}:{record.partition}:{record.offset}".encode()),
+                    ("error", str(error).encode("utf-8")),
+                ],
+            )
+        messages_consumed.inc(topic=record.topic, outcome="dead_lettered")
+        logger.error(
+            "Record %s:%s:%s was skipped after %s attempts%s",
+            record.topic,
+            record.partition,
+            record.offset,
+            self.max_attempts,
+            f", it was sent to '{self.dead_letter_topic}'" if self.dead_letter_producer else "",
+        )
+
+    async def handle_partition(self, records: Sequence[ConsumerRecord]) -> int:
+        """
+        Partition records handling with per-key ordering
+
+        Records are split into lanes by key, lanes run concurrently and
+        a lane stops at its first failed record, unless the record has
+        failed max attempts times and is dead-lettered
+
+        :param Sequence[ConsumerRecord] records: Partition records in the offset order
+        :return int: Offset of the first record to consume again, every record
+        before it was handled
+        """
+        lanes: defaultdict[Optional[bytes], list[ConsumerRecord]] = defaultdict(list)
+        for record in records:
+            lanes[record.key].append(record)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        next_offset: int = records[-1].offset + 1
+
+        async def handle_lane(lane: list[ConsumerRecord]) -> None:
+            nonlocal next_offset
+            async with semaphore:
+                for record in lane:
+                    attempt = (TopicPartition(record.topic, record.partition), record.offset)
+                    try:
+                        await self._handle(record)
+                        self.attempts.pop(attempt, None)
+                    except Exception as error:  # pylint: disable=W0718
+                        logger.exception(
+                            "Handling of record %s:%s:%s failed",
+                            record.topic,
+                            record.partition,
+                            record.offset,
+                        )
+                        self.attempts[attempt] = self.attempts.get(attempt, 0) + 1
+                        if self.attempts[attempt] >= self.max_attempts:
+                            try:
+                                await self._dead_letter(record, error)
+                                self.attempts.pop(attempt)
+                                continue
+                            except KafkaError:
+                                logger.exception("Dead-letter sending failed")
+                        next_offset = min(next_offset, record.offset)
+                        return
+
+        await asyncio.gather(*(handle_lane(lane) for lane in lanes.values()))
+        return next_offset
+
+    async def consume_batch(self) -> int:
+        """
+        One batch polling, handling and offsets committing
+
+        Partitions of the batch are handled concurrently. Handled records are
+        committed, and partitions with failed records are rewound to the
+        first failed record, retried after the poll timeout until it is
+        dead-lettered
+
+        :return int: Number of polled records
+        """
+        if self.consumer is None:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Kafka consumer is not initialized",
+            )
+        batches: dict[TopicPartition, list[ConsumerRecord]] = await self.consumer.getmany(
+            timeout_ms=self.poll_timeout_ms, max_records=self.max_records
+        )
+        if not batches:
+            return 0
+        partitions = list(batches)
+        next_offsets = await asyncio.gather(
+            *(self.handle_partition(batches[partition]) for partition in partitions)
+        )
+        offsets: dict[TopicPartition, int] = {}
+        rewound = False
+        for partition, next_offset in zip(partitions, next_offsets):
+            if next_offset > batches[partition][0].offset:
+                offsets[partition] = next_offset
+            if next_offset <= batches[partition][-1].offset:
+                self.consumer.seek(partition, next_offset)
+                rewound = True
+        if offsets:
+            await self.consumer.commit(offsets)
+            for attempt in [
+                attempt
+                for attempt in self.attempts
+                if attempt[1] < offsets.get(attempt[0], attempt[1])
+            ]:
+                del self.attempts[attempt]  # Records handled by another consumer
+        if rewound:
+            await asyncio.sleep(self.poll_timeout_ms / 1000)
+        return sum(len(records) for records in batches.values())
+
+    async def run(self) -> None:
+        """
+        Records consuming until cancellation
+
+        Unexpected failures are logged and retried after a backoff, so the
+        consumer never stops silently while the application keeps running
+        """
+        while True:
+            try:
+                await self.consume_batch()
+            except asyncio.CancelledError:
+                raise
+            except KafkaError:
+                logger.warning("Kafka consuming failed", exc_info=True)
+                await asyncio.sleep(self.poll_timeout_ms / 1000)
+            except Exception:  # pylint: disable=W0718
+                logger.exception("Kafka consuming failed unexpectedly")
+                await asyncio.sleep(self.poll_timeout_ms / 1000)
+
+    async def stop(self) -> None:
+        """
+        Stopping Kafka consumer
+        """
+        if self.consumer:
+            await self.consumer.stop()
+            logger.info("Kafka consumer was finished")
+        if self.dead_letter_producer:
+            await self.dead_letter_producer.stop()
+            self.dead_letter_producer = None
+
+
+kafka_consumer = KafkaConsumer(bootstrap_servers=f"{KAFKA_HOSTNAME}:{KAFKA_PORT}")
+
+
+@kafka_consumer.handler("events")
+async def log_event_notification(record: ConsumerRecord) -> None:
+    """
+    Events topic notifications logging
+
+    :param ConsumerRecord record: Consumed record
+    """
+    try:
+        notification = schema_registry.decode(record.value).value
+    except ValueError:  # Plain text notifications written before the schema or malformed ones
+        logger.info("Event notification was consumed - %s", record.value)
+        return
+    logger.info(
+        "Event %s '%s' of client '%s' was %s",
+        notification["event_id"],
+        notification["name"],
+        notification["client_info"],
+        notification["action"].lower(),
+    )
+
+
+async def run_worker() -> None:
+    """
+    Standalone consumer running until SIGINT or SIGTERM
+    """
+    worker = asyncio.current_task()
+    if worker is not None:
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            asyncio.get_running_loop().add_signal_handler(signal_number, worker.cancel)
+    await kafka_consumer.start()
+    try:
+        await kafka_consumer.run()
+    except asyncio.CancelledError:
+        logger.info("Kafka consumer worker was cancelled")
+    finally:
+        await kafka_consumer.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_worker())
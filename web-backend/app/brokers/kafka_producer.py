@@ -1,7 +1,11 @@
+import asyncio
 import os
-from typing import Final, Optional
+from contextlib import suppress
+from time import monotonic, perf_counter
+from typing import Callable, Final, Optional, Sequence
 
 from aiokafka import AIOKafkaProducer
+from aiokafka.structs import RecordMetadata
 from aiokafka.errors import (
     KafkaConnectionError,
     KafkaError,
@@ -10,7 +14,10 @@ from aiokafka.errors import (
 from dotenv import load_dotenv
 from fastapi import HTTPException, Request, status
 
+from app.brokers.spill_log import KAFKA_SPILL_ENABLED, SpillLog, spill_depth, spill_size
 from app.configs.logging_handler import configure_logging_handler
+from app.schemas.kafka import BatchKafkaMessage
+from app.utils.metrics import metrics_registry
 
 logger = configure_logging_handler()
 
@@ -18,6 +25,36 @@ load_dotenv()
 
 KAFKA_HOSTNAME: Final[Optional[str]] = os.getenv("KAFKA_HOSTNAME", "")
 KAFKA_PORT: Final[Optional[str]] = os.getenv("KAFKA_PORT", "")
+KAFKA_PRODUCER_LINGER_MS: Final[int] = int(os.getenv("KAFKA_PRODUCER_LINGER_MS", "5"))
+KAFKA_PRODUCER_MAX_BATCH_SIZE: Final[int] = int(
+    os.getenv("KAFKA_PRODUCER_MAX_BATCH_SIZE", "65536")
+)
+KAFKA_PRODUCER_COMPRESSION_TYPE: Final[Optional[str]] = (
+    os.getenv("KAFKA_PRODUCER_COMPRESSION_TYPE", "gzip") or None
+)
+KAFKA_PRODUCER_ACKS: Final[str] = os.getenv("KAFKA_PRODUCER_ACKS", "all")
+KAFKA_PRODUCER_FIRE_AND_FORGET: Final[bool] = (
+    os.getenv("KAFKA_PRODUCER_FIRE_AND_FORGET", "false").lower() == "true"
+)
+KAFKA_SPILL_DRAIN_INTERVAL: Final[float] = float(
+    os.getenv("KAFKA_SPILL_DRAIN_INTERVAL", "5")
+)
+KAFKA_SPILL_DRAIN_BATCH: Final[int] = 500
+
+FailureCallback = Callable[[str, bytes, BaseException], None]
+
+messages_sent = metrics_registry.counter(
+    name="kafka_producer_messages_total",
+    description="Kafka produced messages by topic and delivery outcome",
+)
+delivery_duration = metrics_registry.histogram(
+    name="kafka_producer_delivery_seconds",
+    description="Time from enqueueing a Kafka message to its acknowledgement",
+)
+pending_deliveries = metrics_registry.gauge(
+    name="kafka_producer_pending_deliveries",
+    description="Kafka messages enqueued but not yet acknowledged",
+)
 
 
 class KafkaProducer:
@@ -28,16 +65,42 @@ class KafkaProducer:
     and sending Kafka messages, as well as to start and stop the Kafka producer
     """
 
-    def __init__(self, bootstrap_servers: str, topic: str):
+    def __init__(  # pylint: disable=R0913
+        self,
+        bootstrap_servers: str,
+        topic: str,
+        linger_ms: int = KAFKA_PRODUCER_LINGER_MS,
+        max_batch_size: int = KAFKA_PRODUCER_MAX_BATCH_SIZE,
+        compression_type: Optional[str] = KAFKA_PRODUCER_COMPRESSION_TYPE,
+        acks: str = KAFKA_PRODUCER_ACKS,
+        fire_and_forget: bool = KAFKA_PRODUCER_FIRE_AND_FORGET,
+        spill_log: Optional[SpillLog] = None,
+    ):
         """
         Initialize the KafkaProducer instance
 
         :param str bootstrap_servers: Kafka connecting server
         :param str topic: Kafka topic name
+        :param int linger_ms: Time waiting for more messages of the same batch
+        :param int max_batch_size: Maximum size of the partition batch in bytes
+        :param str compression_type: Batches compression codec, None disables it
+        :param str acks: Required acknowledgements, "0", "1" or "all"
+        :param bool fire_and_forget: Not waiting for delivery when sending messages
+        :param SpillLog spill_log: Disk log of messages sent while Kafka is unavailable
         """
         self.bootstrap_servers = bootstrap_servers
         self.topic = topic
+        self.linger_ms = linger_ms
+        self.max_batch_size = max_batch_size
+        self.compression_type = compression_type
+        self.acks: int | str = acks if acks == "all" else int(acks)
+        self.fire_and_forget = fire_and_forget
         self.producer: Optional[AIOKafkaProducer] = None
+        self.pending: set[asyncio.Future[RecordMetadata]] = set()
+        self.failure_callbacks: list[FailureCallback] = []
+        self.spill_log = spill_log
+        self.drain_task: Optional[asyncio.Task[None]] = None
+        self.spill_wakeup = asyncio.Event()
 
     async def start(self) -> AIOKafkaProducer:
         """
@@ -49,8 +112,14 @@ class KafkaProducer:
             if self.producer is None:
                 self.producer = AIOKafkaProducer(
                     bootstrap_servers=self.bootstrap_servers,
+                    linger_ms=self.linger_ms,
+                    max_batch_size=self.max_batch_size,
+                    compression_type=self.compression_type,
+                    acks=self.acks,
                 )
             await self.producer.start()
+            if self.spill_log is not None and self.drain_task is None:
+                self.drain_task = asyncio.create_task(self.run_spill_drain())
             logger.info("Admin client Kafka producer instance was started")
             return self.producer
         except KafkaTimeoutError as error:
@@ -72,44 +141,293 @@ class KafkaProducer:
                 detail=f"Failed to start Kafka, because of {str(exception)}",
             ) from exception
 
-    async def send_message(self, topic: str, message: str | bytes) -> None:
+    def add_failure_callback(self, callback: FailureCallback) -> None:
+        """
+        Callback registration for messages failed in background delivery
+
+        :param FailureCallback callback: Function receiving topic, message and error
+        """
+        self.failure_callbacks.append(callback)
+
+    def _track(
+        self,
+        delivery: "asyncio.Future[RecordMetadata]",
+        topic: str,
+        message: bytes,
+        background: bool = False,
+        key: Optional[bytes] = None,
+    ) -> None:
+        """
+        Background delivery tracking with metrics and failure callbacks
+
+        :param Future delivery: Message delivery future
+        :param str topic: Message topic
+        :param bytes message: Sent message
+        :param bool background: Nobody awaits the delivery, so failed messages are spilled
+        :param bytes key: Sent message partitioning key
+        """
+        started = perf_counter()
+        self.pending.add(delivery)
+
+        def on_delivered(future: "asyncio.Future[RecordMetadata]") -> None:
+            self.pending.discard(future)
+            delivery_duration.observe(perf_counter() - started, topic=topic)
+            error = (
+                asyncio.CancelledError() if future.cancelled() else future.exception()
+            )
+            if error is None:
+                messages_sent.inc(topic=topic, outcome="delivered")
+                return
+            messages_sent.inc(topic=topic, outcome="failed")
+            logger.error("Message delivery to topic '%s' failed - %s", topic, error)
+            for callback in self.failure_callbacks:
+                try:
+                    callback(topic, message, error)
+                except Exception:  # pylint: disable=W0718
+                    logger.exception("Delivery failure callback error")
+            if background:
+                self._spill(topic=topic, message=message, error=error, key=key)
+
+        delivery.add_done_callback(on_delivered)
+
+    @staticmethod
+    def _is_unavailable(error: BaseException) -> bool:
+        """
+        Checking whether the error means the broker is unavailable
+
+        :param BaseException error: Sending error
+        :return bool: True for timeouts and retriable broker errors
+        """
+        return isinstance(error, KafkaTimeoutError) or (
+            isinstance(error, KafkaError) and error.retriable
+        )
+
+    def _spill(
+        self, topic: str, message: bytes, error: BaseException, key: Optional[bytes] = None
+    ) -> bool:
+        """
+        Message spilling to disk when the broker is unavailable
+
+        :param str topic: Message topic
+        :param bytes message: Sent message
+        :param BaseException error: Sending error
+        :param bytes key: Sent message partitioning key
+        :return bool: Whether the message was spilled
+        """
+        if self.spill_log is None or not self._is_unavailable(error):
+            return False
+        self.spill_log.append(topic=topic, value=message, key=key)
+        self.spill_wakeup.set()
+        logger.warning("Message to topic '%s' was spilled - %s", topic, error)
+        return True
+
+    async def drain_spilled(self) -> int:
+        """
+        Spilled messages sending in the appending order
+
+        Messages are sent with their keys in batches, and the drain stops at
+        the first undelivered message, which stays spilled for the next drain
+
+        :return int: Number of drained messages
+        """
+        if self.spill_log is None or self.producer is None:
+            return 0
+        spill_log = self.spill_log
+        await asyncio.to_thread(spill_log.write_buffered)
+        drained = 0
+        while messages := await asyncio.to_thread(
+            spill_log.read, max_messages=KAFKA_SPILL_DRAIN_BATCH
+        ):
+            deliveries = []
+            try:
+                for spilled in messages:
+                    deliveries.append(
+                        await self.producer.send(
+                            topic=spilled.topic, value=spilled.value, key=spilled.key
+                        )
+                    )
+            finally:
+                results = await asyncio.gather(*deliveries, return_exceptions=True)
+                delivered = next(
+                    (
+                        index
+                        for index, result in enumerate(results)
+                        if isinstance(result, BaseException)
+                    ),
+                    len(results),
+                )
+                await asyncio.to_thread(spill_log.commit, messages[:delivered])
+                drained += delivered
+            if delivered < len(messages):
+                break
+        return drained
+
+    async def run_spill_drain(self) -> None:
+        """
+        Spilled messages writing, syncing and periodic draining until cancellation
+
+        Spilled messages are written to disk in a worker thread after every
+        wake-up or fsync interval, and drained once per drain interval
+        """
+        if self.spill_log is None:
+            return
+        drained_at = monotonic()
+        while True:
+            with suppress(TimeoutError):
+                async with asyncio.timeout(self.spill_log.fsync_interval):
+                    await self.spill_wakeup.wait()
+            self.spill_wakeup.clear()
+            try:
+                await asyncio.to_thread(self.spill_log.write_buffered)
+                if (
+                    not self.spill_log.depth
+                    or monotonic() - drained_at < KAFKA_SPILL_DRAIN_INTERVAL
+                ):
+                    continue
+                drained_at = monotonic()
+                drained = await self.drain_spilled()
+                logger.info("%s spilled messages were drained", drained)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exception:  # pylint: disable=W0718
+                logger.warning("Spilled messages draining stopped - %s", exception)
+
+    async def send_message(
+        self,
+        topic: str,
+        message: str | bytes,
+        wait: Optional[bool] = None,
+        key: Optional[str | bytes] = None,
+    ) -> Optional[RecordMetadata]:
         """
         Sending message to Kafka topic
 
+        In fire-and-forget mode the message is only enqueued into the producer
+        batch and its delivery is tracked in the background
+
         :param str topic: The Kafka topic for message sending
         :param str | bytes message: The message for sending
+        :param bool wait: Waiting for delivery, the producer mode by default
+        :param str | bytes key: Partitioning key, kept when the message is spilled
+        :return RecordMetadata | None: Delivered message metadata when waiting,
+        None when enqueued or spilled
         """
+        if isinstance(message, str):
+            message = message.encode("utf-8")
+        if isinstance(key, str):
+            key = key.encode("utf-8")
+        if self.spill_log is not None and self.spill_log.depth:
+            # Behind the spilled messages
+            self.spill_log.append(topic=topic, value=message, key=key)
+            self.spill_wakeup.set()
+            return None
         try:
-            if isinstance(message, str):
-                message = message.encode("utf-8")
             if self.producer is None:
                 raise HTTPException(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                     detail="Kafka producer is not initialized",
                 )
-            await self.producer.send_and_wait(topic=topic, value=message)
+            background = wait is False or (wait is None and self.fire_and_forget)
+            delivery = await self.producer.send(topic=topic, value=message, key=key)
+            self._track(
+                delivery=delivery, topic=topic, message=message, background=background, key=key
+            )
+            if background:
+                logger.info("Message was enqueued to topic '%s'", topic)
+                return None
+            metadata: RecordMetadata = await delivery
             logger.info("Message was sent to topic '%s'", topic)
+            return metadata
         except KafkaConnectionError as error:
+            if self._spill(topic=topic, message=message, error=error, key=key):
+                return None
             logger.exception("Common base broker error -  %s", error)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Common base broker error - {str(error)}",
             ) from error
         except Exception as exception:
+            if self._spill(topic=topic, message=message, error=exception, key=key):
+                return None
             logger.exception("Failed to send message to Kafka, because of %s", exception)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Failed to send message to Kafka, because of {str(exception)}",
             ) from exception
 
+    async def send_batch(
+        self, messages: Sequence[BatchKafkaMessage]
+    ) -> list[RecordMetadata | BaseException]:
+        """
+        Sending messages batch to Kafka topics
+
+        All messages are enqueued into the producer batches first, and
+        their deliveries are awaited together. Failed messages are returned
+        to the caller and never spilled, the outbox relay retries them itself
+
+        :param Sequence[BatchKafkaMessage] messages: Messages for sending
+        :return list: Delivered messages metadata or errors in the messages order
+        """
+        if self.producer is None:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Kafka producer is not initialized",
+            )
+        deliveries: list[asyncio.Future[RecordMetadata]] = []
+        for batch_message in messages:
+            value = (
+                batch_message.message
+                if isinstance(batch_message.message, bytes)
+                else batch_message.message.encode("utf-8")
+            )
+            delivery: asyncio.Future[RecordMetadata]
+            try:
+                delivery = await self.producer.send(
+                    topic=batch_message.topic,
+                    value=value,
+                    key=batch_message.key.encode("utf-8") if batch_message.key else None,
+                    headers=[
+                        (name, header.encode("utf-8"))
+                        for name, header in batch_message.headers.items()
+                    ]
+                    or None,
+                )
+                self._track(delivery=delivery, topic=batch_message.topic, message=value)
+            except KafkaError as error:
+                logger.error(
+                    "Message enqueueing to topic '%s' failed - %s", batch_message.topic, error
+                )
+                delivery = asyncio.get_running_loop().create_future()
+                delivery.set_exception(error)
+            deliveries.append(delivery)
+        results = await asyncio.gather(*deliveries, return_exceptions=True)
+        logger.info("Batch of %s messages was sent", len(results))
+        return results
+
+    async def flush(self) -> None:
+        """
+        Waiting for all background deliveries
+        """
+        while self.pending:
+            await asyncio.gather(*self.pending, return_exceptions=True)
+            await asyncio.sleep(0)  # Delivery callbacks running
+
     async def stop(self) -> None:
         """
         Stopping Kafka producer
         """
         try:
+            if self.drain_task is not None:
+                self.drain_task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await self.drain_task
+                self.drain_task = None
             if self.producer:
+                await self.flush()
                 await self.producer.stop()
                 logger.info("Admin client Kafka producer instance was finished")
+            if self.spill_log is not None:
+                await asyncio.to_thread(self.spill_log.close)
         except KafkaError as error:
             logger.exception("Common base broker error - %s", error)
             raise HTTPException(
@@ -142,5 +460,14 @@ async def get_producer(request: Request) -> AIOKafkaProducer:
 
 kafka_producer = KafkaProducer(
     bootstrap_servers=f"{KAFKA_HOSTNAME}:{KAFKA_PORT}",
-    topic="events"
+    topic="events",
+    spill_log=SpillLog() if KAFKA_SPILL_ENABLED else None,
 )
+pending_deliveries.set_function(lambda: len(kafka_producer.pending))
+if kafka_producer.spill_log is not None:
+    spill_depth.set_function(
+        lambda: kafka_producer.spill_log.depth if kafka_producer.spill_log else 0
+    )
+    spill_size.set_function(
+        lambda: kafka_producer.spill_log.size if kafka_producer.spill_log else 0
+    )
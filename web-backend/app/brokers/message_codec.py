@@ -0,0 +1,389 @@
+import json
+import os
+import struct
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Final, NamedTuple, Optional
+
+from dotenv import load_dotenv
+
+from app.configs.logging_handler import configure_logging_handler
+
+logger = configure_logging_handler()
+
+load_dotenv()
+
+KAFKA_SCHEMA_DIRECTORY: Final[str] = os.getenv(
+    "KAFKA_SCHEMA_DIRECTORY", str(Path(__file__).parent / "schemas")
+)
+MAGIC_BYTE: Final[int] = 0
+SCHEMA_HEADER = struct.Struct(">bI")  # Magic byte and schema id
+EPOCH_DATE: Final[date] = date(1970, 1, 1)
+EPOCH: Final[datetime] = datetime(1970, 1, 1, tzinfo=timezone.utc)
+DOUBLE = struct.Struct("<d")
+
+Encoder = Callable[[bytearray, Any], None]
+Decoder = Callable[[memoryview, int], tuple[Any, int]]
+
+
+class CompiledSchema(NamedTuple):
+    """
+    Registered schema with its compiled encoder and decoder
+
+    """
+
+    schema_id: int
+    subject: str
+    encoder: Encoder
+    decoder: Decoder
+
+
+class DecodedMessage(NamedTuple):
+    """
+    Decoded message with its writer schema
+
+    """
+
+    subject: str
+    schema_id: int
+    value: Any
+
+
+def write_long(buffer: bytearray, value: int) -> None:
+    """
+    Zigzag variable-length integer writing
+
+    :param bytearray buffer: Encoded message
+    :param int value: Written integer
+    """
+    zigzag = (value << 1) ^ (value >> 63)
+    while zigzag & ~0x7F:
+        buffer.append((zigzag & 0x7F) | 0x80)
+        zigzag >>= 7
+    buffer.append(zigzag)
+
+
+def read_long(view: memoryview, offset: int) -> tuple[int, int]:
+    """
+    Zigzag variable-length integer reading
+
+    :param memoryview view: Encoded message
+    :param int offset: Integer offset
+    :return tuple: Integer and the next offset
+    """
+    result = shift = 0
+    while True:
+        byte = view[offset]
+        offset += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return (result >> 1) ^ -(result & 1), offset
+        shift += 7
+
+
+def write_bytes(buffer: bytearray, value: bytes) -> None:
+    """
+    Length-prefixed bytes writing
+
+    :param bytearray buffer: Encoded message
+    :param bytes value: Written bytes
+    """
+    write_long(buffer, len(value))
+    buffer += value
+
+
+def read_bytes(view: memoryview, offset: int) -> tuple[bytes, int]:
+    """
+    Length-prefixed bytes reading
+
+    :param memoryview view: Encoded message
+    :param int offset: Bytes length offset
+    :return tuple: Bytes and the next offset
+    """
+    length, offset = read_long(view, offset)
+    return bytes(view[offset : offset + length]), offset + length
+
+
+def encode_string(buffer: bytearray, value: str) -> None:
+    """
+    UTF-8 string writing
+
+    :param bytearray buffer: Encoded message
+    :param str value: Written string
+    """
+    write_bytes(buffer, value.encode("utf-8"))
+
+
+def decode_string(view: memoryview, offset: int) -> tuple[str, int]:
+    """
+    UTF-8 string reading
+
+    :param memoryview view: Encoded message
+    :param int offset: String length offset
+    :return tuple: String and the next offset
+    """
+    raw, offset = read_bytes(view, offset)
+    return raw.decode("utf-8"), offset
+
+
+def encode_date(buffer: bytearray, value: date) -> None:
+    """
+    Date writing as days since the epoch
+
+    :param bytearray buffer: Encoded message
+    :param date value: Written date
+    """
+    write_long(buffer, (value - EPOCH_DATE).days)
+
+
+def decode_date(view: memoryview, offset: int) -> tuple[date, int]:
+    """
+    Date reading from days since the epoch
+
+    :param memoryview view: Encoded message
+    :param int offset: Date offset
+    :return tuple: Date and the next offset
+    """
+    days, offset = read_long(view, offset)
+    return EPOCH_DATE + timedelta(days=days), offset
+
+
+def encode_timestamp(buffer: bytearray, value: datetime) -> None:
+    """
+    Aware datetime writing as milliseconds since the epoch
+
+    :param bytearray buffer: Encoded message
+    :param datetime value: Written datetime
+    """
+    write_long(buffer, (value - EPOCH) // timedelta(milliseconds=1))
+
+
+def decode_timestamp(view: memoryview, offset: int) -> tuple[datetime, int]:
+    """
+    UTC datetime reading from milliseconds since the epoch
+
+    :param memoryview view: Encoded message
+    :param int offset: Datetime offset
+    :return tuple: Datetime and the next offset
+    """
+    millis, offset = read_long(view, offset)
+    return EPOCH + timedelta(milliseconds=millis), offset
+
+
+def encode_boolean(buffer: bytearray, value: bool) -> None:
+    """
+    Boolean writing as one byte
+
+    :param bytearray buffer: Encoded message
+    :param bool value: Written boolean
+    """
+    buffer.append(1 if value else 0)
+
+
+def decode_boolean(view: memoryview, offset: int) -> tuple[bool, int]:
+    """
+    Boolean reading from one byte
+
+    :param memoryview view: Encoded message
+    :param int offset: Boolean offset
+    :return tuple: Boolean and the next offset
+    """
+    return view[offset] == 1, offset + 1
+
+
+def encode_null(_: bytearray, __: None) -> None:
+    """
+    Null writing, it takes no bytes
+    """
+
+
+def decode_null(_: memoryview, offset: int) -> tuple[None, int]:
+    """
+    Null reading, it takes no bytes
+
+    :param int offset: Null offset
+    :return tuple: None and the same offset
+    """
+    return None, offset
+
+
+def encode_double(buffer: bytearray, value: float) -> None:
+    """
+    Double writing in little-endian order
+
+    :param bytearray buffer: Encoded message
+    :param float value: Written number
+    """
+    buffer += DOUBLE.pack(value)
+
+
+def decode_double(view: memoryview, offset: int) -> tuple[float, int]:
+    """
+    Double reading in little-endian order
+
+    :param memoryview view: Encoded message
+    :param int offset: Number offset
+    :return tuple: Number and the next offset
+    """
+    return DOUBLE.unpack_from(view, offset)[0], offset + DOUBLE.size
+
+
+PRIMITIVES: Final[dict[tuple[str, Optional[str]], tuple[Encoder, Decoder]]] = {
+    ("null", None): (encode_null, decode_null),
+    ("boolean", None): (encode_boolean, decode_boolean),
+    ("int", None): (write_long, read_long),
+    ("long", None): (write_long, read_long),
+    ("double", None): (encode_double, decode_double),
+    ("bytes", None): (write_bytes, read_bytes),
+    ("string", None): (encode_string, decode_string),
+    ("int", "date"): (encode_date, decode_date),
+    ("long", "timestamp-millis"): (encode_timestamp, decode_timestamp),
+}
+
+
+def compile_schema(
+    schema: Any, named: dict[str, tuple[Encoder, Decoder]]
+) -> tuple[Encoder, Decoder]:
+    """
+    Avro binary encoder and decoder compiling for the schema
+
+    Records, enums, unions and primitive types except float with date
+    and timestamp-millis logical types are supported
+
+    :param Any schema: Avro schema
+    :param dict named: Already compiled named types
+    :return tuple: Encoder and decoder
+    """
+    if isinstance(schema, str):
+        return named[schema] if schema in named else PRIMITIVES[(schema, None)]
+    if isinstance(schema, list):
+        branches = [compile_schema(branch, named) for branch in schema]
+        null_index = schema.index("null") if "null" in schema else None
+        value_index = next(index for index, branch in enumerate(schema) if branch != "null")
+
+        def encode_union(buffer: bytearray, value: Any) -> None:
+            index = null_index if value is None and null_index is not None else value_index
+            write_long(buffer, index)
+            branches[index][0](buffer, value)
+
+        def decode_union(view: memoryview, offset: int) -> tuple[Any, int]:
+            index, offset = read_long(view, offset)
+            return branches[index][1](view, offset)
+
+        return encode_union, decode_union
+    if isinstance(schema["type"], (dict, list)):
+        return compile_schema(schema["type"], named)
+    if schema["type"] == "enum":
+        symbols: list[str] = schema["symbols"]
+        indexes = {symbol: index for index, symbol in enumerate(symbols)}
+
+        def encode_enum(buffer: bytearray, value: str) -> None:
+            write_long(buffer, indexes[value])
+
+        def decode_enum(view: memoryview, offset: int) -> tuple[str, int]:
+            index, offset = read_long(view, offset)
+            return symbols[index], offset
+
+        named[schema["name"]] = (encode_enum, decode_enum)
+        return encode_enum, decode_enum
+    if schema["type"] == "record":
+        fields: list[tuple[str, Any, Encoder, Decoder]] = []
+
+        def encode_record(buffer: bytearray, value: dict[str, Any]) -> None:
+            for name, default, encode, _ in fields:
+                encode(buffer, value.get(name, default))
+
+        def decode_record(view: memoryview, offset: int) -> tuple[dict[str, Any], int]:
+            record = {}
+            for name, _, __, decode in fields:
+                record[name], offset = decode(view, offset)
+            return record, offset
+
+        named[schema["name"]] = (encode_record, decode_record)
+        for field in schema["fields"]:
+            fields.append((field["name"], field.get("default"), *compile_schema(field, named)))
+        return encode_record, decode_record
+    primitive = (schema["type"], schema.get("logicalType"))
+    if primitive not in PRIMITIVES:
+        raise ValueError(f"Unsupported schema type {primitive}")
+    return PRIMITIVES[primitive]
+
+
+class SchemaRegistry:
+    """
+    Local file-based registry of versioned message schemas
+
+    Every schema file in the directory is an Avro record schema with an
+    additional unique schema_id. Messages are written with the latest
+    schema of their subject in the Confluent wire format, a zero magic byte
+    and the big-endian schema id followed by the Avro binary encoding, so
+    messages of older schema versions are still decoded by their writer
+    schema
+
+    """
+
+    def __init__(self, directory: str = KAFKA_SCHEMA_DIRECTORY):
+        """
+        Initialize the SchemaRegistry instance with the directory schemas
+
+        :param str directory: Schema files directory
+        """
+        self.by_id: dict[int, CompiledSchema] = {}
+        self.latest: dict[str, CompiledSchema] = {}
+        for path in sorted(Path(directory).glob("*.avsc")):
+            self.register(json.loads(path.read_text(encoding="utf-8")))
+
+    def register(self, schema: dict[str, Any]) -> CompiledSchema:
+        """
+        Schema compiling and registration
+
+        :param dict schema: Avro record schema with the schema id
+        :return CompiledSchema: Registered schema
+        """
+        schema_id: int = schema["schema_id"]
+        if schema_id in self.by_id:
+            raise ValueError(f"Schema id {schema_id} is already registered")
+        encoder, decoder = compile_schema(schema, named={})
+        compiled = CompiledSchema(schema_id, schema["name"], encoder, decoder)
+        self.by_id[schema_id] = compiled
+        latest = self.latest.get(compiled.subject)
+        if latest is None or latest.schema_id < schema_id:
+            self.latest[compiled.subject] = compiled
+        logger.info("Message schema '%s' id %s was registered", compiled.subject, schema_id)
+        return compiled
+
+    def encode(self, subject: str, value: dict[str, Any]) -> bytes:
+        """
+        Message encoding with the latest schema of the subject
+
+        :param str subject: Message schema name
+        :param dict value: Message fields
+        :return bytes: Schema header followed by the Avro binary message
+        """
+        schema = self.latest[subject]
+        buffer = bytearray(SCHEMA_HEADER.pack(MAGIC_BYTE, schema.schema_id))
+        schema.encoder(buffer, value)
+        return bytes(buffer)
+
+    def decode(self, payload: bytes) -> DecodedMessage:
+        """
+        Message decoding with its writer schema
+
+        :param bytes payload: Encoded message
+        :return DecodedMessage: Message subject, schema id and fields
+        :raises ValueError: Unknown schema or malformed message
+        """
+        if len(payload) < SCHEMA_HEADER.size:
+            raise ValueError("Message is shorter than the schema header")
+        magic, schema_id = SCHEMA_HEADER.unpack_from(payload)
+        if magic != MAGIC_BYTE or schema_id not in self.by_id:
+            raise ValueError(f"Unknown message schema {magic}:{schema_id}")
+        schema = self.by_id[schema_id]
+        try:
+            value, _ = schema.decoder(memoryview(payload), SCHEMA_HEADER.size)
+        except (IndexError, KeyError, OverflowError, UnicodeDecodeError, struct.error) as error:
+            raise ValueError(f"Malformed message of schema {schema_id} - {error}") from error
+        return DecodedMessage(schema.subject, schema_id, value)
+
+
+schema_registry = SchemaRegistry()
@@ -0,0 +1,182 @@
+import asyncio
+import os
+from collections import defaultdict
+from contextlib import suppress
+from datetime import datetime, timedelta, timezone
+from time import monotonic
+from typing import Final, Sequence
+
+from dotenv import load_dotenv
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.brokers.kafka_producer import KafkaProducer, kafka_producer
+from app.configs.logging_handler import configure_logging_handler
+from app.database.db import ASYNC_SESSION_LOCAL
+from app.database.models import Outbox
+from app.database.repository import OutboxRepository
+from app.schemas.kafka import BatchKafkaMessage
+from app.utils.metrics import metrics_registry
+
+logger = configure_logging_handler()
+
+load_dotenv()
+
+OUTBOX_RELAY_BATCH_SIZE: Final[int] = int(os.getenv("OUTBOX_RELAY_BATCH_SIZE", "100"))
+OUTBOX_RELAY_INTERVAL: Final[float] = float(os.getenv("OUTBOX_RELAY_INTERVAL", "1"))
+OUTBOX_RETENTION_SECONDS: Final[int] = int(os.getenv("OUTBOX_RETENTION_SECONDS", "86400"))
+OUTBOX_PURGE_INTERVAL: Final[float] = 3600.0
+
+outbox_relayed = metrics_registry.counter(
+    name="outbox_relayed_messages_total",
+    description="Outbox messages relayed to Kafka by outcome",
+)
+
+
+class OutboxRelay:
+    """
+    Background publishing of outbox messages to Kafka
+
+    Only the relay holding the relay advisory lock publishes, so relays of
+    other workers skip their batches. The lock is held on an autocommit
+    connection, so pending messages are read and marked as published in
+    short separate statements, and no transaction stays open while Kafka
+    is awaited. Messages of one key are published one after another and
+    a key stops at its first failed message, so its later messages stay
+    pending and are retried after it by the next batch. Each key keeps its
+    order and delivery is at least once. Writers wake the relay up after
+    their commits, and the interval polling picks up messages committed
+    by other workers
+
+    """
+
+    def __init__(
+        self,
+        producer: KafkaProducer,
+        session_factory: async_sessionmaker[AsyncSession] = ASYNC_SESSION_LOCAL,
+        batch_size: int = OUTBOX_RELAY_BATCH_SIZE,
+        interval: float = OUTBOX_RELAY_INTERVAL,
+    ):
+        """
+        Initialize the OutboxRelay instance
+
+        :param KafkaProducer producer: Producer publishing the messages
+        :param async_sessionmaker session_factory: Primary database sessions factory
+        :param int batch_size: Maximum number of messages relayed at once
+        :param float interval: Polling interval in seconds without wake-ups
+        """
+        self.producer = producer
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.interval = interval
+        self.wakeup = asyncio.Event()
+        self._purged_at = monotonic()
+
+    def notify(self) -> None:
+        """
+        Relay waking up after new messages commit
+        """
+        self.wakeup.set()
+
+    async def publish(self, messages: Sequence[Outbox]) -> list[int]:
+        """
+        Messages publishing in rounds keeping the order of every key
+
+        Every round sends the next message of each key as one batch, and a
+        key whose message failed is left out of the following rounds
+
+        :param Sequence[Outbox] messages: Pending messages in the insertion order
+        :return list[int]: Identificators of published messages
+        """
+        keyed: defaultdict[str, list[Outbox]] = defaultdict(list)
+        sequences: list[list[Outbox]] = []
+        for message in messages:
+            if message.key is None:
+                sequences.append([message])  # Unkeyed messages have no order
+            else:
+                keyed[str(message.key)].append(message)
+        sequences.extend(keyed.values())
+        published: list[int] = []
+        while sequences:
+            results = await self.producer.send_batch(
+                [
+                    BatchKafkaMessage.model_validate(
+                        {"topic": head.topic, "message": head.payload, "key": head.key}
+                    )
+                    for head, *_ in sequences
+                ]
+            )
+            remaining: list[list[Outbox]] = []
+            for (head, *rest), result in zip(sequences, results):
+                if isinstance(result, BaseException):
+                    continue  # Later messages of the key wait for it
+                published.append(int(head.id))
+                if rest:
+                    remaining.append(rest)
+            sequences = remaining
+        return published
+
+    async def relay_batch(self) -> int:
+        """
+        Pending messages batch publishing
+
+        :return int: Number of published messages
+        """
+        async with self.session_factory() as session:
+            await session.connection(execution_options={"isolation_level": "AUTOCOMMIT"})
+            repository = OutboxRepository(session=session)
+            if not await repository.try_lock_relay():
+                return 0
+            try:
+                messages = await repository.fetch_pending(limit=self.batch_size)
+                if not messages:
+                    return 0
+                published = await self.publish(messages)
+                await repository.mark_published(ids=published)
+            finally:
+                await repository.unlock_relay()
+        outbox_relayed.inc(len(published), outcome="published")
+        outbox_relayed.inc(len(messages) - len(published), outcome="pending")
+        if len(published) < len(messages):
+            logger.warning(
+                "%s outbox messages failed or wait for failed ones and stay pending",
+                len(messages) - len(published),
+            )
+        return len(published)
+
+    async def purge(self) -> None:
+        """
+        Published messages deleting after the retention period
+        """
+        before = datetime.now(timezone.utc) - timedelta(seconds=OUTBOX_RETENTION_SECONDS)
+        async with self.session_factory() as session:
+            deleted = await OutboxRepository(session=session).delete_published(before=before)
+            await session.commit()
+        self._purged_at = monotonic()
+        logger.info("%s published outbox messages were purged", deleted)
+
+    async def run(self) -> None:
+        """
+        Outbox relaying until cancellation
+
+        Full batches are followed by the next batch immediately, otherwise
+        the relay waits for a wake-up or the polling interval
+        """
+        while True:
+            self.wakeup.clear()
+            try:
+                published = await self.relay_batch()
+                if monotonic() - self._purged_at >= OUTBOX_PURGE_INTERVAL:
+                    await self.purge()
+            except asyncio.CancelledError:
+                raise
+            except Exception:  # pylint: disable=W0718
+                logger.warning("Outbox relaying failed", exc_info=True)
+                published = 0
+            if published >= self.batch_size:
+                continue
+            with suppress(TimeoutError):
+                async with asyncio.timeout(self.interval):
+                    await self.wakeup.wait()
+
+
+outbox_relay = OutboxRelay(producer=kafka_producer)
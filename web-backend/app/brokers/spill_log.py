@@ -0,0 +1,339 @@
+import fcntl
+import mmap
+import os
+import struct
+import threading
+import zlib
+from collections import OrderedDict, deque
+from pathlib import Path
+from time import monotonic
+from typing import BinaryIO, Final, Iterator, NamedTuple, Optional, Sequence, TextIO
+
+from dotenv import load_dotenv
+
+from app.configs.logging_handler import configure_logging_handler
+from app.utils.metrics import metrics_registry
+
+logger = configure_logging_handler()
+
+load_dotenv()
+
+KAFKA_SPILL_ENABLED: Final[bool] = os.getenv("KAFKA_SPILL_ENABLED", "false").lower() == "true"
+KAFKA_SPILL_DIRECTORY: Final[str] = os.getenv("KAFKA_SPILL_DIRECTORY", "kafka-spill")
+KAFKA_SPILL_SEGMENT_BYTES: Final[int] = int(
+    os.getenv("KAFKA_SPILL_SEGMENT_BYTES", str(16 * 1024 * 1024))
+)
+KAFKA_SPILL_MAX_BYTES: Final[int] = int(
+    os.getenv("KAFKA_SPILL_MAX_BYTES", str(256 * 1024 * 1024))
+)
+KAFKA_SPILL_FSYNC_INTERVAL: Final[float] = float(
+    os.getenv("KAFKA_SPILL_FSYNC_INTERVAL", "1")
+)
+RECORD_HEADER = struct.Struct(">IHII")  # Body checksum, topic, key and value lengths
+NULL_KEY_LENGTH: Final[int] = 0xFFFFFFFF  # Key length of unkeyed messages
+LOCK_FILE: Final[str] = ".lock"
+
+spilled_messages = metrics_registry.counter(
+    name="kafka_spill_messages_total",
+    description="Kafka messages spilled to disk, drained or dropped by topic",
+)
+spill_depth = metrics_registry.gauge(
+    name="kafka_spill_depth_messages",
+    description="Kafka messages waiting in the spill log",
+)
+spill_size = metrics_registry.gauge(
+    name="kafka_spill_size_bytes",
+    description="Kafka spill log segments size",
+)
+
+
+class SpilledMessage(NamedTuple):
+    """
+    Message read from the spill log with its position
+
+    """
+
+    topic: str
+    key: Optional[bytes]
+    value: bytes
+    sequence: int
+    end: int
+
+
+def claim_directory(root: Path) -> tuple[Path, TextIO]:
+    """
+    Exclusive spill directory claiming for the current process
+
+    Every process locks its own numbered subdirectory of the root, so
+    workers never share segments, and a restarted worker takes over the
+    segments left by a finished one
+
+    :param Path root: Spill directories root
+    :return tuple: Claimed directory and its held lock file
+    """
+    slot = 0
+    while True:
+        directory = root / str(slot)
+        directory.mkdir(parents=True, exist_ok=True)
+        lock = (directory / LOCK_FILE).open("a", encoding="utf-8")
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return directory, lock
+        except BlockingIOError:
+            lock.close()
+            slot += 1
+
+
+class SpillLog:
+    """
+    Append-only disk log of messages not accepted by Kafka
+
+    Appended messages are buffered in memory and written to numbered
+    segment files by write_buffered, which is called from a worker thread
+    like the other disk methods, so the event loop never waits for the disk.
+    Segments are synced at most once per fsync interval, read through memory
+    maps, and fully drained segments are deleted. Above the size limit
+    the oldest segments are dropped, and a torn record at a segment tail
+    is truncated on opening. The read position is kept in memory, so after
+    a restart a partially drained segment is sent again from its start
+
+    """
+
+    def __init__(
+        self,
+        directory: str = KAFKA_SPILL_DIRECTORY,
+        segment_bytes: int = KAFKA_SPILL_SEGMENT_BYTES,
+        max_bytes: int = KAFKA_SPILL_MAX_BYTES,
+        fsync_interval: float = KAFKA_SPILL_FSYNC_INTERVAL,
+    ):
+        """
+        Initialize the SpillLog instance with existing segments
+
+        :param str directory: Root of the per-process segment directories
+        :param int segment_bytes: Segment size after which a new segment starts
+        :param int max_bytes: Segments total size limit
+        :param float fsync_interval: Minimum time between syncs to disk in seconds
+        """
+        self.directory, self.lock_file = claim_directory(Path(directory))
+        self.segment_bytes = min(segment_bytes, max_bytes)
+        self.max_bytes = max_bytes
+        self.fsync_interval = fsync_interval
+        self.buffered: deque[tuple[str, Optional[bytes], bytes]] = deque()  # Messages waiting for writing
+        self.segments: OrderedDict[int, int] = OrderedDict()  # Unread records by segment
+        self.unread = 0
+        self.size = 0
+        self.position: tuple[int, int] = (-1, 0)  # Segment and offset of the next record
+        self.active: Optional[BinaryIO] = None
+        self.active_sequence = -1
+        self.synced_at = monotonic()
+        self.lock = threading.Lock()  # Segments state shared by worker threads
+        self._load()
+
+    @property
+    def depth(self) -> int:
+        """
+        Number of unread messages, buffered ones included
+        """
+        return len(self.buffered) + self.unread
+
+    def _path(self, sequence: int) -> Path:
+        """
+        Segment file path
+
+        :param int sequence: Segment number
+        :return Path: Segment file path
+        """
+        return self.directory / f"{sequence:020d}.log"
+
+    @staticmethod
+    def _records(
+        path: Path, start: int = 0
+    ) -> Iterator[tuple[str, Optional[bytes], bytes, int]]:
+        """
+        Valid records reading from the memory mapped segment
+
+        :param Path path: Segment file path
+        :param int start: Offset of the first read record
+        :yield tuple: Record topic, key, value and end offset
+        """
+        size = path.stat().st_size
+        if size <= start:
+            return
+        with path.open("rb") as file, mmap.mmap(
+            file.fileno(), 0, access=mmap.ACCESS_READ
+        ) as mapped:
+            offset = start
+            while offset + RECORD_HEADER.size <= size:
+                checksum, topic_length, key_length, value_length = RECORD_HEADER.unpack_from(
+                    mapped, offset
+                )
+                key_end = topic_length + (0 if key_length == NULL_KEY_LENGTH else key_length)
+                end = offset + RECORD_HEADER.size + key_end + value_length
+                if end > size:
+                    return
+                body = mapped[offset + RECORD_HEADER.size : end]
+                if zlib.crc32(body) != checksum:
+                    return
+                key = None if key_length == NULL_KEY_LENGTH else body[topic_length:key_end]
+                yield body[:topic_length].decode("utf-8"), key, body[key_end:], end
+                offset = end
+
+    def _load(self) -> None:
+        """
+        Existing segments loading with torn tails truncation
+        """
+        for path in sorted(self.directory.glob("*.log")):
+            count, valid_end = 0, 0
+            for *_, end in self._records(path):
+                count, valid_end = count + 1, end
+            if valid_end < path.stat().st_size:
+                logger.warning("Spill segment '%s' torn tail was truncated", path.name)
+                os.truncate(path, valid_end)
+            if count == 0:
+                path.unlink()
+                continue
+            self.segments[int(path.stem)] = count
+            self.unread += count
+            self.size += valid_end
+        if self.segments:
+            logger.info("Spill log has %s messages to drain", self.depth)
+
+    def _roll(self) -> BinaryIO:
+        """
+        New active segment starting
+
+        :return BinaryIO: Active segment file
+        """
+        if self.active is not None:
+            self.sync(force=True)
+            self.active.close()
+        self.active_sequence = max(self.segments, default=self.active_sequence) + 1
+        self.active = self._path(self.active_sequence).open("ab")
+        self.segments[self.active_sequence] = 0
+        return self.active
+
+    def _delete(self, sequence: int) -> int:
+        """
+        Segment deleting with its unread records
+
+        :param int sequence: Segment number
+        :return int: Number of deleted unread records
+        """
+        if sequence == self.active_sequence and self.active is not None:
+            self.active.close()
+            self.active = None
+        path = self._path(sequence)
+        self.size -= path.stat().st_size
+        path.unlink()
+        deleted = self.segments.pop(sequence)
+        self.unread -= deleted
+        return deleted
+
+    def append(self, topic: str, value: bytes, key: Optional[bytes] = None) -> None:
+        """
+        Message buffering for the next write to disk, it is safe in the event loop
+
+        :param str topic: Message topic
+        :param bytes value: Message value
+        :param bytes key: Message partitioning key
+        """
+        self.buffered.append((topic, key, value))
+        spilled_messages.inc(topic=topic, outcome="spilled")
+
+    def write_buffered(self) -> int:
+        """
+        Buffered messages writing to the active segment, it blocks on the disk
+
+        :return int: Number of written messages
+        """
+        with self.lock:
+            written = 0
+            while self.buffered:
+                topic, key, value = self.buffered.popleft()
+                encoded_topic = topic.encode("utf-8")
+                body = encoded_topic + (key or b"") + value
+                record = (
+                    RECORD_HEADER.pack(
+                        zlib.crc32(body),
+                        len(encoded_topic),
+                        NULL_KEY_LENGTH if key is None else len(key),
+                        len(value),
+                    )
+                    + body
+                )
+                active = (
+                    self.active
+                    if self.active is not None and self.active.tell() < self.segment_bytes
+                    else self._roll()
+                )
+                active.write(record)
+                self.segments[self.active_sequence] += 1
+                self.unread += 1
+                self.size += len(record)
+                written += 1
+            if self.active is not None:
+                self.active.flush()
+            self.sync()
+            while self.size > self.max_bytes and len(self.segments) > 1:
+                dropped = self._delete(next(iter(self.segments)))
+                spilled_messages.inc(dropped, topic="", outcome="dropped")
+                logger.warning("Spill log limit dropped %s oldest messages", dropped)
+            return written
+
+    def sync(self, force: bool = False) -> None:
+        """
+        Active segment syncing to disk once per fsync interval
+
+        :param bool force: Syncing regardless of the interval
+        """
+        if self.active is None:
+            return
+        if force or monotonic() - self.synced_at >= self.fsync_interval:
+            os.fsync(self.active.fileno())
+            self.synced_at = monotonic()
+
+    def read(self, max_messages: int) -> list[SpilledMessage]:
+        """
+        Oldest written messages reading without consuming, it blocks on the disk
+
+        :param int max_messages: Maximum number of messages
+        :return list[SpilledMessage]: Messages in the appending order
+        """
+        messages: list[SpilledMessage] = []
+        with self.lock:
+            for sequence in list(self.segments):
+                start = self.position[1] if sequence == self.position[0] else 0
+                for topic, key, value, end in self._records(self._path(sequence), start):
+                    messages.append(SpilledMessage(topic, key, value, sequence, end))
+                    if len(messages) == max_messages:
+                        return messages
+        return messages
+
+    def commit(self, messages: Sequence[SpilledMessage]) -> None:
+        """
+        Delivered messages consuming and drained segments deleting
+
+        :param Sequence[SpilledMessage] messages: Delivered messages in the reading order
+        """
+        with self.lock:
+            for message in messages:
+                if message.sequence not in self.segments:  # Dropped while delivering
+                    continue
+                self.segments[message.sequence] -= 1
+                self.unread -= 1
+                self.position = (message.sequence, message.end)
+                spilled_messages.inc(topic=message.topic, outcome="drained")
+            while self.segments and next(iter(self.segments.values())) == 0:
+                self._delete(next(iter(self.segments)))
+
+    def close(self) -> None:
+        """
+        Buffered messages writing, active segment syncing and directory releasing
+        """
+        self.write_buffered()
+        with self.lock:
+            if self.active is not None:
+                self.sync(force=True)
+                self.active.close()
+                self.active = None
+            self.lock_file.close()  # Closing releases the directory lock
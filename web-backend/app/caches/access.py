@@ -0,0 +1,76 @@
+import os
+from time import time
+from typing import Final, Optional
+
+from dotenv import load_dotenv
+
+from app.caches.keydb import keydb_registry
+from app.configs.logging_handler import configure_logging_handler
+
+load_dotenv()
+
+logger = configure_logging_handler()
+
+ACCESS_KEY_PREFIX = "fastapi-cache:access"
+CACHE_ACCESS_WINDOW: Final[int] = int(os.getenv("CACHE_ACCESS_WINDOW", "86400"))
+CACHE_ACCESS_WINDOWS: Final[int] = int(os.getenv("CACHE_ACCESS_WINDOWS", "7"))
+
+
+def access_window(timestamp: Optional[float] = None) -> int:
+    """
+    Access histogram window number
+
+    :param float timestamp: Unix time, the current time by default
+    :return int: Window number since the epoch
+    """
+    return int((time() if timestamp is None else timestamp) // CACHE_ACCESS_WINDOW)
+
+
+def access_key(namespace: str, window: int) -> str:
+    """
+    Sorted set key of the namespace access histogram window
+
+    :param str namespace: Route cache namespace
+    :param int window: Histogram window number
+    :return str: Access histogram key
+    """
+    return f"{ACCESS_KEY_PREFIX}:{namespace}:{window}"
+
+
+async def record_access(namespace: str, principal: str) -> None:
+    """
+    Principal access counting in the current namespace histogram window
+
+    Every window expires after the read windows pass, so the histogram
+    never grows without bound and old popularity fades out
+
+    :param str namespace: Route cache namespace
+    :param str principal: Principal identifier
+    """
+    key = access_key(namespace, access_window())
+    try:
+        async with keydb_registry.client().pipeline(transaction=False) as pipeline:
+            pipeline.zincrby(key, 1, principal)
+            pipeline.expire(key, CACHE_ACCESS_WINDOW * (CACHE_ACCESS_WINDOWS + 1))
+            await pipeline.execute()
+    except Exception:  # pylint: disable=W0718
+        logger.warning("Cache access recording failed", exc_info=True)
+
+
+async def fetch_top_principals(namespace: str, count: int) -> list[str]:
+    """
+    Most frequently accessing principals fetching over the recent windows
+
+    :param str namespace: Route cache namespace
+    :param int count: Maximum number of principals
+    :return list[str]: Principals ordered by access count, descending
+    """
+    current = access_window()
+    windows = range(current - CACHE_ACCESS_WINDOWS + 1, current + 1)
+    principals = await keydb_registry.client().zunion(
+        [access_key(namespace, window) for window in windows], aggregate="SUM"
+    )  # Ascending by the summed access count
+    return [
+        principal.decode() if isinstance(principal, bytes) else principal
+        for principal in reversed(principals[-count:])
+    ]
@@ -0,0 +1,383 @@
+import asyncio
+import json
+import os
+import struct
+from math import ceil
+from collections import OrderedDict
+from time import monotonic, time
+from typing import Any, Final, NamedTuple, Optional
+from uuid import uuid4
+
+from dotenv import load_dotenv
+from fastapi_cache.backends.redis import RedisBackend
+from fastapi_cache.types import Backend
+
+from app.configs.logging_handler import configure_logging_handler
+from app.utils.metrics import metrics_registry
+
+load_dotenv()
+
+logger = configure_logging_handler()
+
+CACHE_L1_MAX_ENTRIES: Final[int] = int(os.getenv("CACHE_L1_MAX_ENTRIES", "1024"))
+CACHE_L1_EXPIRE: Final[float] = float(os.getenv("CACHE_L1_EXPIRE", "5"))
+CACHE_INVALIDATION_CHANNEL: Final[str] = os.getenv(
+    "CACHE_INVALIDATION_CHANNEL", "fastapi-cache:invalidations"
+)
+CACHE_INVALIDATION_RETRY_SECONDS: Final[float] = 1.0
+CACHE_STALE_EXPIRE: Final[int] = int(os.getenv("CACHE_STALE_EXPIRE", "60"))
+CACHE_LOCK_EXPIRE: Final[int] = int(os.getenv("CACHE_LOCK_EXPIRE", "10"))
+CACHE_LOCK_WAIT: Final[float] = float(os.getenv("CACHE_LOCK_WAIT", "1"))
+CACHE_LOCK_POLL_INTERVAL: Final[float] = 0.05
+ENVELOPE_MAGIC: Final[bytes] = b"SWR1"
+ENVELOPE_HEADER = struct.Struct(">4sd")
+
+cache_lookups = metrics_registry.counter(
+    name="cache_lookups_total",
+    description="Cache lookups by tier and result",
+)
+
+
+cache_recomputations = metrics_registry.counter(
+    name="cache_recomputations_total",
+    description="Cache recomputation decisions by entry state and outcome",
+)
+
+
+class StaleWhileRevalidateBackend(RedisBackend):
+    """
+    KeyDB backend serving stale values while one caller recomputes
+
+    Values are kept for an additional stale window after their TTL with
+    the soft expiry in an envelope. After the soft expiry the first caller
+    taking the key lock gets a miss and recomputes, while the others keep
+    getting the stale value. On a cold miss the callers losing the lock
+    wait shortly for the winner instead of recomputing together
+
+    """
+
+    def __init__(
+        self,
+        redis: Any,
+        stale_expire: int = CACHE_STALE_EXPIRE,
+        lock_expire: int = CACHE_LOCK_EXPIRE,
+        lock_wait: float = CACHE_LOCK_WAIT,
+    ):
+        super().__init__(redis)
+        self.stale_expire = stale_expire
+        self.lock_expire = lock_expire
+        self.lock_wait = lock_wait
+
+    @staticmethod
+    def _unpack(stored: Optional[bytes]) -> tuple[Optional[float], Optional[bytes]]:
+        """
+        Soft expiry and value unpacking from the stored envelope
+
+        :param bytes stored: Stored envelope, plain values are never stale
+        :return tuple: Soft expiry unix time and value
+        """
+        if stored is None or not stored.startswith(ENVELOPE_MAGIC):
+            return None, stored
+        _, soft_expires_at = ENVELOPE_HEADER.unpack_from(stored)
+        return soft_expires_at, stored[ENVELOPE_HEADER.size :]
+
+    def _pack(self, value: bytes, expire: Optional[int]) -> tuple[bytes, Optional[int]]:
+        """
+        Value packing into the envelope with the soft expiry
+
+        :param bytes value: Cached value
+        :param int expire: TTL in seconds until the soft expiry
+        :return tuple: Stored envelope and its TTL including the stale window
+        """
+        if not expire:
+            return value, expire
+        envelope = ENVELOPE_HEADER.pack(ENVELOPE_MAGIC, time() + expire) + value
+        return envelope, expire + self.stale_expire
+
+    async def _acquire(self, key: str) -> bool:
+        """
+        Key recomputation lock acquiring
+
+        :param str key: Cache key
+        :return bool: Whether the lock was acquired
+        """
+        acquired = await self.redis.set(
+            f"{key}:lock", b"1", nx=True, ex=self.lock_expire
+        )
+        return bool(acquired)
+
+    async def get_with_ttl(self, key: str) -> tuple[int, Optional[bytes]]:
+        """
+        Cached value with remaining TTL obtaining, a miss means recomputing
+
+        :param str key: Cache key
+        :return tuple: Remaining TTL in seconds until the soft expiry and value
+        """
+        soft_expires_at, value = self._unpack(await self.get_raw(key))
+        if value is not None:
+            if soft_expires_at is None:
+                return -1, value
+            if soft_expires_at > time():
+                return ceil(soft_expires_at - time()), value
+            if not await self._acquire(key):
+                cache_recomputations.inc(state="stale", outcome="served")
+                return 0, value
+            cache_recomputations.inc(state="stale", outcome="recomputed")
+            return 0, None
+        if await self._acquire(key):
+            cache_recomputations.inc(state="cold", outcome="recomputed")
+            return 0, None
+        deadline = monotonic() + self.lock_wait
+        while monotonic() < deadline:
+            await asyncio.sleep(CACHE_LOCK_POLL_INTERVAL)
+            soft_expires_at, value = self._unpack(await self.get_raw(key))
+            if value is not None:
+                cache_recomputations.inc(state="cold", outcome="awaited")
+                if soft_expires_at is None:
+                    return -1, value
+                return max(ceil(soft_expires_at - time()), 0), value
+        cache_recomputations.inc(state="cold", outcome="timeout")
+        return 0, None
+
+    async def get_raw(self, key: str) -> Optional[bytes]:
+        """
+        Stored envelope obtaining
+
+        :param str key: Cache key
+        :return bytes | None: Stored envelope
+        """
+        return await self.redis.get(key)  # type: ignore[no-any-return]
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """
+        Cached value obtaining regardless of the soft expiry
+
+        :param str key: Cache key
+        :return bytes | None: Cached value
+        """
+        return self._unpack(await self.get_raw(key))[1]
+
+    async def set(self, key: str, value: bytes, expire: Optional[int] = None) -> None:
+        """
+        Value caching with the stale window and the key lock releasing
+
+        :param str key: Cache key
+        :param bytes value: Cached value
+        :param int expire: TTL in seconds until the soft expiry
+        """
+        value, expire = self._pack(value, expire)
+        await super().set(key, value, expire=expire)
+        await self.redis.delete(f"{key}:lock")
+
+    async def set_if_absent(self, key: str, value: bytes, expire: Optional[int] = None) -> bytes:
+        """
+        Value caching only when the key is missing
+
+        :param str key: Cache key
+        :param bytes value: Cached value
+        :param int expire: TTL in seconds until the soft expiry
+        :return bytes: Value stored under the key, the given one or an earlier one
+        """
+        stored, stored_expire = self._pack(value, expire)
+        if await self.redis.set(key, stored, nx=True, ex=stored_expire):
+            return value
+        current = await self.get(key)
+        return value if current is None else current
+
+
+class LocalEntry(NamedTuple):
+    """
+    In-process cache entry
+
+    """
+
+    value: bytes
+    expires_at: float
+    remote_expires_at: float
+
+
+class TieredBackend(Backend):
+    """
+    Cache backend with a bounded in-process LRU tier in front of KeyDB
+
+    Local entries live for a short TTL and are dropped on every worker
+    through KeyDB pub/sub when a key is written or cleared, so the short
+    TTL only bounds staleness when invalidation messages are lost
+
+    """
+
+    def __init__(
+        self,
+        remote: StaleWhileRevalidateBackend,
+        max_entries: int = CACHE_L1_MAX_ENTRIES,
+        local_expire: float = CACHE_L1_EXPIRE,
+        channel: str = CACHE_INVALIDATION_CHANNEL,
+    ):
+        self.remote = remote
+        self.max_entries = max_entries
+        self.local_expire = local_expire
+        self.channel = channel
+        self.sender = uuid4().hex
+        self.entries: OrderedDict[str, LocalEntry] = OrderedDict()
+
+    def _get_local(self, key: str) -> Optional[LocalEntry]:
+        """
+        Local entry obtaining with expiry and recency update
+
+        :param str key: Cache key
+        :return LocalEntry | None: Fresh local entry
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def _set_local(self, key: str, value: bytes, ttl: Optional[float]) -> None:
+        """
+        Local entry storing with least recently used eviction
+
+        :param str key: Cache key
+        :param bytes value: Cached value
+        :param float ttl: Remaining remote TTL in seconds, None for no expiry
+        """
+        now = monotonic()
+        remote_expires_at = now + ttl if ttl is not None and ttl > 0 else float("inf")
+        self.entries[key] = LocalEntry(
+            value=value,
+            expires_at=min(now + self.local_expire, remote_expires_at),
+            remote_expires_at=remote_expires_at,
+        )
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def _drop_local(self, namespace: Optional[str] = None, key: Optional[str] = None) -> None:
+        """
+        Local entries dropping by key or namespace
+
+        :param str namespace: Dropped keys namespace
+        :param str key: Dropped key
+        """
+        if namespace:
+            for cached_key in [name for name in self.entries if name.startswith(namespace)]:
+                del self.entries[cached_key]
+        elif key:
+            self.entries.pop(key, None)
+
+    async def get_with_ttl(self, key: str) -> tuple[int, Optional[bytes]]:
+        """
+        Cached value with remaining TTL obtaining
+
+        :param str key: Cache key
+        :return tuple: Remaining TTL in seconds and cached value
+        """
+        entry = self._get_local(key)
+        if entry is not None:
+            cache_lookups.inc(tier="l1", result="hit")
+            remaining = entry.remote_expires_at - monotonic()
+            return (-1 if remaining == float("inf") else int(remaining)), entry.value
+        ttl, value = await self.remote.get_with_ttl(key)
+        cache_lookups.inc(tier="l2", result="miss" if value is None else "hit")
+        if value is not None and ttl != 0:  # Stale values are not kept locally
+            self._set_local(key, value, ttl=ttl)
+        return ttl, value
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """
+        Cached value obtaining
+
+        :param str key: Cache key
+        :return bytes | None: Cached value
+        """
+        entry = self._get_local(key)
+        if entry is not None:
+            cache_lookups.inc(tier="l1", result="hit")
+            return entry.value
+        value = await self.remote.get(key)
+        cache_lookups.inc(tier="l2", result="miss" if value is None else "hit")
+        if value is not None:
+            self._set_local(key, value, ttl=None)
+        return value
+
+    async def set(self, key: str, value: bytes, expire: Optional[int] = None) -> None:
+        """
+        Value caching in both tiers with other workers notification
+
+        :param str key: Cache key
+        :param bytes value: Cached value
+        :param int expire: TTL in seconds
+        """
+        await self.remote.set(key, value, expire=expire)
+        self._set_local(key, value, ttl=expire)
+        await self._publish(key=key)
+
+    async def set_if_absent(self, key: str, value: bytes, expire: Optional[int] = None) -> bytes:
+        """
+        Value caching only when the key is missing remotely
+
+        :param str key: Cache key
+        :param bytes value: Cached value
+        :param int expire: TTL in seconds
+        :return bytes: Value stored under the key, the given one or an earlier one
+        """
+        stored = await self.remote.set_if_absent(key, value, expire=expire)
+        self._set_local(key, stored, ttl=None)
+        return stored
+
+    async def clear(self, namespace: Optional[str] = None, key: Optional[str] = None) -> int:
+        """
+        Cached values clearing in both tiers with other workers notification
+
+        :param str namespace: Cleared keys namespace
+        :param str key: Cleared key
+        :return int: Number of cleared remote keys
+        """
+        self._drop_local(namespace=namespace, key=key)
+        cleared = await self.remote.clear(namespace=namespace, key=key)
+        await self._publish(namespace=namespace, key=key)
+        return cleared
+
+    async def _publish(self, namespace: Optional[str] = None, key: Optional[str] = None) -> None:
+        """
+        Invalidation message publishing for other workers
+
+        :param str namespace: Invalidated keys namespace
+        :param str key: Invalidated key
+        """
+        message = json.dumps({"sender": self.sender, "namespace": namespace, "key": key})
+        await self.remote.redis.publish(self.channel, message)  # type: ignore[union-attr]
+
+    def handle_invalidation(self, message: bytes | str) -> None:
+        """
+        Local entries dropping by an invalidation message of another worker
+
+        :param bytes | str message: Invalidation message
+        """
+        payload = json.loads(message)
+        if payload["sender"] != self.sender:
+            self._drop_local(namespace=payload["namespace"], key=payload["key"])
+
+    async def run_invalidation_listener(self) -> None:
+        """
+        Invalidation messages handling until cancellation
+
+        The local tier is dropped on reconnection, because messages
+        published while disconnected are lost
+        """
+        while True:
+            try:
+                async with self.remote.redis.pubsub() as pubsub:  # type: ignore[union-attr]
+                    await pubsub.subscribe(self.channel)
+                    self.entries.clear()
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self.handle_invalidation(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception:  # pylint: disable=W0718
+                logger.warning("Cache invalidation listener failed", exc_info=True)
+                await asyncio.sleep(CACHE_INVALIDATION_RETRY_SECONDS)
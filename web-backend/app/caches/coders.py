@@ -0,0 +1,77 @@
+import json
+import os
+import zlib
+from typing import Any, Final
+
+from dotenv import load_dotenv
+from fastapi_cache.coder import Coder
+from pydantic_core import from_json, to_json
+from starlette.responses import JSONResponse
+
+from app.utils.metrics import metrics_registry
+
+load_dotenv()
+
+CACHE_COMPRESSION_THRESHOLD: Final[int] = int(
+    os.getenv("CACHE_COMPRESSION_THRESHOLD", "1024")
+)
+CACHE_COMPRESSION_LEVEL: Final[int] = int(os.getenv("CACHE_COMPRESSION_LEVEL", "1"))
+PLAIN_HEADER: Final[bytes] = b"\x00"
+COMPRESSED_HEADER: Final[bytes] = b"\x01"
+
+cache_encoded_bytes = metrics_registry.counter(
+    name="cache_encoded_bytes_total",
+    description="Encoded cache values size before and after compression",
+)
+cache_saved_bytes = metrics_registry.counter(
+    name="cache_compression_saved_bytes_total",
+    description="Bytes saved by cache values compression",
+)
+
+
+class CompactCoder(Coder):
+    """
+    Cache coder with compact JSON bytes and compression of large values
+
+    Values are serialized by pydantic-core and compressed by zlib above
+    the size threshold. The first byte marks the format, so values stored
+    by the default JSON coder are still decoded
+
+    """
+
+    @classmethod
+    def encode(cls, value: Any) -> bytes:
+        """
+        Value encoding
+
+        :param Any value: Cached value
+        :return bytes: Header byte followed by JSON, compressed if large
+        """
+        if isinstance(value, JSONResponse):
+            payload = bytes(value.body)
+        else:
+            payload = to_json(value)
+        stored = PLAIN_HEADER + payload
+        if len(payload) >= CACHE_COMPRESSION_THRESHOLD:
+            compressed = zlib.compress(payload, CACHE_COMPRESSION_LEVEL)
+            if len(compressed) < len(payload):
+                stored = COMPRESSED_HEADER + compressed
+        cache_encoded_bytes.inc(len(payload), stage="raw")
+        cache_encoded_bytes.inc(len(stored), stage="stored")
+        cache_saved_bytes.inc(max(len(payload) - len(stored), 0))
+        return stored
+
+    @classmethod
+    def decode(cls, value: bytes) -> Any:
+        """
+        Value decoding
+
+        :param bytes value: Stored value
+        :return Any: Cached value
+        """
+        header, payload = value[:1], value[1:]
+        if header == COMPRESSED_HEADER:
+            return from_json(zlib.decompress(payload))
+        if header == PLAIN_HEADER:
+            return from_json(payload)
+        return json.loads(value)
@@ -0,0 +1,95 @@
+import hashlib
+from time import time
+from typing import NamedTuple, Optional
+
+from fastapi import HTTPException, Request, status
+
+from app.caches.tags import cache_namespace, fetch_tag_version
+
+
+class ResourceVersion(NamedTuple):
+    """
+    Resource cache tag version resolved for the current request
+
+    """
+
+    namespace: str
+    tag: str
+    version: str
+    etag: str
+
+
+def resource_etag(namespace: str, tag: str, version: str) -> str:
+    """
+    Strong entity tag of the resource version
+
+    :param str namespace: Full cache namespace
+    :param str tag: Resource cache tag
+    :param str version: Resource tag version
+    :return str: Quoted entity tag
+    """
+    digest = hashlib.sha256(f"{namespace}:{tag}:{version}".encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    If-None-Match header matching by the weak comparison
+
+    :param str if_none_match: If-None-Match header value
+    :param str etag: Current entity tag
+    :return bool: Whether the client representation is current
+    """
+    if not if_none_match:
+        return False
+    candidates = {candidate.strip() for candidate in if_none_match.split(",")}
+    if "*" in candidates:
+        return True
+    return etag in {candidate.removeprefix("W/") for candidate in candidates}
+
+
+async def fetch_resource_version(namespace: str, tag: str, max_age: Optional[int] = None) -> str:
+    """
+    Resource version from the tag version
+
+    Resources also changed outside the backend get the current max age
+    window in their version, so their tags and cache entries are replaced
+    at least once per window
+
+    :param str namespace: Full cache namespace
+    :param str tag: Resource cache tag
+    :param int max_age: Version window in seconds for externally changed resources
+    :return str: Resource version
+    """
+    version = await fetch_tag_version(namespace, tag)
+    if max_age:
+        version = f"{version}.{int(time() // max_age)}"
+    return version
+
+
+async def check_not_modified(
+    request: Request, namespace: str, tag: str, max_age: Optional[int] = None
+) -> None:
+    """
+    Conditional request checking against the resource version
+
+    The version is kept in the request state for the entity tag header
+    and the cache key, so it is fetched once per request
+
+    :param Request request: Current request
+    :param str namespace: Route cache namespace
+    :param str tag: Resource cache tag
+    :param int max_age: Version window in seconds for externally changed resources
+    :raises HTTPException: 304 Not Modified when the client representation is current
+    """
+    full_namespace = cache_namespace(namespace)
+    version = await fetch_resource_version(full_namespace, tag, max_age=max_age)
+    etag = resource_etag(full_namespace, tag, version)
+    request.state.resource_version = ResourceVersion(
+        namespace=full_namespace, tag=tag, version=version, etag=etag
+    )
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": etag, "Cache-Control": "no-cache"},
+        )
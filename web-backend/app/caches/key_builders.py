@@ -0,0 +1,108 @@
+import hashlib
+from typing import Any, Callable, Mapping, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.caches.tags import fetch_tag_version
+
+PRINCIPAL_CLAIMS: tuple[str, ...] = ("azp", "sub")
+
+
+def principal_id(kwargs: Mapping[str, Any]) -> str:
+    """
+    Stable principal identifier from the route token claims
+
+    :param Mapping kwargs: Route keyword arguments
+    :return str: First found claim of the principal claims, empty for anonymous routes
+    """
+    for value in kwargs.values():
+        if not isinstance(value, Mapping):
+            continue
+        for claim in PRINCIPAL_CLAIMS:
+            if value.get(claim):
+                return str(value[claim])
+    return ""
+
+
+def normalized_query(request: Optional[Request]) -> str:
+    """
+    Query parameters in a canonical order
+
+    :param Request request: Current request
+    :return str: Sorted query parameters
+    """
+    if request is None:
+        return ""
+    return "&".join(f"{key}={value}" for key, value in sorted(request.query_params.multi_items()))
+
+
+async def build_cache_key(  # pylint: disable=R0913
+    func: Callable[..., Any],
+    namespace: str,
+    route: str,
+    query: str,
+    principal: str,
+    tag: Optional[str] = None,
+    version: Optional[str] = None,
+) -> str:
+    """
+    Cache key from route, query parameters and tagged principal
+
+    :param Callable func: Cached route function
+    :param str namespace: Cache key prefix
+    :param str route: Route path
+    :param str query: Normalized query parameters
+    :param str principal: Principal identifier, empty for anonymous routes
+    :param str tag: Entries tag, the principal by default
+    :param str version: Already resolved tag version
+    :return str: Cache key
+    """
+    identity = f"{func.__module__}:{func.__name__}:{route}?{query}"
+    tag = principal if tag is None else tag
+    if version is None:
+        version = await fetch_tag_version(namespace, tag) if tag else ""
+    digest = hashlib.sha256(f"{identity}#{principal}#{tag}#{version}".encode()).hexdigest()
+    return f"{namespace}:{func.__name__}:{digest}"
+
+
+async def request_key_builder(  # pylint: disable=R0913
+    func: Callable[..., Any],
+    namespace: str = "",
+    *,
+    request: Optional[Request] = None,
+    response: Optional[Response] = None,  # pylint: disable=W0613
+    args: tuple[Any, ...],  # pylint: disable=W0613
+    kwargs: dict[str, Any],
+) -> str:
+    """
+    Cache key from route, query parameters and principal
+
+    Sessions, producers and other per-request dependencies are left out,
+    so repeated requests of one principal share the key. Entries are tagged
+    by the principal within the namespace, or by the resource version resolved
+    for the request, and the tag version is a part of the key, so a tag
+    invalidation makes the next request miss
+
+    :param Callable func: Cached route function
+    :param str namespace: Cache key prefix
+    :param Request request: Current request
+    :param Response response: Current response
+    :param tuple args: Route positional arguments
+    :param dict kwargs: Route keyword arguments
+    :return str: Cache key
+    """
+    resource_version = (
+        getattr(request.state, "resource_version", None) if request is not None else None
+    )
+    if resource_version is None or resource_version.namespace != namespace:
+        resource_version = None
+    return await build_cache_key(
+        func,
+        namespace,
+        route=request.url.path if request is not None else "",
+        query=normalized_query(request),
+        principal=principal_id(kwargs),
+        tag=resource_version.tag if resource_version else None,
+        version=resource_version.version if resource_version else None,
+    )
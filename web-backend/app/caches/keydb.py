@@ -1,15 +1,18 @@
+import asyncio
 import os
 from collections.abc import AsyncIterator
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 from typing import Final, Optional
 
 from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi_cache import FastAPICache
-from fastapi_cache.backends.redis import RedisBackend
 from fastapi_cache.types import Backend
 from redis import asyncio as aioredis
 
+from app.caches.backends import StaleWhileRevalidateBackend, TieredBackend
+from app.caches.coders import CompactCoder
+from app.caches.key_builders import request_key_builder
 from app.configs.logging_handler import configure_logging_handler
 
 load_dotenv()
@@ -17,7 +20,72 @@ load_dotenv()
 logger = configure_logging_handler()
 
 KEYDB_PASSWORD: Final[Optional[str]] = os.getenv("KEYDB_PASSWORD")
-KEYDB_PORT: Final[Optional[str]] = os.getenv("KEYDB_PORT")
+KEYDB_HOSTNAME: Final[str] = os.getenv("KEYDB_HOSTNAME", "keydb")
+KEYDB_PORT: Final[str] = os.getenv("KEYDB_PORT", "6379")
+KEYDB_MAX_CONNECTIONS: Final[int] = int(os.getenv("KEYDB_MAX_CONNECTIONS", "50"))
+KEYDB_SOCKET_TIMEOUT: Final[float] = float(os.getenv("KEYDB_SOCKET_TIMEOUT", "5"))
+KEYDB_SOCKET_CONNECT_TIMEOUT: Final[float] = float(
+    os.getenv("KEYDB_SOCKET_CONNECT_TIMEOUT", "5")
+)
+KEYDB_HEALTH_CHECK_INTERVAL: Final[int] = int(
+    os.getenv("KEYDB_HEALTH_CHECK_INTERVAL", "30")
+)
+KEYDB_PROTOCOL: Final[int] = int(os.getenv("KEYDB_PROTOCOL", "2"))
+
+
+class KeyDBRegistry:
+    """
+    Shared KeyDB client registry
+
+    The cache, locks and other subsystems use one client with one tuned
+    connection pool, created on first use and closed on shutdown
+
+    """
+
+    def __init__(self) -> None:
+        self._client: Optional[aioredis.Redis] = None
+
+    def client(self) -> aioredis.Redis:
+        """
+        Shared client obtaining
+
+        :return Redis: KeyDB client
+        """
+        if self._client is None:
+            pool = aioredis.BlockingConnectionPool.from_url(
+                f"redis://:{KEYDB_PASSWORD}@{KEYDB_HOSTNAME}:{KEYDB_PORT}",
+                max_connections=KEYDB_MAX_CONNECTIONS,
+                timeout=KEYDB_SOCKET_CONNECT_TIMEOUT,
+                socket_timeout=KEYDB_SOCKET_TIMEOUT,
+                socket_connect_timeout=KEYDB_SOCKET_CONNECT_TIMEOUT,
+                health_check_interval=KEYDB_HEALTH_CHECK_INTERVAL,
+                protocol=KEYDB_PROTOCOL,
+            )
+            self._client = aioredis.Redis(connection_pool=pool)
+            logger.info("KeyDB client for '%s' was created", KEYDB_HOSTNAME)
+        return self._client
+
+    async def close(self) -> None:
+        """
+        Shared client and its connection pool closing
+        """
+        if self._client is not None:
+            await self._client.aclose()
+            await self._client.connection_pool.disconnect()
+            self._client = None
+            logger.info("KeyDB client was closed")
+
+
+keydb_registry = KeyDBRegistry()
+
+
+def get_keydb() -> aioredis.Redis:
+    """
+    Shared KeyDB client obtaining for service functionality
+
+    :return Redis: KeyDB client
+    """
+    return keydb_registry.client()
 
 
 @asynccontextmanager
@@ -25,8 +93,10 @@ async def cache_span(_: FastAPI) -> AsyncIterator[Backend]:
     """
     Asynchronous context manager for initializing FastAPI caching
 
-    This context manager establishes connection to cache database instance
-    and initializes the FastAPI cache with the specified backend
+    This context manager takes the shared KeyDB client from the registry
+    and initializes the FastAPI cache with the specified backend.
+    An in-process tier is placed in front of it and kept coherent
+    between workers by the invalidation listener
 
     :param _ FastAPI: The FastAPI application instance. This parameter is
     not used within the context manager but it is included for
@@ -36,6 +106,17 @@ async def cache_span(_: FastAPI) -> AsyncIterator[Backend]:
     after initializing the cache. The cache availability within
     the context block
     """
-    keydb = aioredis.from_url(f"redis://:{KEYDB_PASSWORD}@keydb:{KEYDB_PORT}")  # type: ignore[no-untyped-call]
-    FastAPICache.init(backend=RedisBackend(keydb), prefix="fastapi-cache")
-    yield FastAPICache.get_backend()
+    backend = TieredBackend(remote=StaleWhileRevalidateBackend(keydb_registry.client()))
+    FastAPICache.init(
+        backend=backend,
+        prefix="fastapi-cache",
+        coder=CompactCoder,
+        key_builder=request_key_builder,
+    )
+    invalidation_task = asyncio.create_task(backend.run_invalidation_listener())
+    try:
+        yield FastAPICache.get_backend()
+    finally:
+        invalidation_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await invalidation_task
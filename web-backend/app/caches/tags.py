@@ -0,0 +1,101 @@
+import os
+from typing import Final
+from uuid import uuid4
+
+from dotenv import load_dotenv
+from fastapi_cache import FastAPICache
+
+from app.caches.backends import StaleWhileRevalidateBackend, TieredBackend
+from app.configs.logging_handler import configure_logging_handler
+
+load_dotenv()
+
+logger = configure_logging_handler()
+
+# Should outlive the longest cache entry TTL, an expired version makes its entries miss
+CACHE_TAG_EXPIRE: Final[int] = int(os.getenv("CACHE_TAG_EXPIRE", "604800"))
+
+
+def cache_namespace(namespace: str) -> str:
+    """
+    Full cache namespace as passed to key builders
+
+    :param str namespace: Route cache namespace
+    :return str: Namespace with the cache prefix
+    """
+    return f"{FastAPICache.get_prefix()}:{namespace}"
+
+
+def tag_version_key(namespace: str, tag: str) -> str:
+    """
+    Cache key storing the tag version
+
+    :param str namespace: Full cache namespace
+    :param str tag: Cache entries tag
+    :return str: Tag version key
+    """
+    return f"{namespace}:tag:{tag}"
+
+
+async def seed_tag_version(namespace: str, tag: str) -> bytes:
+    """
+    Missing tag version seeding with a unique version
+
+    A tag is missing before its first invalidation and after its version
+    expires, so a constant initial version would revive the entries cached
+    under it earlier. Concurrent callers get the first stored version
+
+    :param str namespace: Full cache namespace
+    :param str tag: Cache entries tag
+    :return bytes: Stored tag version
+    """
+    backend = FastAPICache.get_backend()
+    key = tag_version_key(namespace, tag)
+    version = uuid4().hex.encode()
+    if isinstance(backend, (StaleWhileRevalidateBackend, TieredBackend)):
+        return await backend.set_if_absent(key, version, expire=CACHE_TAG_EXPIRE)
+    await backend.set(key, version, expire=CACHE_TAG_EXPIRE)  # No atomic seeding, as in-memory
+    return version
+
+
+async def fetch_tag_version(namespace: str, tag: str) -> str:
+    """
+    Current tag version fetching
+
+    A missing tag gets a unique version, and an unavailable cache yields
+    one without storing it, so the request misses instead of failing
+
+    :param str namespace: Full cache namespace
+    :param str tag: Cache entries tag
+    :return str: Tag version
+    """
+    try:
+        version = await FastAPICache.get_backend().get(tag_version_key(namespace, tag))
+        if version is None:
+            version = await seed_tag_version(namespace, tag)
+    except Exception:  # pylint: disable=W0718
+        logger.warning("Cache tag '%s' version fetching failed", tag, exc_info=True)
+        return uuid4().hex
+    return version.decode() if isinstance(version, bytes) else str(version)
+
+
+async def invalidate_tag(namespace: str, tag: str) -> None:
+    """
+    Cache entries invalidation by the tag version bump
+
+    Entries keyed with the previous version are never read again and
+    expire by their TTL
+
+    :param str namespace: Route cache namespace
+    :param str tag: Cache entries tag
+    """
+    try:
+        await FastAPICache.get_backend().set(
+            tag_version_key(cache_namespace(namespace), tag),
+            uuid4().hex.encode(),
+            expire=CACHE_TAG_EXPIRE,
+        )
+    except Exception:  # pylint: disable=W0718
+        logger.warning("Cache tag '%s' invalidation failed", tag, exc_info=True)
+        return
+    logger.info("Cache tag '%s' of namespace '%s' was invalidated", tag, namespace)
@@ -0,0 +1,147 @@
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Final, Optional
+
+from dotenv import load_dotenv
+from fastapi import FastAPI
+from fastapi_cache import FastAPICache
+
+from app.caches.access import fetch_top_principals
+from app.caches.etags import fetch_resource_version
+from app.caches.key_builders import build_cache_key
+from app.caches.tags import cache_namespace
+from app.configs.logging_handler import configure_logging_handler
+from app.database.db import ASYNC_SESSION_LOCAL
+from app.database.repository import EventRepository
+from app.routers import auth, events
+from app.services.keycloak import KC_REALM_COMMON_CLIENT, fetch_users, jwks_cache
+
+load_dotenv()
+
+logger = configure_logging_handler()
+
+CACHE_WARMUP_ENABLED: Final[bool] = (
+    os.getenv("CACHE_WARMUP_ENABLED", "false").lower() == "true"
+)
+CACHE_WARMUP_BUDGET: Final[float] = float(os.getenv("CACHE_WARMUP_BUDGET", "5"))
+CACHE_WARMUP_TOP_CLIENTS: Final[int] = int(os.getenv("CACHE_WARMUP_TOP_CLIENTS", "10"))
+
+
+async def store_route_result(  # pylint: disable=R0913
+    application: FastAPI,
+    func: Callable[..., Any],
+    principal: str,
+    value: Any,
+    expire: int,
+    namespace: str = "",
+    tag: Optional[str] = None,
+    max_age: Optional[int] = None,
+) -> None:
+    """
+    Route result caching under the key of its request without query parameters
+
+    :param FastAPI application: Application instance
+    :param Callable func: Cached route function
+    :param str principal: Principal identifier of the cached request
+    :param Any value: Route result
+    :param int expire: Route cache TTL in seconds
+    :param str namespace: Route cache namespace
+    :param str tag: Entries tag, the principal by default
+    :param int max_age: Version window in seconds of the tagged resource, as on its route
+    """
+    full_namespace = cache_namespace(namespace)
+    key = await build_cache_key(
+        func,
+        full_namespace,
+        route=application.url_path_for(func.__name__),
+        query="",
+        principal=principal,
+        tag=tag,
+        version=await fetch_resource_version(full_namespace, tag, max_age=max_age)
+        if tag
+        else None,
+    )
+    await FastAPICache.get_backend().set(
+        key, FastAPICache.get_coder().encode(value), expire=expire
+    )
+
+
+async def warm_up_jwks(_: FastAPI) -> None:
+    """
+    Realm signing keys fetching
+
+    :param _ FastAPI: Application instance
+    """
+    await jwks_cache.get()
+
+
+async def warm_up_users(application: FastAPI) -> None:
+    """
+    Users list caching for the realm client
+
+    :param FastAPI application: Application instance
+    """
+    await store_route_result(
+        application,
+        func=auth.fetch_all_users,
+        principal=str(KC_REALM_COMMON_CLIENT),
+        value=await fetch_users(),
+        expire=auth.USERS_CACHE_EXPIRE,
+        namespace=auth.USERS_CACHE_NAMESPACE,
+        tag=auth.USERS_CACHE_TAG,
+        max_age=auth.USERS_CACHE_EXPIRE,
+    )
+
+
+async def warm_up_events(application: FastAPI) -> None:
+    """
+    Events lists caching for the most active clients
+
+    :param FastAPI application: Application instance
+    """
+    clients = await fetch_top_principals(
+        namespace=events.EVENTS_CACHE_NAMESPACE, count=CACHE_WARMUP_TOP_CLIENTS
+    )
+    async with ASYNC_SESSION_LOCAL() as session:
+        for client in clients:
+            rows = await EventRepository(
+                session=session, partition_value=client
+            ).fetch_columns_by_filters(columns=events.EVENT_FETCH_COLUMNS)
+            await store_route_result(
+                application,
+                func=events.fetch_events,
+                principal=client,
+                value=[dict(row) for row in rows],
+                expire=events.EVENTS_CACHE_EXPIRE,
+                namespace=events.EVENTS_CACHE_NAMESPACE,
+            )
+
+
+WARMUP_STEPS: Final[tuple[Callable[[FastAPI], Awaitable[None]], ...]] = (
+    warm_up_jwks,
+    warm_up_users,
+    warm_up_events,
+)
+
+
+async def warm_up_cache(application: FastAPI) -> None:
+    """
+    Known hot cache entries populating within the time budget
+
+    Failed steps are skipped, and the remaining steps are abandoned
+    when the budget runs out, so startup is never blocked for long
+
+    :param FastAPI application: Application instance
+    """
+    try:
+        async with asyncio.timeout(CACHE_WARMUP_BUDGET):
+            for step in WARMUP_STEPS:
+                try:
+                    await step(application)
+                    logger.info("Cache warm-up step '%s' was finished", step.__name__)
+                except Exception:  # pylint: disable=W0718
+                    logger.warning(
+                        "Cache warm-up step '%s' failed", step.__name__, exc_info=True
+                    )
+    except TimeoutError:
+        logger.warning("Cache warm-up exceeded its %s seconds budget", CACHE_WARMUP_BUDGET)
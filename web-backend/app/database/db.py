@@ -1,10 +1,23 @@
+import asyncio
+import hashlib
+import itertools
 import os
-from typing import AsyncGenerator
+from time import monotonic, perf_counter
+from typing import Any, AsyncGenerator, Callable, Final, Optional, cast
 
 from dotenv import load_dotenv
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from fastapi import Request
+from sqlalchemy import text
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 
 from app.configs.logging_handler import configure_logging_handler
+from app.utils.metrics import metrics_registry
 
 load_dotenv()
 logger = configure_logging_handler()
@@ -12,21 +25,347 @@ logger = configure_logging_handler()
 DATABASE_URL = os.getenv("DATABASE_URL")
 if DATABASE_URL is None:
     raise ValueError("DATABASE_URL environment variable is not set")
+DATABASE_READ_URLS: Final[list[str]] = [
+    url.strip() for url in os.getenv("DATABASE_READ_URLS", "").split(",") if url.strip()
+]
+DATABASE_READ_HEALTH_INTERVAL: Final[float] = float(
+    os.getenv("DATABASE_READ_HEALTH_INTERVAL", "10")
+)
+DATABASE_READ_AFTER_WRITE_SECONDS: Final[float] = float(
+    os.getenv("DATABASE_READ_AFTER_WRITE_SECONDS", "5")
+)
+DATABASE_ECHO: Final[bool] = os.getenv("DATABASE_ECHO", "false").lower() == "true"
+DATABASE_POOL_SIZE: Final[int] = int(os.getenv("DATABASE_POOL_SIZE", "10"))
+DATABASE_MAX_OVERFLOW: Final[int] = int(os.getenv("DATABASE_MAX_OVERFLOW", "10"))
+DATABASE_POOL_TIMEOUT: Final[float] = float(os.getenv("DATABASE_POOL_TIMEOUT", "30"))
+DATABASE_POOL_RECYCLE: Final[int] = int(os.getenv("DATABASE_POOL_RECYCLE", "1800"))
+DATABASE_POOL_PRE_PING: Final[bool] = (
+    os.getenv("DATABASE_POOL_PRE_PING", "true").lower() == "true"
+)
+DATABASE_STATEMENT_TIMEOUT_MS: Final[int] = int(
+    os.getenv("DATABASE_STATEMENT_TIMEOUT_MS", "30000")
+)
+DATABASE_STATEMENT_CACHE_SIZE: Final[int] = int(
+    os.getenv("DATABASE_STATEMENT_CACHE_SIZE", "100")
+)
+
+pool_checked_out = metrics_registry.gauge(
+    name="database_pool_checked_out",
+    description="Database connections currently checked out of the pool",
+)
+pool_overflow = metrics_registry.gauge(
+    name="database_pool_overflow",
+    description="Database connections opened above the pool size",
+)
+pool_size = metrics_registry.gauge(
+    name="database_pool_size", description="Database connection pool size"
+)
+pool_checkout_wait = metrics_registry.histogram(
+    name="database_pool_checkout_wait_seconds",
+    description="Time waiting for a database connection from the pool",
+)
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """
+    Connection pool measuring checkout wait time
+
+    """
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        """
+        Connection checkout with wait time recording
+
+        :return ConnectionPoolEntry: Pooled connection record
+        """
+        started = perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_checkout_wait.observe(
+                perf_counter() - started, engine=str(self.logging_name)
+            )
+
+
+def engine_options(name: str) -> dict[str, Any]:
+    """
+    Engine tuning profile from environment variables
+
+    :param str name: Engine name used as pool metrics label
+    :return dict[str, Any]: Keyword arguments for engine creation
+    """
+    server_settings = (
+        {"statement_timeout": str(DATABASE_STATEMENT_TIMEOUT_MS)}
+        if DATABASE_STATEMENT_TIMEOUT_MS > 0
+        else {}
+    )
+    return {
+        "echo": DATABASE_ECHO,
+        "poolclass": InstrumentedAsyncPool,
+        "pool_size": DATABASE_POOL_SIZE,
+        "max_overflow": DATABASE_MAX_OVERFLOW,
+        "pool_timeout": DATABASE_POOL_TIMEOUT,
+        "pool_recycle": DATABASE_POOL_RECYCLE,
+        "pool_pre_ping": DATABASE_POOL_PRE_PING,
+        "pool_logging_name": name,
+        "connect_args": {
+            "statement_cache_size": DATABASE_STATEMENT_CACHE_SIZE,
+            "server_settings": server_settings,
+        },
+    }
+
+
+def register_pool_metrics(async_engine: AsyncEngine, name: str) -> None:
+    """
+    Pool telemetry gauges registration for the engine
+
+    :param AsyncEngine async_engine: Instrumented engine
+    :param str name: Engine name used as metrics label
+    """
+    pool = async_engine.pool
+    assert isinstance(pool, AsyncAdaptedQueuePool)
+    pool_checked_out.set_function(pool.checkedout, engine=name)
+    pool_overflow.set_function(lambda: max(pool.overflow(), 0), engine=name)
+    pool_size.set_function(pool.size, engine=name)
+
+
+def create_instrumented_engine(url: str, name: str) -> AsyncEngine:
+    """
+    Async engine creation with tuning profile and pool telemetry
+
+    :param str url: Database URL
+    :param str name: Engine name used as metrics label
+    :return AsyncEngine: Configured engine
+    """
+    async_engine = create_async_engine(url, **engine_options(name=name))
+    register_pool_metrics(async_engine=async_engine, name=name)
+    return async_engine
+
 
 # Async engine creation
-engine = create_async_engine(url=DATABASE_URL, echo=True)
+engine = create_instrumented_engine(url=DATABASE_URL, name="primary")
 # Sessionmaker creation
 ASYNC_SESSION_LOCAL = async_sessionmaker(
     bind=engine, class_=AsyncSession, expire_on_commit=False
 )
 
 
+class ReadReplicaBalancer:
+    """
+    Read replicas load balancing
+
+    Sessions are handed out round-robin across replicas marked healthy by
+    the periodic health check. Callers that have just written are pinned
+    to the primary for a short window to read their own writes
+
+    """
+
+    def __init__(self, read_urls: list[str], read_after_write_seconds: float):
+        """
+        Initialize replica engines and sessionmakers
+
+        :param list[str] read_urls: Read replicas database URLs
+        :param float read_after_write_seconds: Primary pinning window after writes
+        """
+        self.engines: list[AsyncEngine] = [
+            create_instrumented_engine(url=read_url, name=f"replica-{index}")
+            for index, read_url in enumerate(read_urls)
+        ]
+        self.sessionmakers = [
+            async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+            for engine in self.engines
+        ]
+        self.healthy: list[bool] = [True] * len(self.engines)
+        self.read_after_write_seconds = read_after_write_seconds
+        self._cursor = itertools.count()
+        self._primary_pins: dict[str, float] = {}
+
+    def choose(self) -> Optional[async_sessionmaker[AsyncSession]]:
+        """
+        Next healthy replica sessionmaker choosing
+
+        :return async_sessionmaker | None: Replica sessionmaker or None,
+        when no healthy replica is available
+        """
+        for _ in range(len(self.sessionmakers)):
+            index = next(self._cursor) % len(self.sessionmakers)
+            if self.healthy[index]:
+                return self.sessionmakers[index]
+        return None
+
+    def pin_primary(self, key: str) -> None:
+        """
+        Routing reads of the given caller to the primary for a short window
+
+        :param str key: Caller identifier
+        """
+        now = monotonic()
+        self._primary_pins = {
+            pin_key: expires_at
+            for pin_key, expires_at in self._primary_pins.items()
+            if expires_at > now
+        }
+        self._primary_pins[key] = now + self.read_after_write_seconds
+
+    def is_pinned(self, key: str) -> bool:
+        """
+        Checking whether the caller reads from the primary
+
+        :param str key: Caller identifier
+        :return bool: True if the caller wrote within the pinning window
+        """
+        return self._primary_pins.get(key, 0.0) > monotonic()
+
+    async def check_health(self) -> None:
+        """
+        Replicas availability checking with lightweight query
+        """
+        for index, replica_engine in enumerate(self.engines):
+            try:
+                async with asyncio.timeout(DATABASE_READ_HEALTH_INTERVAL):
+                    async with replica_engine.connect() as connection:
+                        await connection.execute(text("SELECT 1"))
+                healthy = True
+            except Exception as exception:  # pylint: disable=W0718
+                logger.warning("Read replica %s check failed - %s", index, exception)
+                healthy = False
+            if healthy != self.healthy[index]:
+                logger.info("Read replica %s healthy status is %s", index, healthy)
+            self.healthy[index] = healthy
+
+    async def run_health_checks(self) -> None:
+        """
+        Periodic replicas health checking until cancellation
+        """
+        while True:
+            await self.check_health()
+            await asyncio.sleep(DATABASE_READ_HEALTH_INTERVAL)
+
+    async def dispose(self) -> None:
+        """
+        Replica engines connections closing
+        """
+        for replica_engine in self.engines:
+            await replica_engine.dispose()
+
+
+read_replicas = ReadReplicaBalancer(
+    read_urls=DATABASE_READ_URLS,
+    read_after_write_seconds=DATABASE_READ_AFTER_WRITE_SECONDS,
+)
+
+
+def read_your_writes_key(request: Request) -> str:
+    """
+    Caller identifier for read-your-writes pinning
+
+    :param Request request: Current request
+    :return str: Authorization header digest
+    """
+    authorization = request.headers.get("Authorization", "")
+    return hashlib.sha256(authorization.encode("utf-8")).hexdigest()
+
+
+def pin_reads_to_primary(request: Request) -> None:
+    """
+    Read-your-writes escape hatch for the caller after successful write
+
+    :param Request request: Current request
+    """
+    read_replicas.pin_primary(key=read_your_writes_key(request))
+
+
+session_usage = metrics_registry.counter(
+    name="database_sessions_total",
+    description="Request database sessions by whether they were used",
+)
+
+
+class LazySession:
+    """
+    Session proxy creating the session on first attribute access
+
+    Requests that return early or are served from cache never create
+    a session, so they neither construct it nor check out a connection
+
+    """
+
+    def __init__(self, session_factory: Callable[[], AsyncSession]):
+        self._session_factory = session_factory
+        self._session: Optional[AsyncSession] = None
+
+    @property
+    def materialized(self) -> bool:
+        """
+        Whether the underlying session was created
+
+        :return bool: Session creation flag
+        """
+        return self._session is not None
+
+    def __getattr__(self, name: str) -> Any:
+        """
+        Attribute delegation to the session, creating it on first use
+
+        :param str name: Session attribute name
+        :return Any: Session attribute
+        """
+        if self._session is None:
+            self._session = self._session_factory()
+        return getattr(self._session, name)
+
+    async def close(self) -> None:
+        """
+        Session closing returning its connection to the pool, if created
+
+        """
+        session_usage.inc(used=str(self.materialized).lower())
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """
-    Session obtaining for service functionality
+    Lazy session obtaining for service functionality
+
+    Use with the function dependency scope to release the connection
+    as soon as the handler returns
+
+    :yield AsyncSession session: Asynchronious session object
+    """
+    session = LazySession(session_factory=ASYNC_SESSION_LOCAL)
+    try:
+        yield cast(AsyncSession, session)
+    finally:
+        await session.close()
+
+
+def _read_session_factory(request: Request) -> AsyncSession:
+    """
+    Read-only session creation on a replica or the primary
+
+    :param Request request: Current request
+    :return AsyncSession: Session bound to the chosen engine
+    """
+    sessionmaker = None
+    if not read_replicas.is_pinned(key=read_your_writes_key(request)):
+        sessionmaker = read_replicas.choose()
+    return (sessionmaker or ASYNC_SESSION_LOCAL)()
+
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Lazy read-only session obtaining from load-balanced replicas
+
+    Falls back to the primary when no replica is configured or healthy,
+    or when the caller has just written. The engine is chosen on first use
 
+    :param Request request: Current request
     :yield AsyncSession session: Asynchronious session object
     """
-    async with ASYNC_SESSION_LOCAL() as session:
-        yield session
-    logger.info("Database session was created")
+    session = LazySession(session_factory=lambda: _read_session_factory(request))
+    try:
+        yield cast(AsyncSession, session)
+    finally:
+        await session.close()
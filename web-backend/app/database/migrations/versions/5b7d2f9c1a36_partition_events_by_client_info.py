@@ -0,0 +1,66 @@
+# pylint: skip-file
+"""Partition events by client_info
+
+Revision ID: 5b7d2f9c1a36
+Revises: e42eb4f30935
+Create Date: 2026-10-19 10:12:31.482915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7d2f9c1a36'
+down_revision: Union[str, None] = 'e42eb4f30935'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+EVENTS_PARTITIONS = 16
+
+
+def upgrade() -> None:
+    op.rename_table('events', 'events_unpartitioned')
+    op.execute('ALTER TABLE events_unpartitioned RENAME CONSTRAINT events_pkey TO events_unpartitioned_pkey')
+    op.create_table('events',
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('events_id_seq'::regclass)"), nullable=False),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('date', sa.Date(), nullable=True),
+    sa.Column('client_info', sa.String(), nullable=False),
+    sa.PrimaryKeyConstraint('id', 'client_info'),
+    postgresql_partition_by='HASH (client_info)',
+    )
+    for remainder in range(EVENTS_PARTITIONS):
+        op.execute(
+            f'CREATE TABLE events_p{remainder} PARTITION OF events '
+            f'FOR VALUES WITH (MODULUS {EVENTS_PARTITIONS}, REMAINDER {remainder})'
+        )
+    # Indexes on the partitioned table are created on every partition
+    op.create_index('ix_events_client_info_date', 'events', ['client_info', 'date'])
+    op.create_index('ix_events_client_info_name', 'events', ['client_info', 'name'])
+    op.execute(
+        "INSERT INTO events (id, name, date, client_info) "
+        "SELECT id, name, date, COALESCE(client_info, '') FROM events_unpartitioned"
+    )
+    op.execute('ALTER SEQUENCE events_id_seq OWNED BY events.id')
+    op.drop_table('events_unpartitioned')
+
+
+def downgrade() -> None:
+    op.rename_table('events', 'events_partitioned')
+    op.execute('ALTER TABLE events_partitioned RENAME CONSTRAINT events_pkey TO events_partitioned_pkey')
+    op.create_table('events',
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('events_id_seq'::regclass)"), nullable=False),
+    sa.Column('name', sa.String(), nullable=True),
+    sa.Column('date', sa.Date(), nullable=True),
+    sa.Column('client_info', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    )
+    op.execute(
+        'INSERT INTO events (id, name, date, client_info) '
+        'SELECT id, name, date, client_info FROM events_partitioned'
+    )
+    op.execute('ALTER SEQUENCE events_id_seq OWNED BY events.id')
+    op.drop_table('events_partitioned')
@@ -0,0 +1,37 @@
+# pylint: skip-file
+"""Create event stats
+
+Revision ID: 8e1f4c3a7d52
+Revises: 5b7d2f9c1a36
+Create Date: 2026-10-19 11:04:17.203658
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e1f4c3a7d52'
+down_revision: Union[str, None] = '5b7d2f9c1a36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('event_stats',
+    sa.Column('client_info', sa.String(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('events_count', sa.Integer(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('client_info', 'date')
+    )
+    op.execute(
+        'INSERT INTO event_stats (client_info, date, events_count) '
+        'SELECT client_info, date, count(*) FROM events '
+        'WHERE date IS NOT NULL GROUP BY client_info, date'
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('event_stats')
@@ -0,0 +1,33 @@
+# pylint: skip-file
+"""Add events name trigram index
+
+Revision ID: c4a9e6b0f813
+Revises: 8e1f4c3a7d52
+Create Date: 2026-10-19 11:48:52.917340
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a9e6b0f813'
+down_revision: Union[str, None] = '8e1f4c3a7d52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(
+        'ix_events_name_trgm',
+        'events',
+        ['name'],
+        postgresql_using='gin',
+        postgresql_ops={'name': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_events_name_trgm', table_name='events')
@@ -1,22 +1,132 @@
 # mypy: ignore-errors
-from sqlalchemy import Column, Date, Integer, String
+from typing import Final
+
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Date,
+    DateTime,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    event,
+    func,
+    text,
+)
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
 
+EVENTS_PARTITIONS: Final[int] = 16  # Hash partitions number of the events table
+
 
 class Event(Base):  # pylint: disable=R0903
     """
     Events model for info and creation
 
+    The table is hash-partitioned by client, so per-client queries
+    filtering on the partition key only scan one partition
+
     """
 
     __tablename__ = "events"
+    __partition_key__ = "client_info"
+    __table_args__ = (
+        Index("ix_events_client_info_date", "client_info", "date"),
+        Index("ix_events_client_info_name", "client_info", "name"),
+        Index(
+            "ix_events_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        {"postgresql_partition_by": "HASH (client_info)"},
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String)
     date = Column(Date)
-    client_info = Column(String)
+    client_info = Column(String, primary_key=True)
 
     def __repr__(self) -> str:
         return f"name={self.name}"
+
+
+class EventStat(Base):  # pylint: disable=R0903
+    """
+    Per-client daily events counts
+
+    Maintained in the same transaction as events writes, so counts are
+    answered in O(days) instead of aggregating events
+
+    """
+
+    __tablename__ = "event_stats"
+
+    client_info = Column(String, primary_key=True)
+    date = Column(Date, primary_key=True)
+    events_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    def __repr__(self) -> str:
+        return f"client_info={self.client_info}, date={self.date}"
+
+
+class Outbox(Base):  # pylint: disable=R0903
+    """
+    Messages for Kafka publishing written in the transaction of their data
+
+    Pending messages are relayed in the insertion order and marked with
+    their publishing time, so they are never lost after the commit
+
+    """
+
+    __tablename__ = "outbox"
+    __table_args__ = (
+        Index(
+            "ix_outbox_pending",
+            "id",
+            postgresql_where=text("published_at IS NULL"),
+        ),
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    topic = Column(String, nullable=False)
+    key = Column(String)
+    payload = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    published_at = Column(DateTime(timezone=True))
+
+    def __repr__(self) -> str:
+        return f"id={self.id}, topic={self.topic}"
+
+
+@event.listens_for(Base.metadata, "before_create")
+def create_extensions(_, connection, **__) -> None:
+    """
+    Extensions creation required by the model indexes
+
+    :param Connection connection: Current database connection
+    """
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
+
+@event.listens_for(Event.__table__, "after_create")
+def create_events_partitions(target, connection, **_) -> None:
+    """
+    Hash partitions creation after the partitioned events table creation
+
+    :param Table target: Created events table
+    :param Connection connection: Current database connection
+    """
+    if connection.dialect.name != "postgresql":
+        return
+    for remainder in range(EVENTS_PARTITIONS):
+        connection.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {target.name}_p{remainder} "
+                f"PARTITION OF {target.name} "
+                f"FOR VALUES WITH (MODULUS {EVENTS_PARTITIONS}, REMAINDER {remainder})"
+            )
+        )
@@ -1,25 +1,109 @@
-from typing import Any, Generic, Sequence, TypeVar
+from collections import Counter
+from datetime import date, datetime
+from typing import (
+    Any,
+    AsyncIterator,
+    Final,
+    Generic,
+    Mapping,
+    Optional,
+    Sequence,
+    TypeVar,
+)
 
+from pydantic import BaseModel
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    ColumnElement,
+    Delete,
+    RowMapping,
+    Select,
+    any_,
+    bindparam,
+    cast,
+    delete,
+    func,
+    literal,
+    literal_column,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, OID, REGCLASS, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
 from app.configs.logging_handler import configure_logging_handler
-from app.database.models import Base
+from app.database.models import Base, Event, EventStat, Outbox
 
 logger = configure_logging_handler()
 
+OUTBOX_RELAY_LOCK_ID: Final[int] = 0x6F7574626F78  # Advisory lock of the publishing relay
+
 ModelType = TypeVar("ModelType", bound=Base)  # pylint: disable=C0103
+StatementType = TypeVar("StatementType", Select[Any], Delete)  # pylint: disable=C0103
 
 
 class ModelRepository(Generic[ModelType]):
     """
     Database model repository
 
+    Repositories of partitioned models are scoped to one partition value,
+    so every query includes the partition key and the planner prunes
+    other partitions
+
     """
 
-    def __init__(self, session: AsyncSession, model: type[ModelType]):
+    # Whether upserts load replaced records for the deletion hook
+    tracks_replaced_records: bool = False
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        model: type[ModelType],
+        partition_value: Optional[Any] = None,
+    ):
         self.session = session
         self.model = model
+        self.partition_key: Optional[str] = getattr(model, "__partition_key__", None)
+        self.partition_value = partition_value
+
+    def _scoped(self, query: StatementType) -> StatementType:
+        """
+        Query restricting to the repository partition
+
+        :param Select | Delete query: Query for scoping
+        :return Select | Delete: Query filtered by the partition key if it is set
+        """
+        if self.partition_key is None or self.partition_value is None:
+            return query
+        return query.where(getattr(self.model, self.partition_key) == self.partition_value)
+
+    def _partitioned(self, values: Mapping[str, Any]) -> dict[str, Any]:
+        """
+        Record values bound to the repository partition
+
+        :param Mapping values: Record values
+        :return dict: Record values with the partition key if it is set
+        """
+        record = dict(values)
+        if self.partition_key is not None and self.partition_value is not None:
+            record[self.partition_key] = self.partition_value
+        return record
+
+    def _id_in(self, ids: Sequence[int]) -> ColumnElement[bool]:
+        """
+        Identifiers matching as one array parameter
+
+        A single ANY parameter keeps one prepared statement for any batch size
+
+        :param Sequence[int] ids: Identificators for filtering
+        :return ColumnElement: Filtering clause
+        """
+        id_column = self.model.__table__.c.id
+        clause: ColumnElement[bool] = id_column == any_(
+            literal(list(ids), type_=ARRAY(id_column.type))
+        )
+        return clause
 
     async def fetch_by_id(self, id: int) -> ModelType | None:  # pylint: disable=W0622
         """
@@ -30,10 +114,24 @@ class ModelRepository(Generic[ModelType]):
         """
         logger.info("Fetching record with id=%s", id)
         result = await self.session.execute(
-            select(self.model).where(self.model.id == id)
+            self._scoped(select(self.model).where(self.model.id == id))
         )
         return result.scalars().first()
 
+    async def fetch_by_ids(self, ids: Sequence[int]) -> Sequence[ModelType]:
+        """
+        Fetching results by several ids in one query
+
+        :param Sequence[int] ids: Identificators for filtering
+        :return list[ModelType] results: Found results
+        """
+        if not ids:
+            return []
+        result = await self.session.execute(
+            self._scoped(select(self.model).where(self._id_in(ids)))
+        )
+        return result.scalars().all()
+
     async def fetch_by_filters(self, **filters: Any) -> Sequence[ModelType]:
         """
         Fetching results by filters
@@ -47,26 +145,461 @@ class ModelRepository(Generic[ModelType]):
                 query = query.where(
                     getattr(self.model, field).ilike(f"%{value}%")
                 )  # Case-insensitive search
-        result = await self.session.execute(query)
+        result = await self.session.execute(self._scoped(query))
         return result.scalars().all()
 
+    async def fetch_columns_by_filters(
+        self, columns: Sequence[str], **filters: Any
+    ) -> Sequence[RowMapping]:
+        """
+        Fetching selected columns by exact filters as plain rows
+
+        Rows skip ORM hydration and the identity map, so they map directly
+        into response models without attribute loading
+
+        :param Sequence[str] columns: Model columns for selection
+        :return Sequence[RowMapping] results: Filtered rows mappings
+        """
+        query = select(*(getattr(self.model, column) for column in columns))
+        for field, value in filters.items():
+            if hasattr(self.model, field):
+                query = query.where(getattr(self.model, field) == value)
+        result = await self.session.execute(self._scoped(query))
+        return result.mappings().all()
+
+    async def search_similar(
+        self, field: str, value: str, columns: Sequence[str], limit: int
+    ) -> Sequence[RowMapping]:
+        """
+        Fuzzy searching by trigram word similarity, best matches first
+
+        The word similarity operator is served by the trigram GIN index
+        of the searched column
+
+        :param str field: Searched model column
+        :param str value: Searched text
+        :param Sequence[str] columns: Model columns for selection
+        :param int limit: Maximum number of results
+        :return Sequence[RowMapping] results: Rows mappings with similarity
+        """
+        searched_column = getattr(self.model, field)
+        similarity = func.word_similarity(value, searched_column).label("similarity")
+        query = (
+            select(*(getattr(self.model, column) for column in columns), similarity)
+            .where(literal(value).op("<%")(searched_column))
+            .order_by(similarity.desc(), self.model.id)
+            .limit(limit)
+        )
+        result = await self.session.execute(self._scoped(query))
+        return result.mappings().all()
+
     async def fetch_all(self) -> Sequence[ModelType]:
         """
         Fetching all results
 
         :return list[ModelType] results: Fetched results
         """
-        result = await self.session.execute(select(self.model))
+        result = await self.session.execute(self._scoped(select(self.model)))
         return result.scalars().all()
 
-    async def create(self, obj: ModelType) -> Any:
+    async def stream_by_filters(
+        self, chunk_size: int, **filters: Any
+    ) -> AsyncIterator[Sequence[ModelType]]:
+        """
+        Streaming results by exact filters through a server-side cursor
+
+        Rows are fetched in fixed-size chunks, so memory usage does not
+        depend on the total number of matching records
+
+        :param int chunk_size: Number of rows fetched per cursor round trip
+        :yield Sequence[ModelType] chunk: Next chunk of filtered results
+        """
+        query = select(self.model).execution_options(yield_per=chunk_size)
+        for field, value in filters.items():
+            if hasattr(self.model, field):
+                query = query.where(getattr(self.model, field) == value)
+        result = await self.session.stream_scalars(
+            self._scoped(query).order_by(self.model.id)
+        )
+        async for chunk in result.partitions():
+            yield chunk
+
+    async def create(self, obj: ModelType, commit: bool = True) -> Any:
         """
         Record creation
 
         :param ModelType obj: Object creation
+        :param bool commit: Committing the transaction, otherwise only flushing
         :return ModelType results: Fetched results
         """
         instance = self.model(**obj.dict())
+        if self.partition_key is not None and self.partition_value is not None:
+            setattr(instance, self.partition_key, self.partition_value)
         self.session.add(instance)
-        await self.session.commit()
+        await self._on_created(records=[instance])
+        await self._finish(commit=commit)
         return instance
+
+    async def create_many(
+        self, objs: Sequence[BaseModel], commit: bool = True
+    ) -> Sequence[ModelType]:
+        """
+        Records creation with one INSERT statement
+
+        :param Sequence[BaseModel] objs: Objects for creation
+        :param bool commit: Committing the transaction, otherwise only flushing
+        :return list[ModelType] results: Created records
+        """
+        if not objs:
+            return []
+        result = await self.session.scalars(
+            insert(self.model).returning(self.model),
+            [self._partitioned(obj.model_dump()) for obj in objs],
+        )
+        instances = result.all()
+        await self._on_created(records=instances)
+        await self._finish(commit=commit)
+        logger.info("%s records were created", len(instances))
+        return instances
+
+    async def upsert_many(
+        self, rows: Sequence[Mapping[str, Any]], commit: bool = True
+    ) -> Sequence[ModelType]:
+        """
+        Records inserting or updating by primary key with one statement
+
+        Every row must contain the primary key values, and the last row of
+        a repeated key wins. Replaced records are locked and read before
+        the statement, and the returned xmax tells updated records from
+        inserted ones, so only actually replaced records are passed on.
+        The identifiers sequence is moved past the inserted identifiers
+
+        :param Sequence[Mapping] rows: Records values
+        :param bool commit: Committing the transaction, otherwise only flushing
+        :return list[ModelType] results: Inserted or updated records
+        """
+        if not rows:
+            return []
+        key_columns = list(self.model.__table__.primary_key.columns)
+        deduplicated: dict[tuple[Any, ...], dict[str, Any]] = {}
+        for row in rows:
+            value = self._partitioned(row)
+            deduplicated[tuple(value.get(column.name) for column in key_columns)] = value
+        values = list(deduplicated.values())
+        replaced: dict[tuple[Any, ...], Any] = {}
+        if self.tracks_replaced_records:
+            locked = await self.session.execute(
+                self._scoped(
+                    select(*self.model.__table__.columns).where(
+                        self._id_in([value["id"] for value in values])
+                    )
+                ).with_for_update()
+            )
+            replaced = {
+                tuple(getattr(record, column.name) for column in key_columns): record
+                for record in locked.all()
+            }
+        statement = insert(self.model).values(values)
+        statement = statement.on_conflict_do_update(
+            index_elements=key_columns,
+            set_={
+                column.name: statement.excluded[column.name]
+                for column in self.model.__table__.columns
+                if column not in key_columns
+            },
+        )
+        result = await self.session.execute(
+            statement.returning(self.model, literal_column("xmax = 0", Boolean).label("inserted")),
+            execution_options={"populate_existing": True},
+        )
+        upserted = result.all()
+        await self._advance_sequence(values)
+        instances = [instance for instance, _ in upserted]
+        updated_keys = [
+            tuple(getattr(instance, column.name) for column in key_columns)
+            for instance, inserted in upserted
+            if not inserted
+        ]
+        await self._on_deleted(records=[replaced[key] for key in updated_keys if key in replaced])
+        await self._on_created(records=instances)
+        await self._finish(commit=commit)
+        logger.info(
+            "%s records were upserted, %s of them updated", len(instances), len(updated_keys)
+        )
+        return instances
+
+    async def delete_many(self, ids: Sequence[int], commit: bool = True) -> int:
+        """
+        Records deleting by ids with one statement
+
+        Already loaded instances are not synchronized with the deletion
+
+        :param Sequence[int] ids: Identificators for deleting
+        :param bool commit: Committing the transaction, otherwise only flushing
+        :return int: Number of deleted records
+        """
+        if not ids:
+            return 0
+        statement = (
+            self._scoped(delete(self.model).where(self._id_in(ids)))
+            .returning(*self.model.__table__.columns)
+            .execution_options(synchronize_session=False)
+        )
+        result = await self.session.execute(statement)
+        deleted = result.all()
+        await self._on_deleted(records=deleted)
+        await self._finish(commit=commit)
+        logger.info("%s records were deleted", len(deleted))
+        return len(deleted)
+
+    async def _advance_sequence(self, values: Sequence[Mapping[str, Any]]) -> None:
+        """
+        Identifiers sequence advancing past explicitly inserted identifiers
+
+        Explicit identifiers do not consume the sequence, so later inserts
+        taking identifiers from it would collide with them. Advancing is
+        serialized by an advisory lock on the sequence until the transaction
+        end, so concurrent upserts never move it backwards
+
+        :param Sequence[Mapping] values: Upserted records values
+        """
+        column = self.model.__table__.autoincrement_column
+        if column is None:
+            return
+        ids = [value[column.name] for value in values if value.get(column.name) is not None]
+        if not ids:
+            return
+        sequence = cast(
+            func.pg_get_serial_sequence(self.model.__tablename__, column.name), REGCLASS
+        )
+        last_value = func.coalesce(func.pg_sequence_last_value(sequence), 0)
+        current = await self.session.execute(select(last_value))
+        if max(ids) <= current.scalar():
+            return
+        await self.session.execute(
+            select(func.pg_advisory_xact_lock(cast(cast(sequence, OID), BigInteger)))
+        )
+        await self.session.execute(
+            select(func.setval(sequence, func.greatest(max(ids), last_value)))
+        )
+        logger.info("Sequence of %s was advanced to %s", self.model.__tablename__, max(ids))
+
+    async def _finish(self, commit: bool) -> None:
+        """
+        Write finishing by commit or flush within the caller transaction
+
+        :param bool commit: Committing the transaction, otherwise only flushing
+        """
+        if commit:
+            await self.session.commit()
+        else:
+            await self.session.flush()
+
+    async def _on_created(self, records: Sequence[Any]) -> None:
+        """
+        Derived data maintaining in the creation transaction
+
+        :param Sequence records: Created records
+        """
+
+    async def _on_deleted(self, records: Sequence[Any]) -> None:
+        """
+        Derived data maintaining in the deletion transaction
+
+        :param Sequence records: Deleted or replaced records
+        """
+
+
+class EventRepository(ModelRepository[Event]):
+    """
+    Events repository maintaining per-client daily statistics
+
+    """
+
+    tracks_replaced_records = True
+
+    def __init__(self, session: AsyncSession, partition_value: Optional[Any] = None):
+        super().__init__(session=session, model=Event, partition_value=partition_value)
+
+    async def _on_created(self, records: Sequence[Any]) -> None:
+        """
+        Daily statistics incrementing for created events
+
+        :param Sequence records: Created events
+        """
+        await self._update_stats(records=records, delta=1)
+
+    async def _on_deleted(self, records: Sequence[Any]) -> None:
+        """
+        Daily statistics decrementing for deleted or replaced events
+
+        :param Sequence records: Deleted or replaced events
+        """
+        await self._update_stats(records=records, delta=-1)
+
+    async def _update_stats(self, records: Sequence[Any], delta: int) -> None:
+        """
+        Daily statistics upserting in the current transaction
+
+        Counts are clamped at zero, so a decrement racing with another
+        writer never leaves a negative count
+
+        :param Sequence records: Events with client and date attributes
+        :param int delta: Count change per event
+        """
+        counts = Counter(
+            (record.client_info, record.date)
+            for record in records
+            if record.client_info is not None and record.date is not None
+        )
+        if not counts:
+            return
+        if delta < 0:
+            stats = EventStat.__table__
+            await self.session.execute(
+                update(stats)
+                .where(
+                    stats.c.client_info == bindparam("stat_client_info"),
+                    stats.c.date == bindparam("stat_date"),
+                )
+                .values(
+                    events_count=func.greatest(
+                        stats.c.events_count - bindparam("stat_decrement"), 0
+                    )
+                ),
+                [
+                    {
+                        "stat_client_info": client_info,
+                        "stat_date": event_date,
+                        "stat_decrement": count * -delta,
+                    }
+                    for (client_info, event_date), count in counts.items()
+                ],
+            )
+            return
+        statement = insert(EventStat).values(
+            [
+                {
+                    "client_info": client_info,
+                    "date": event_date,
+                    "events_count": count * delta,
+                }
+                for (client_info, event_date), count in counts.items()
+            ]
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[EventStat.client_info, EventStat.date],
+            set_={"events_count": EventStat.events_count + statement.excluded.events_count},
+        )
+        await self.session.execute(statement)
+
+    async def fetch_stats(
+        self, date_from: Optional[date] = None, date_to: Optional[date] = None
+    ) -> Sequence[RowMapping]:
+        """
+        Daily events counts fetching for the repository client
+
+        :param date date_from: First date of the range, inclusive
+        :param date date_to: Last date of the range, inclusive
+        :return Sequence[RowMapping] results: Dates with events counts
+        """
+        query = (
+            select(EventStat.date, EventStat.events_count)
+            .where(EventStat.client_info == self.partition_value)
+            .order_by(EventStat.date)
+        )
+        if date_from is not None:
+            query = query.where(EventStat.date >= date_from)
+        if date_to is not None:
+            query = query.where(EventStat.date <= date_to)
+        result = await self.session.execute(query)
+        return result.mappings().all()
+
+
+class OutboxRepository(ModelRepository[Outbox]):
+    """
+    Outbox messages repository
+
+    Messages are added to the caller transaction and published by one
+    relay at a time, which holds the relay advisory lock on its connection
+    while publishing, so messages of one key are never published concurrently
+
+    """
+
+    def __init__(self, session: AsyncSession):
+        super().__init__(session=session, model=Outbox)
+
+    def add(self, topic: str, payload: bytes, key: Optional[str] = None) -> Outbox:
+        """
+        Message adding to the current transaction
+
+        :param str topic: Kafka topic of the message
+        :param bytes payload: Encoded message for sending
+        :param str key: Message key selecting the topic partition
+        :return Outbox: Added message
+        """
+        message = Outbox(topic=topic, payload=payload, key=key)
+        self.session.add(message)
+        return message
+
+    async def try_lock_relay(self) -> bool:
+        """
+        Relay advisory lock acquiring on the session connection without waiting
+
+        The lock outlives transactions until unlock_relay or the connection
+        closing, so the connection must not be shared by transaction pooling
+
+        :return bool: Whether the lock was acquired, False while another relay publishes
+        """
+        result = await self.session.execute(
+            select(func.pg_try_advisory_lock(OUTBOX_RELAY_LOCK_ID))
+        )
+        return bool(result.scalar())
+
+    async def unlock_relay(self) -> None:
+        """
+        Relay advisory lock releasing
+        """
+        await self.session.execute(select(func.pg_advisory_unlock(OUTBOX_RELAY_LOCK_ID)))
+
+    async def fetch_pending(self, limit: int) -> Sequence[Outbox]:
+        """
+        Oldest pending messages fetching
+
+        :param int limit: Maximum number of messages
+        :return list[Outbox] results: Pending messages in the insertion order
+        """
+        result = await self.session.execute(
+            select(Outbox)
+            .where(Outbox.published_at.is_(None))
+            .order_by(Outbox.id)
+            .limit(limit)
+        )
+        return result.scalars().all()
+
+    async def mark_published(self, ids: Sequence[int]) -> None:
+        """
+        Messages marking as published in the current transaction
+
+        :param Sequence[int] ids: Identificators of published messages
+        """
+        if not ids:
+            return
+        await self.session.execute(
+            update(Outbox)
+            .where(self._id_in(ids))
+            .values(published_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+
+    async def delete_published(self, before: datetime) -> int:
+        """
+        Published messages deleting after the retention period
+
+        :param datetime before: Publishing time bound, exclusive
+        :return int: Number of deleted messages
+        """
+        result = await self.session.execute(
+            delete(Outbox).where(Outbox.published_at < before)
+        )
+        return int(result.rowcount)  # type: ignore[attr-defined]
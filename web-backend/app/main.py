@@ -1,26 +1,32 @@
+import asyncio
 import os
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 from typing import Any, AsyncGenerator, Awaitable, Callable, Optional
 
 from dotenv import load_dotenv
 from fastapi import Depends, FastAPI, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 from slowapi import Limiter
 from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIASGIMiddleware
 from slowapi.util import get_remote_address
 
-from app.brokers.kafka_admin import kafka_admin
+from app.brokers.kafka_admin import KAFKA_TOPIC_PARTITIONS, kafka_admin
+from app.brokers.kafka_consumer import KAFKA_CONSUMER_ENABLED, kafka_consumer
 from app.brokers.kafka_producer import kafka_producer
-from app.caches.keydb import cache_span
+from app.brokers.outbox_relay import outbox_relay
+from app.caches.keydb import cache_span, keydb_registry
+from app.caches.warmup import CACHE_WARMUP_ENABLED, warm_up_cache
 from app.configs.logging_handler import configure_logging_handler
-from app.database.db import engine
+from app.database.db import engine, read_replicas
 from app.database.models import Base
+from app.middlewares.etag_middleware import ETagMiddleware
 from app.middlewares.logging_middleware import LoggingMiddleware
 from app.routers import auth, events, kafka
 from app.services.keycloak import verify_permission, verify_token
 from app.utils.handlers import rate_limit_exceeded_handler
+from app.utils.metrics import metrics_registry, verify_metrics_access
 
 load_dotenv()  # Environmental variables
 logger = configure_logging_handler()
@@ -42,24 +48,60 @@ async def lifespan_handler(application: FastAPI) -> AsyncGenerator[None, None]:
         async with engine.begin() as connector:
             await connector.run_sync(Base.metadata.create_all)
         logger.info("Database creation was finished")
+        replicas_health_task = None
+        if read_replicas.engines:
+            await read_replicas.check_health()
+            replicas_health_task = asyncio.create_task(read_replicas.run_health_checks())
+            logger.info("Database read replicas health checks were started")
         await kafka_producer.start()
         application.state.producer = kafka_producer
         logger.info("Application client Kafka producer was started")
+        await kafka_admin.start()
         try:
-            await kafka_admin.create_topic(topic_name="events")
+            await kafka_admin.create_topic(
+                topic_name="events", num_partitions=KAFKA_TOPIC_PARTITIONS
+            )
             logger.info("Application client Kafka topic 'events' was created")
         except HTTPException as excp:
             if excp.status_code == status.HTTP_409_CONFLICT:
+                await kafka_admin.ensure_partitions(
+                    topic_name="events", num_partitions=KAFKA_TOPIC_PARTITIONS
+                )
                 logger.info("Application start continued with existing topic 'events")
             else:
                 raise HTTPException(
                     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                     detail=f"Failed to start broker, because {str(excp)}",
                 ) from excp
+        outbox_relay_task = asyncio.create_task(outbox_relay.run())
+        logger.info("Outbox relay was started")
+        consumer_task = None
+        if KAFKA_CONSUMER_ENABLED:
+            await kafka_consumer.start()
+            consumer_task = asyncio.create_task(kafka_consumer.run())
+        if CACHE_WARMUP_ENABLED:
+            await warm_up_cache(application)
         yield
+        if consumer_task is not None:
+            consumer_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await consumer_task
+            await kafka_consumer.stop()
+        outbox_relay_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await outbox_relay_task
+        logger.info("Outbox relay was finished")
         await application.state.producer.stop()
         logger.info("Application client Kafka producer was finished")
-        logger.info("Backend container shutdown")
+        await kafka_admin.stop()
+        if replicas_health_task is not None:
+            replicas_health_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await replicas_health_task
+            await read_replicas.dispose()
+            logger.info("Database read replicas were disposed")
+    await keydb_registry.close()
+    logger.info("Backend container shutdown")
 
 
 # FastAPI app creation
@@ -109,6 +151,7 @@ app.include_router(router=kafka.router, prefix="/api/v1/kafka", tags=["kafka"])
 # Configure CORS
 origins = ORIGINS.split(sep=",") if ORIGINS else []
 logger.info("ORIGINS=%s", ORIGINS)
+app.add_middleware(middleware_class=ETagMiddleware)
 app.add_middleware(middleware_class=LoggingMiddleware)
 app.add_middleware(
     middleware_class=CORSMiddleware,
@@ -116,6 +159,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 
@@ -130,6 +174,23 @@ async def root() -> Response:
     return Response(status_code=status.HTTP_200_OK)
 
 
+@app.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    dependencies=[Depends(verify_metrics_access)],
+)
+async def metrics() -> PlainTextResponse:
+    """
+    Application metrics for Prometheus scraping
+
+    :returns PlainTextResponse: Metrics in Prometheus exposition format
+    """
+    return PlainTextResponse(
+        content=metrics_registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
 @app.get("/admin")  # Requires the admin role
 def call_admin(
     user: dict[str, Any] = Depends(verify_permission(required_roles=["admin"])),
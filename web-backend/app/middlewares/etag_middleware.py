@@ -0,0 +1,36 @@
+from typing import Awaitable, Callable
+
+from fastapi import Request, Response, status
+from starlette.middleware.base import BaseHTTPMiddleware
+
+
+class ETagMiddleware(BaseHTTPMiddleware):
+    """
+    Middleware setting resource version entity tags on responses
+
+    Routes resolving a resource version get its strong entity tag instead
+    of the body hash tag of the cache decorator, and clients are asked to
+    revalidate on every use
+    """
+
+    async def dispatch(
+        self, request: Request, call_next: Callable[[Request], Awaitable[Response]]
+    ) -> Response:
+        """
+        Entity tag header setting from the request state
+
+        :param Request request: The incoming request object
+        :param Callable[[Request], Awaitable[Response]] call_next: Function calling
+        the next middleware or endpoint
+
+        :return Response: The response object with the resource entity tag
+        """
+        response: Response = await call_next(request)
+        resource_version = getattr(request.state, "resource_version", None)
+        if resource_version is not None and response.status_code in {
+            status.HTTP_200_OK,
+            status.HTTP_304_NOT_MODIFIED,
+        }:
+            response.headers["ETag"] = resource_version.etag
+            response.headers["Cache-Control"] = "no-cache"
+        return response
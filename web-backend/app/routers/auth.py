@@ -1,9 +1,12 @@
-from typing import Annotated, Any
+from typing import Annotated, Any, Final
 
 from fastapi import APIRouter, Depends, Form, HTTPException, Request, status
 from fastapi.responses import JSONResponse, RedirectResponse
 from fastapi_cache.decorator import cache
 
+from app.caches.etags import check_not_modified
+from app.caches.tags import invalidate_tag
+
 from app.configs.logging_handler import configure_logging_handler
 from app.schemas.auth import (
     CustomOAuth2PasswordRequestForm,
@@ -31,8 +34,41 @@ from app.services.keycloak import (
 
 logger = configure_logging_handler()
 
+USERS_CACHE_NAMESPACE: Final[str] = "users"
+USERS_CACHE_TAG: Final[str] = "all"
+USERS_CACHE_EXPIRE: Final[int] = 60
+
 router = APIRouter()
 
+admin_permission = verify_permission(required_roles=["admin"])
+
+
+async def invalidate_users_cache() -> None:
+    """
+    Cached users list invalidation after users changes
+    """
+    await invalidate_tag(namespace=USERS_CACHE_NAMESPACE, tag=USERS_CACHE_TAG)
+
+
+async def check_users_not_modified(
+    request: Request, _: dict[str, Any] = Depends(admin_permission)
+) -> None:
+    """
+    Conditional users list request checking before the cache and Keycloak
+
+    Users are also changed in Keycloak directly, so the users version
+    changes at least once per cache expiration
+
+    :param Request request: Current request
+    :param _ dict: A dictionary containing the request context, used for permission verification
+    """
+    await check_not_modified(
+        request=request,
+        namespace=USERS_CACHE_NAMESPACE,
+        tag=USERS_CACHE_TAG,
+        max_age=USERS_CACHE_EXPIRE,
+    )
+
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
@@ -56,6 +92,7 @@ async def register_user(
     :returns dict token: Auth token obtaining
     """
     register_user_result = await register(form_data.username, form_data.password)
+    await invalidate_users_cache()
     logger.info("User '%s' was registered successfully", form_data.username)
     return register_user_result
 
@@ -136,10 +173,10 @@ async def generate_auth() -> RedirectResponse:
     return RedirectResponse(url=auth_url)
 
 
-@router.get("/users")
-@cache(expire=60)
+@router.get("/users", dependencies=[Depends(check_users_not_modified)])
+@cache(expire=USERS_CACHE_EXPIRE, namespace=USERS_CACHE_NAMESPACE)
 async def fetch_all_users(
-    _: dict[str, Any] = Depends(verify_permission(required_roles=["admin"])),
+    _: dict[str, Any] = Depends(admin_permission),
 ) -> dict[str, list[dict[str, Any]]]:
     """
     Fetching all users
@@ -186,6 +223,7 @@ async def delete_user_by_id(
     :returns: A message indicating the result of the deletion
     """
     await delete_user(user_id=user_id)
+    await invalidate_users_cache()
     logger.info("User with ID %s was deleted", user_id)
     return {"message": f"User with ID {user_id} was deleted"}
 
@@ -210,6 +248,7 @@ async def update_user_by_id(
         ]
     }
     await update_user(user_id=user_id, user_data=user_data)
+    await invalidate_users_cache()
     logger.info("User with ID %s was updated", user_id)
     return {"message": f"User with ID {user_id} was updated"}
 
@@ -1,65 +1,241 @@
-from typing import Any, Sequence
+import os
+from datetime import date, datetime, timezone
+from typing import Any, Final, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from dotenv import load_dotenv
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 from fastapi_cache.decorator import cache
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.brokers.kafka_producer import get_producer
+from app.brokers.message_codec import schema_registry
+from app.brokers.outbox_relay import outbox_relay
+from app.caches.access import record_access
+from app.caches.etags import check_not_modified
+from app.caches.tags import invalidate_tag
 from app.configs.logging_handler import configure_logging_handler
-from app.database.db import get_db
-from app.database.models import Event
-from app.database.repository import ModelRepository, ModelType
+from app.database.db import get_db, get_read_db, pin_reads_to_primary
+from app.database.repository import EventRepository, OutboxRepository
 from app.routers.auth import get_current_user
-from app.schemas.events import EventCreateSchema, EventFetchSchema
+from app.schemas.events import (
+    EventCreateSchema,
+    EventExportFormat,
+    EventFetchSchema,
+    EventSearchSchema,
+    EventStatsSchema,
+)
+from app.utils.exporters import EXPORT_MEDIA_TYPES, export_csv, export_ndjson
 
 logger = configure_logging_handler()
 
+load_dotenv()
+
+EVENTS_CACHE_NAMESPACE: Final[str] = "events"
+EVENTS_CACHE_EXPIRE: Final[int] = int(os.getenv("EVENTS_CACHE_EXPIRE", "3600"))
+EVENTS_EXPORT_CHUNK_SIZE: Final[int] = int(os.getenv("EVENTS_EXPORT_CHUNK_SIZE", "1000"))
+EVENT_FETCH_COLUMNS: Final[tuple[str, ...]] = tuple(EventFetchSchema.model_fields)
+EVENTS_SEARCH_MAX_LIMIT: Final[int] = 100
+EVENT_NOTIFICATION_SUBJECT: Final[str] = "EventNotification"
+
 router = APIRouter()
 
 
+async def invalidate_events_cache(client_info: str) -> None:
+    """
+    Cached events invalidation for the client after writes
+
+    :param str client_info: Client whose events were written
+    """
+    await invalidate_tag(namespace=EVENTS_CACHE_NAMESPACE, tag=client_info)
+
+
+async def record_events_access(user: dict[str, Any] = Depends(get_current_user)) -> None:
+    """
+    Events list access recording for the cache warm-up
+
+    :param dict user: Current user instance
+    """
+    await record_access(namespace=EVENTS_CACHE_NAMESPACE, principal=user["azp"])
+
+
+async def check_events_not_modified(
+    request: Request, user: dict[str, Any] = Depends(get_current_user)
+) -> None:
+    """
+    Conditional events list request checking before the cache and database
+
+    :param Request request: Current request
+    :param dict user: Current user instance
+    """
+    await check_not_modified(
+        request=request, namespace=EVENTS_CACHE_NAMESPACE, tag=user["azp"]
+    )
+
+
 @router.post("/create", response_model=EventCreateSchema)
 async def create_event(
+    request: Request,
     event: EventCreateSchema,
     user: dict[str, Any] = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
-    producer: Any = Depends(get_producer),
+    db: AsyncSession = Depends(get_db, scope="function"),
 ) -> EventCreateSchema | Any:
     """
     Event creation for authenticated user
 
+    The creation notification is written to the outbox in the event
+    transaction and published to Kafka by the background relay
+
+    :param Request request: Current request
     :param EventCreateSchema event: Event for creation
     :param dict user: Current user instance
     :param AsyncSession db: Current database session
     """
-    repository_events = ModelRepository(session=db, model=Event)
+    event.client_info = user["azp"]
+    repository_events = EventRepository(
+        session=db, partition_value=event.client_info
+    )
     event_finding_result = await repository_events.fetch_by_filters(name=event.name)
     if event_finding_result:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Event already exists in system",
         )
-    event.client_info = user["azp"]
-    event_creation_result = await repository_events.create(obj=event)  # type: ignore[arg-type]
-    await producer.send_message(topic="events", message=f"{event.name} was created")
+    event_creation_result = await repository_events.create(
+        obj=event, commit=False  # type: ignore[arg-type]
+    )
+    OutboxRepository(session=db).add(
+        topic="events",
+        key=event.client_info,  # Keyed by client, so each client keeps its order within its partition
+        payload=schema_registry.encode(
+            EVENT_NOTIFICATION_SUBJECT,
+            {
+                "action": "CREATED",
+                "event_id": event_creation_result.id,
+                "client_info": event.client_info,
+                "name": event.name,
+                "date": event.date,
+                "occurred_at": datetime.now(timezone.utc),
+            },
+        ),
+    )
+    await db.commit()
+    outbox_relay.notify()
+    pin_reads_to_primary(request=request)
+    await invalidate_events_cache(client_info=event.client_info)
     logger.info("Event '%s' was created", event.name)
     return event_creation_result
 
 
-@router.get("", response_model=list[EventFetchSchema])
-@cache(expire=60)
+@router.get(
+    "",
+    response_model=list[EventFetchSchema],
+    dependencies=[Depends(record_events_access), Depends(check_events_not_modified)],
+)
+@cache(expire=EVENTS_CACHE_EXPIRE, namespace=EVENTS_CACHE_NAMESPACE)
 async def fetch_events(
     user: dict[str, Any] = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db),
-) -> Sequence[ModelType]:
+    db: AsyncSession = Depends(get_read_db, scope="function"),
+) -> list[dict[str, Any]]:
     """
     Events for current user fetching
 
+    Only response columns are selected as plain rows, skipping ORM
+    hydration before response validation
+
     :param dict user: Current user instance
     :param AsyncSession db: Current database session
     """
-    repository_events = ModelRepository(session=db, model=Event)
-    fetch_events_result = await repository_events.fetch_by_filters(
-        filters={"client_info": user["azp"]}
+    repository_events = EventRepository(
+        session=db, partition_value=user["azp"]
+    )
+    fetch_events_result = await repository_events.fetch_columns_by_filters(
+        columns=EVENT_FETCH_COLUMNS
     )
     logger.info("Fetching result was successful")
-    return fetch_events_result
+    return [dict(row) for row in fetch_events_result]
+
+
+@router.get("/export")
+async def export_events(
+    export_format: EventExportFormat = Query(
+        default=EventExportFormat.NDJSON, alias="format"
+    ),
+    user: dict[str, Any] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+) -> StreamingResponse:
+    """
+    Streaming export of all events for current user
+
+    Events are read through a server-side cursor in fixed-size chunks
+    and written to the response as they arrive, so memory usage stays
+    constant whatever the export size
+
+    :param EventExportFormat export_format: Export file format, NDJSON or CSV
+    :param dict user: Current user instance
+    :param AsyncSession db: Current database session
+    """
+    repository_events = EventRepository(
+        session=db, partition_value=user["azp"]
+    )
+    chunks = repository_events.stream_by_filters(chunk_size=EVENTS_EXPORT_CHUNK_SIZE)
+    exporter = export_csv if export_format == EventExportFormat.CSV else export_ndjson
+    logger.info("Events export in '%s' format was started", export_format.value)
+    return StreamingResponse(
+        content=exporter(chunks=chunks, schema=EventFetchSchema),
+        media_type=EXPORT_MEDIA_TYPES[export_format.value],
+        headers={
+            "Content-Disposition": f'attachment; filename="events.{export_format.value}"'
+        },
+    )
+
+
+@router.get("/stats", response_model=list[EventStatsSchema])
+async def fetch_events_stats(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    user: dict[str, Any] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db, scope="function"),
+) -> list[dict[str, Any]]:
+    """
+    Daily events counts for current user fetching
+
+    Counts are read from the incrementally maintained statistics table,
+    so the cost depends on the number of days, not events
+
+    :param date date_from: First date of the range, inclusive
+    :param date date_to: Last date of the range, inclusive
+    :param dict user: Current user instance
+    :param AsyncSession db: Current database session
+    """
+    repository_events = EventRepository(session=db, partition_value=user["azp"])
+    fetch_stats_result = await repository_events.fetch_stats(
+        date_from=date_from, date_to=date_to
+    )
+    logger.info("Fetching events statistics was successful")
+    return [dict(row) for row in fetch_stats_result]
+
+
+@router.get("/search", response_model=list[EventSearchSchema])
+async def search_events(
+    q: str = Query(default=..., min_length=1, description="Searched event name"),
+    limit: int = Query(default=20, ge=1, le=EVENTS_SEARCH_MAX_LIMIT),
+    user: dict[str, Any] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db, scope="function"),
+) -> list[dict[str, Any]]:
+    """
+    Fuzzy events search by name for current user
+
+    Results are ranked by trigram similarity and backed by the trigram
+    index of the event name
+
+    :param str q: Searched event name
+    :param int limit: Maximum number of results
+    :param dict user: Current user instance
+    :param AsyncSession db: Current database session
+    """
+    repository_events = EventRepository(session=db, partition_value=user["azp"])
+    search_events_result = await repository_events.search_similar(
+        field="name", value=q, columns=EVENT_FETCH_COLUMNS, limit=limit
+    )
+    logger.info("Searching events returned %s results", len(search_events_result))
+    return [dict(row) for row in search_events_result]
@@ -1,13 +1,20 @@
 import os
-from typing import Optional
+from typing import Any, Optional
 
 from dotenv import load_dotenv
 from fastapi import APIRouter, HTTPException, status
 
-from app.brokers.kafka_admin import kafka_admin
+from app.brokers.kafka_admin import KAFKA_TOPIC_PARTITIONS, kafka_admin
 from app.brokers.kafka_producer import kafka_producer
 from app.configs.logging_handler import configure_logging_handler
-from app.schemas.kafka import CreateTopicRequest, SendingKafkaMessage
+from app.schemas.kafka import (
+    CreateTopicRequest,
+    KafkaBatchDeliverySchema,
+    KafkaDeliverySchema,
+    KafkaTopicSchema,
+    SendingKafkaBatch,
+    SendingKafkaMessage,
+)
 
 logger = configure_logging_handler()
 
@@ -43,6 +50,36 @@ async def send_message(request: SendingKafkaMessage) -> dict[str, str]:
     return {"message": f"Message was sent to Kafka topic '{topic}'"}
 
 
+@router.post("/send-batch", response_model=KafkaBatchDeliverySchema)
+async def send_batch(request: SendingKafkaBatch) -> KafkaBatchDeliverySchema:
+    """
+    Sending messages batch to Kafka topics
+
+    The messages are enqueued together and their deliveries are awaited
+    together, so the broker round trips are shared by the batch
+
+    :param SendingKafkaBatch request: Request content
+
+    :return KafkaBatchDeliverySchema: Per-message partitions and offsets or errors
+    """
+    deliveries = await kafka_producer.send_batch(messages=request.messages)
+    results = [
+        KafkaDeliverySchema(topic=batch_message.topic, error=str(delivery))
+        if isinstance(delivery, BaseException)
+        else KafkaDeliverySchema(
+            topic=batch_message.topic,
+            partition=delivery.partition,
+            offset=delivery.offset,
+        )
+        for batch_message, delivery in zip(request.messages, deliveries)
+    ]
+    failed = sum(result.error is not None for result in results)
+    logger.info("Batch was sent to Kafka with %s failed messages", failed)
+    return KafkaBatchDeliverySchema(
+        delivered=len(results) - failed, failed=failed, results=results
+    )
+
+
 @router.post("/create/topic")
 async def create_topic(request: CreateTopicRequest) -> dict[str, str]:
     """
@@ -69,8 +106,23 @@ async def create_topic(request: CreateTopicRequest) -> dict[str, str]:
 
     await kafka_admin.create_topic(
         topic_name=topic_name,
-        num_partitions=num_partitions,
+        num_partitions=num_partitions or KAFKA_TOPIC_PARTITIONS,
         replication_factor=replication_factor,
     )
     logger.info("Topic '%s' was created", topic_name)
     return {"message": f"Topic '{topic_name}' was created"}
+
+
+@router.get("/topics", response_model=list[KafkaTopicSchema])
+async def fetch_topics() -> list[dict[str, Any]]:
+    """
+    Kafka topics with partitions and configs
+
+    Metadata is served from the admin client cache and refetched from
+    the cluster after the metadata TTL
+
+    :return list: Topics metadata sorted by name
+    """
+    topics = await kafka_admin.describe_topics()
+    logger.info("Metadata of %s topics was fetched", len(topics))
+    return topics
@@ -1,4 +1,5 @@
 from datetime import date
+from enum import Enum
 
 from typing import Optional
 from pydantic import BaseModel
@@ -32,3 +33,32 @@ class EventFetchSchema(EventBaseSchema):
 
     class Config:  # pylint: disable=C0115,R0903
         from_attributes = True
+
+
+class EventSearchSchema(EventFetchSchema):
+    """
+    Events search result validating
+
+    """
+
+    similarity: float
+
+
+class EventExportFormat(str, Enum):
+    """
+    Events export file formats
+
+    """
+
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+class EventStatsSchema(BaseModel):
+    """
+    Daily events count validating
+
+    """
+
+    date: date
+    events_count: int
@@ -1,5 +1,9 @@
+from typing import Final, Optional
+
 from pydantic import BaseModel, Field
 
+KAFKA_BATCH_MAX_MESSAGES: Final[int] = 1000
+
 
 class SendingKafkaMessage(BaseModel):
     """
@@ -27,9 +31,110 @@ class CreateTopicRequest(BaseModel):
     """
 
     topic_name: str = Field(..., description="The name of the topic to create")
-    num_partitions: int = Field(
-        default=1, ge=1, description="The topic number of partitions"
+    num_partitions: Optional[int] = Field(
+        default=None, ge=1, description="The topic number of partitions, configured by default"
     )
     replication_factor: int = Field(
         default=1, ge=1, description="The topic replication factor"
     )
+
+
+class BatchKafkaMessage(BaseModel):
+    """
+    Batch message for sending to Kafka topic
+
+    :param str topic: The Kafka topic to which the message will be sent
+    :param str | bytes message: The message for sending to the Kafka topic
+    :param str key: The message key selecting the topic partition
+    :param dict headers: The message headers
+    """
+
+    topic: str = Field(
+        default=..., description="The Kafka topic to which the message will be sent"
+    )
+    message: str | bytes = Field(
+        default=..., description="The message sending to the Kafka topic"
+    )
+    key: Optional[str] = Field(
+        default=None, description="The message key selecting the topic partition"
+    )
+    headers: dict[str, str] = Field(
+        default_factory=dict, description="The message headers"
+    )
+
+
+class SendingKafkaBatch(BaseModel):
+    """
+    Requesting model for sending messages batch to Kafka topics
+
+    :param list[BatchKafkaMessage] messages: The messages for sending
+    """
+
+    messages: list[BatchKafkaMessage] = Field(
+        default=...,
+        min_length=1,
+        max_length=KAFKA_BATCH_MAX_MESSAGES,
+        description="The messages for sending",
+    )
+
+
+class KafkaDeliverySchema(BaseModel):
+    """
+    Responding model of single message delivery
+
+    :param str topic: The Kafka topic of the message
+    :param int partition: The partition the message was written to
+    :param int offset: The message offset in the partition
+    :param str error: The delivery error description
+    """
+
+    topic: str
+    partition: Optional[int] = None
+    offset: Optional[int] = None
+    error: Optional[str] = None
+
+
+class KafkaBatchDeliverySchema(BaseModel):
+    """
+    Responding model of messages batch delivery
+
+    :param int delivered: Number of delivered messages
+    :param int failed: Number of failed messages
+    :param list[KafkaDeliverySchema] results: Per-message results in the request order
+    """
+
+    delivered: int
+    failed: int
+    results: list[KafkaDeliverySchema]
+
+
+class KafkaPartitionSchema(BaseModel):
+    """
+    Responding model of topic partition metadata
+
+    :param int partition: The partition number
+    :param int leader: The leader broker id
+    :param list[int] replicas: The replica broker ids
+    :param list[int] isr: The in-sync replica broker ids
+    """
+
+    partition: int
+    leader: int
+    replicas: list[int]
+    isr: list[int]
+
+
+class KafkaTopicSchema(BaseModel):
+    """
+    Responding model of topic metadata
+
+    :param str name: The topic name
+    :param bool internal: Whether the topic is internal to Kafka
+    :param list[KafkaPartitionSchema] partitions: The topic partitions
+    :param dict configs: The topic configs, sensitive values are hidden
+    """
+
+    name: str
+    internal: bool
+    partitions: list[KafkaPartitionSchema]
+    configs: dict[str, Optional[str]]
@@ -1,13 +1,16 @@
+import asyncio
 import os
-from typing import Any, Awaitable, Callable
+from time import monotonic
+from typing import Any, Awaitable, Callable, Final, Optional
 
 from dotenv import load_dotenv
 from fastapi import Depends, HTTPException, status
 from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordBearer
 from jose.exceptions import JWTError
+from jwcrypto import jwk
 from jwcrypto.jws import InvalidJWSObject, InvalidJWSSignature
-from jwcrypto.jwt import JWTExpired
+from jwcrypto.jwt import JWTExpired, JWTMissingKey
 from keycloak import KeycloakAdmin
 from keycloak.exceptions import (
     KeycloakAuthenticationError,
@@ -39,6 +42,10 @@ KC_REALM_COMMON_USER_PASSWORD = os.getenv("KC_REALM_COMMON_USER_PASSWORD")
 KEYCLOAK_ADMIN = os.getenv("KEYCLOAK_ADMIN")
 KEYCLOAK_ADMIN_PASSWORD = os.getenv("KEYCLOAK_ADMIN_PASSWORD")
 REACT_APP_BACKEND_URL = os.getenv("REACT_APP_BACKEND_URL")
+KC_JWKS_EXPIRE: Final[float] = float(os.getenv("KC_JWKS_EXPIRE", "300"))
+KC_JWKS_MIN_REFRESH_INTERVAL: Final[float] = float(
+    os.getenv("KC_JWKS_MIN_REFRESH_INTERVAL", "10")
+)
 
 
 KEYCLOAK_URL = f"{KC_HOSTNAME_CONTAINER}:{KC_PORT}"
@@ -225,6 +232,88 @@ async def authenticate_user(username: str, password: str) -> TokenResponseSchema
         ) from exception
 
 
+class JWKSCache:
+    """
+    Realm signing keys cache for local tokens verification
+
+    Keys are refetched after the expiry or when a token is signed by
+    an unknown key, e.g. after the realm keys rotation
+
+    """
+
+    def __init__(
+        self,
+        openid: KeycloakOpenID,
+        expire: float = KC_JWKS_EXPIRE,
+        min_refresh_interval: float = KC_JWKS_MIN_REFRESH_INTERVAL,
+    ):
+        self.openid = openid
+        self.expire = expire
+        self.min_refresh_interval = min_refresh_interval
+        self.keys: Optional[jwk.JWKSet] = None
+        self.fetched_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _fetch(self) -> jwk.JWKSet:
+        """
+        Realm signing keys fetching
+
+        :return JWKSet: Realm signing keys
+        """
+        keys = jwk.JWKSet()
+        for cert in (await self.openid.a_certs())["keys"]:
+            keys.add(jwk.JWK(**cert))
+        self.keys, self.fetched_at = keys, monotonic()
+        logger.info("Keycloak realm signing keys were fetched")
+        return keys
+
+    async def get(self) -> jwk.JWKSet:
+        """
+        Realm signing keys obtaining, refetched after the expiry
+
+        :return JWKSet: Realm signing keys
+        """
+        if self.keys is not None and monotonic() - self.fetched_at < self.expire:
+            return self.keys
+        async with self._lock:
+            if self.keys is not None and monotonic() - self.fetched_at < self.expire:
+                return self.keys
+            return await self._fetch()
+
+    async def refresh(self) -> jwk.JWKSet:
+        """
+        Realm signing keys refetching, at most once per minimal interval
+
+        The interval keeps tokens with unknown keys from flooding Keycloak
+
+        :return JWKSet: Realm signing keys
+        """
+        async with self._lock:
+            if (
+                self.keys is not None
+                and monotonic() - self.fetched_at < self.min_refresh_interval
+            ):
+                return self.keys
+            return await self._fetch()
+
+
+jwks_cache = JWKSCache(openid=keycloak_openid)
+
+
+async def decode_token(token: str) -> dict[str, Any]:
+    """
+    Token decoding with the cached realm signing keys
+
+    :param str token: Access token
+    :return dict: Decoded token claims
+    """
+    try:
+        return await keycloak_openid.a_decode_token(token=token, key=await jwks_cache.get())
+    except JWTMissingKey:
+        keys = await jwks_cache.refresh()
+        return await keycloak_openid.a_decode_token(token=token, key=keys)
+
+
 def verify_permission(
     required_roles: list[str],
 ) -> Callable[[str], Awaitable[dict[str, str]]] | Any:
@@ -253,7 +342,7 @@ def verify_permission(
         token: str = Depends(oauth2_scheme),
     ) -> dict[str, str] | Any:
         try:
-            token_info = await keycloak_openid.a_decode_token(token=token)
+            token_info = await decode_token(token=token)
             user_groups = token_info.get("groups", [])
             for role in required_roles:
                 if role not in user_groups:
@@ -359,7 +448,7 @@ async def verify_token(token: str = Depends(oauth2_scheme)) -> dict[Any, Any] |
     :returns dict token: New token verification
     """
     try:
-        return await keycloak_openid.a_decode_token(token=token)
+        return await decode_token(token=token)
     except JWTExpired as error:
         logger.exception("Token period expired")
         raise HTTPException(
@@ -446,7 +535,7 @@ async def fetch_userinfo_via_token(
     :returns dict decoted token: Decoded info
     """
     try:
-        return await keycloak_openid.a_decode_token(token=token)
+        return await decode_token(token=token)
     except KeycloakGetError as error:
         logger.exception("Error - %s", error.error_message)
         raise HTTPException(
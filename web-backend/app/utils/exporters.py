@@ -0,0 +1,67 @@
+import csv
+import io
+from typing import Any, AsyncIterator, Final, Sequence
+
+from pydantic import BaseModel
+
+from app.configs.logging_handler import configure_logging_handler
+
+logger = configure_logging_handler()
+
+EXPORT_MEDIA_TYPES: Final[dict[str, str]] = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+async def export_ndjson(
+    chunks: AsyncIterator[Sequence[Any]], schema: type[BaseModel]
+) -> AsyncIterator[bytes]:
+    """
+    Serializing streamed record chunks to newline-delimited JSON
+
+    Every chunk is rendered into one bytes block, so the response body
+    is never held in memory as a whole
+
+    :param AsyncIterator chunks: Streamed chunks of ORM records
+    :param type[BaseModel] schema: Schema validating every record
+
+    :yield bytes: Serialized NDJSON block for one chunk
+    """
+    exported_rows = 0
+    async for chunk in chunks:
+        yield b"".join(
+            schema.model_validate(row).model_dump_json().encode("utf-8") + b"\n"
+            for row in chunk
+        )
+        exported_rows += len(chunk)
+    logger.info("NDJSON export was finished with %s rows", exported_rows)
+
+
+async def export_csv(
+    chunks: AsyncIterator[Sequence[Any]], schema: type[BaseModel]
+) -> AsyncIterator[bytes]:
+    """
+    Serializing streamed record chunks to CSV with header row
+
+    :param AsyncIterator chunks: Streamed chunks of ORM records
+    :param type[BaseModel] schema: Schema validating every record and
+    defining the column order
+
+    :yield bytes: Serialized CSV block for one chunk
+    """
+    fields = list(schema.model_fields)
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields)
+    writer.writeheader()
+    yield buffer.getvalue().encode("utf-8")
+    exported_rows = 0
+    async for chunk in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(
+            schema.model_validate(row).model_dump(mode="json") for row in chunk
+        )
+        yield buffer.getvalue().encode("utf-8")
+        exported_rows += len(chunk)
+    logger.info("CSV export was finished with %s rows", exported_rows)
@@ -0,0 +1,355 @@
+import ipaddress
+import os
+import secrets
+from bisect import bisect_left
+from typing import Callable, Final, Iterator, Optional
+
+from dotenv import load_dotenv
+from fastapi import HTTPException, Request, status
+
+from app.configs.logging_handler import configure_logging_handler
+
+logger = configure_logging_handler()
+
+load_dotenv()
+
+METRICS_TOKEN: Final[str] = os.getenv("METRICS_TOKEN", "")
+FORWARDING_HEADERS: Final[tuple[str, ...]] = ("x-forwarded-for", "x-real-ip", "forwarded")
+
+LabelValues = tuple[tuple[str, str], ...]
+
+DEFAULT_BUCKETS: Final[tuple[float, ...]] = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+
+
+def _labels(labels: dict[str, str]) -> LabelValues:
+    """
+    Labels normalizing to hashable sorted pairs
+
+    :param dict labels: Metric labels
+    :return LabelValues: Sorted label pairs
+    """
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape(value: str, quotes: bool = True) -> str:
+    """
+    Backslashes, newlines and optionally double quotes escaping
+
+    :param str value: Label value or help text
+    :param bool quotes: Escaping double quotes, only label values need it
+    :return str: Escaped text
+    """
+    escaped = value.replace("\\", "\\\\").replace("\n", "\\n")
+    return escaped.replace('"', '\\"') if quotes else escaped
+
+
+def _format_labels(labels: LabelValues, extra: Optional[tuple[str, str]] = None) -> str:
+    """
+    Labels rendering in Prometheus exposition format
+
+    :param LabelValues labels: Sorted label pairs
+    :param tuple extra: Additional label pair, e.g. histogram bucket bound
+    :return str: Rendered labels block or empty string
+    """
+    pairs = [*labels, extra] if extra else list(labels)
+    if not pairs:
+        return ""
+    rendered = ",".join(f'{name}="{_escape(value)}"' for name, value in pairs)
+    return f"{{{rendered}}}"
+
+
+class Metric:
+    """
+    Base in-process metric
+
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, description: str):
+        """
+        Initialize the metric
+
+        :param str name: Metric name
+        :param str description: Metric help text
+        """
+        self.name = name
+        self.description = description
+
+    def samples(self) -> Iterator[str]:
+        """
+        Metric samples rendering
+
+        :yield str: Sample line in Prometheus exposition format
+        """
+        yield from ()
+
+    def render(self) -> str:
+        """
+        Metric rendering with help and type headers
+
+        :return str: Metric block in Prometheus exposition format
+        """
+        lines = [
+            f"# HELP {self.name} {_escape(self.description, quotes=False)}",
+            f"# TYPE {self.name} {self.kind}",
+            *self.samples(),
+        ]
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """
+    Monotonically increasing counter
+
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, description: str):
+        super().__init__(name=name, description=description)
+        self.values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """
+        Counter increasing
+
+        :param float amount: Increment value
+        :param labels: Metric labels
+        """
+        key = _labels(labels)
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        """
+        Current counter value obtaining
+
+        :param labels: Metric labels
+        :return float: Counter value
+        """
+        return self.values.get(_labels(labels), 0.0)
+
+    def samples(self) -> Iterator[str]:
+        for labels, value in self.values.items():
+            yield f"{self.name}{_format_labels(labels)} {value}"
+
+
+class Gauge(Metric):
+    """
+    Gauge set directly or computed by callback on every scrape
+
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, description: str):
+        super().__init__(name=name, description=description)
+        self.values: dict[LabelValues, float] = {}
+        self.functions: dict[LabelValues, Callable[[], float]] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        """
+        Gauge value setting
+
+        :param float value: New value
+        :param labels: Metric labels
+        """
+        self.values[_labels(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """
+        Gauge value increasing, negative amount decreases
+
+        :param float amount: Increment value
+        :param labels: Metric labels
+        """
+        key = _labels(labels)
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    def set_function(self, function: Callable[[], float], **labels: str) -> None:
+        """
+        Gauge callback registration evaluated on every scrape
+
+        :param Callable function: Callback returning current value
+        :param labels: Metric labels
+        """
+        self.functions[_labels(labels)] = function
+
+    def value(self, **labels: str) -> float:
+        """
+        Current gauge value obtaining
+
+        :param labels: Metric labels
+        :return float: Gauge value
+        """
+        key = _labels(labels)
+        if key in self.functions:
+            return float(self.functions[key]())
+        return self.values.get(key, 0.0)
+
+    def samples(self) -> Iterator[str]:
+        for labels, value in self.values.items():
+            yield f"{self.name}{_format_labels(labels)} {value}"
+        for labels, function in self.functions.items():
+            try:
+                yield f"{self.name}{_format_labels(labels)} {float(function())}"
+            except Exception as exception:  # pylint: disable=W0718
+                logger.warning("Gauge '%s' callback failed - %s", self.name, exception)
+
+
+class Histogram(Metric):
+    """
+    Cumulative histogram with fixed buckets
+
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, description: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name=name, description=description)
+        self.buckets = buckets
+        self.counts: dict[LabelValues, list[int]] = {}
+        self.sums: dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """
+        Observation recording
+
+        :param float value: Observed value
+        :param labels: Metric labels
+        """
+        key = _labels(labels)
+        counts = self.counts.setdefault(key, [0] * (len(self.buckets) + 1))
+        counts[bisect_left(self.buckets, value)] += 1
+        self.sums[key] = self.sums.get(key, 0.0) + value
+
+    def samples(self) -> Iterator[str]:
+        for labels, counts in self.counts.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                upper = "+Inf" if bound == float("inf") else str(bound)
+                yield (
+                    f"{self.name}_bucket{_format_labels(labels, ('le', upper))} "
+                    f"{cumulative}"
+                )
+            yield f"{self.name}_sum{_format_labels(labels)} {self.sums[labels]}"
+            yield f"{self.name}_count{_format_labels(labels)} {cumulative}"
+
+
+class MetricsRegistry:
+    """
+    Application metrics registry rendered for Prometheus scraping
+
+    """
+
+    def __init__(self) -> None:
+        self.metrics: dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Metric:
+        """
+        Metric registration returning already registered metric with the same name
+
+        :param Metric metric: New metric
+        :return Metric: Registered metric
+        """
+        return self.metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, description: str) -> Counter:
+        """
+        Counter creation or obtaining
+
+        :param str name: Metric name
+        :param str description: Metric help text
+        :return Counter: Registered counter
+        """
+        metric = self._register(Counter(name=name, description=description))
+        assert isinstance(metric, Counter)
+        return metric
+
+    def gauge(self, name: str, description: str) -> Gauge:
+        """
+        Gauge creation or obtaining
+
+        :param str name: Metric name
+        :param str description: Metric help text
+        :return Gauge: Registered gauge
+        """
+        metric = self._register(Gauge(name=name, description=description))
+        assert isinstance(metric, Gauge)
+        return metric
+
+    def histogram(
+        self, name: str, description: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """
+        Histogram creation or obtaining
+
+        :param str name: Metric name
+        :param str description: Metric help text
+        :param tuple buckets: Histogram bucket upper bounds
+        :return Histogram: Registered histogram
+        """
+        metric = self._register(
+            Histogram(name=name, description=description, buckets=buckets)
+        )
+        assert isinstance(metric, Histogram)
+        return metric
+
+    def render(self) -> str:
+        """
+        All metrics rendering in Prometheus exposition format
+
+        :return str: Exposition text
+        """
+        return "\n".join(metric.render() for metric in self.metrics.values()) + "\n"
+
+
+metrics_registry = MetricsRegistry()
+
+
+def verify_metrics_access(request: Request) -> None:
+    """
+    Metrics scraping restriction to the internal network
+
+    Requests forwarded by the reverse proxy or coming from public
+    addresses are rejected, and with METRICS_TOKEN set the scraper
+    has to send it as a bearer token
+
+    :param Request request: Current request
+    :raises HTTPException: 403 Forbidden for external requests,
+    401 Unauthorized for a missing or wrong token
+    """
+    host = request.client.host if request.client else ""
+    try:
+        address = ipaddress.ip_address(host)
+        internal = address.is_private or address.is_loopback
+    except ValueError:
+        internal = False
+    if not internal or any(header in request.headers for header in FORWARDING_HEADERS):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Metrics are available from the internal network only",
+        )
+    if METRICS_TOKEN and not secrets.compare_digest(
+        request.headers.get("authorization", ""), f"Bearer {METRICS_TOKEN}"
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
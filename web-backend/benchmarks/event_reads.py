@@ -0,0 +1,119 @@
+"""
+Events read path benchmark
+
+Compares per-row cost of the ORM read path, loading full ``Event``
+instances and validating them through ``from_attributes``, with the
+column-projected path selecting plain rows mapped straight into the
+response model. An in-memory SQLite database keeps the benchmark
+self-contained, the ORM hydration and validation costs do not depend
+on the database driver
+
+Run from the web-backend directory:
+
+    python -m benchmarks.event_reads --rows 10000 --repeat 5
+"""
+
+import argparse
+from datetime import date, timedelta
+from time import perf_counter
+from typing import Any, Callable
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app.database.models import Base, Event
+from app.schemas.events import EventFetchSchema
+
+EVENTS_ADAPTER = TypeAdapter(list[EventFetchSchema])
+EVENT_FETCH_COLUMNS = tuple(EventFetchSchema.model_fields)
+
+
+def orm_read(session: Session) -> bytes:
+    """
+    ORM instances loading with attributes validation
+
+    :param Session session: Database session
+    :return bytes: Serialized response body
+    """
+    events = session.execute(select(Event)).scalars().all()
+    body = EVENTS_ADAPTER.dump_json(
+        [EventFetchSchema.model_validate(event) for event in events]
+    )
+    session.expunge_all()
+    return body
+
+
+def projected_read(session: Session) -> bytes:
+    """
+    Projected columns loading as plain rows mappings
+
+    :param Session session: Database session
+    :return bytes: Serialized response body
+    """
+    query = select(*(getattr(Event, column) for column in EVENT_FETCH_COLUMNS))
+    rows = session.execute(query).mappings().all()
+    return EVENTS_ADAPTER.dump_json(
+        EVENTS_ADAPTER.validate_python([dict(row) for row in rows])
+    )
+
+
+def measure(read: Callable[[Session], bytes], session: Session, repeat: int) -> float:
+    """
+    Best of several runs measuring
+
+    :param Callable read: Read path for measuring
+    :param Session session: Database session
+    :param int repeat: Runs number
+    :return float: Best run duration in seconds
+    """
+    timings = []
+    for _ in range(repeat):
+        started = perf_counter()
+        read(session)
+        timings.append(perf_counter() - started)
+    return min(timings)
+
+
+def main(arguments: Any) -> None:
+    """
+    Benchmark running with results printing
+
+    :param Any arguments: Parsed command line arguments
+    """
+    engine = create_engine("sqlite://")
+    # SQLite has no autoincrement for composite primary keys, ids are explicit
+    Event.__table__.c.id.autoincrement = False
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        start_date = date(2025, 1, 1)
+        session.add_all(
+            Event(
+                id=index + 1,
+                name=f"Event {index}",
+                date=start_date + timedelta(days=index % 365),
+                client_info="admin-cli",
+            )
+            for index in range(arguments.rows)
+        )
+        session.commit()
+        session.expunge_all()
+        assert orm_read(session) == projected_read(session)
+
+        results = {
+            "orm": measure(orm_read, session, arguments.repeat),
+            "projected": measure(projected_read, session, arguments.repeat),
+        }
+    for name, seconds in results.items():
+        print(
+            f"{name:>10}: {seconds * 1000:8.2f} ms total, "
+            f"{seconds / arguments.rows * 1_000_000:6.2f} us per row"
+        )
+    print(f"   speedup: {results['orm'] / results['projected']:.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    main(parser.parse_args())
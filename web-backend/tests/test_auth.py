@@ -4,6 +4,8 @@ import pytest
 from fastapi import status
 from httpx import AsyncClient, Response
 
+from app.services.keycloak import JWKSCache
+
 from .conftest import ACCESS_TOKEN, PASSWORD, USER, MockKeycloakOpenID
 from .data_generating_testing import generate_test_credentials
 
@@ -73,3 +75,20 @@ async def test_unsucess_keycloak_auth(
         response = await async_client.post("/api/v1/auth/token")
         # Assert the status code
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.anyio
+async def test_jwks_cache_refetches_keys_rarely():
+    """
+    Testing that realm signing keys are fetched once and refetched
+    at most once per minimal interval for unknown keys.
+    """
+    openid = AsyncMock()
+    openid.a_certs.return_value = {"keys": []}
+    jwks_cache = JWKSCache(openid=openid, expire=300, min_refresh_interval=10)
+
+    keys = await jwks_cache.get()
+    assert await jwks_cache.get() is keys
+    assert await jwks_cache.refresh() is keys  # Fetched too recently
+
+    openid.a_certs.assert_awaited_once()
@@ -0,0 +1,423 @@
+# test_caches.py
+import asyncio
+import json
+from typing import Any, AsyncIterator
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest  # pylint: disable=E0401
+from fastapi import FastAPI
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from httpx import ASGITransport, AsyncClient
+
+from app.caches.access import (
+    CACHE_ACCESS_WINDOW,
+    CACHE_ACCESS_WINDOWS,
+    fetch_top_principals,
+    record_access,
+)
+from app.caches.backends import StaleWhileRevalidateBackend, TieredBackend
+from app.caches.coders import CompactCoder
+from app.caches.key_builders import request_key_builder
+from app.caches.keydb import KEYDB_MAX_CONNECTIONS, KeyDBRegistry
+from app.caches.tags import cache_namespace, tag_version_key
+from app.caches.warmup import warm_up_cache, warm_up_users
+from app.database.db import get_read_db
+from app.middlewares.etag_middleware import ETagMiddleware
+from app.routers import auth, events
+from app.routers.auth import get_current_user
+from app.services.keycloak import KC_REALM_COMMON_CLIENT
+
+CLAIMS: dict[str, Any] = {"azp": "web", "sub": "user"}
+
+
+@pytest.fixture
+async def events_client() -> AsyncIterator[AsyncClient]:
+    """
+    Events router client with an in-memory cache and stubbed dependencies.
+
+    Every request receives a new session object and a new claims dict, as
+    in production, so only a key builder ignoring them can produce hits.
+    """
+    application = FastAPI()
+    application.include_router(router=events.router, prefix="/api/v1/events")
+    application.add_middleware(middleware_class=ETagMiddleware)
+
+    async def override_read_db() -> AsyncIterator[MagicMock]:
+        yield MagicMock()
+
+    application.dependency_overrides[get_read_db] = override_read_db
+    application.dependency_overrides[get_current_user] = lambda: dict(CLAIMS)
+    application.dependency_overrides[events.record_events_access] = lambda: None
+    FastAPICache.init(
+        backend=InMemoryBackend(), prefix="test-cache", key_builder=request_key_builder
+    )
+    async with AsyncClient(
+        transport=ASGITransport(app=application), base_url="http://test"
+    ) as client:
+        yield client
+    await FastAPICache.clear()
+    FastAPICache.reset()
+
+
+@pytest.mark.anyio
+async def test_repeated_requests_hit_cache(events_client):
+    """
+    Testing that repeated event fetches are served from the cache.
+    """
+    rows = [{"id": 1, "name": "Launch", "date": "2025-03-01", "client_info": "web"}]
+    with patch(
+        "app.routers.events.EventRepository.fetch_columns_by_filters",
+        new_callable=AsyncMock,
+        return_value=rows,
+    ) as mock_fetch:
+        first = await events_client.get("/api/v1/events")
+        second = await events_client.get("/api/v1/events")
+
+    assert first.json() == second.json() == rows
+    assert first.headers["X-FastAPI-Cache"] == "MISS"
+    assert second.headers["X-FastAPI-Cache"] == "HIT"
+    mock_fetch.assert_awaited_once()
+
+
+@pytest.mark.anyio
+async def test_tag_invalidation_misses_cache(events_client):
+    """
+    Testing that only the written client's cached events are invalidated.
+    """
+    with patch(
+        "app.routers.events.EventRepository.fetch_columns_by_filters",
+        new_callable=AsyncMock,
+        return_value=[],
+    ) as mock_fetch:
+        await events_client.get("/api/v1/events")
+        await events.invalidate_events_cache(client_info="mobile")
+        cached = await events_client.get("/api/v1/events")
+        await events.invalidate_events_cache(client_info="web")
+        invalidated = await events_client.get("/api/v1/events")
+
+    assert cached.headers["X-FastAPI-Cache"] == "HIT"
+    assert invalidated.headers["X-FastAPI-Cache"] == "MISS"
+    assert mock_fetch.await_count == 2
+
+
+@pytest.mark.anyio
+async def test_expired_tag_does_not_revive_entries(events_client):
+    """
+    Testing that a tag expiring after a bump gets a new version instead of
+    the one the entries cached before the bump were keyed with.
+    """
+    tag_key = tag_version_key(cache_namespace(events.EVENTS_CACHE_NAMESPACE), "web")
+    rows = [{"id": 1, "name": "Launch", "date": "2025-03-01", "client_info": "web"}]
+    with patch(
+        "app.routers.events.EventRepository.fetch_columns_by_filters",
+        new_callable=AsyncMock,
+        side_effect=[[], [], rows],
+    ):
+        await events_client.get("/api/v1/events")
+        await events.invalidate_events_cache(client_info="web")
+        await events_client.get("/api/v1/events")
+        await FastAPICache.get_backend().clear(key=tag_key)  # Tag version expired
+        expired = await events_client.get("/api/v1/events")
+        cached = await events_client.get("/api/v1/events")
+
+    assert expired.headers["X-FastAPI-Cache"] == "MISS"
+    assert expired.json() == rows
+    assert cached.headers["X-FastAPI-Cache"] == "HIT"
+
+
+@pytest.mark.anyio
+async def test_conditional_requests_skip_cache_and_database(events_client):
+    """
+    Testing strong entity tags from the resource version and 304 responses.
+    """
+    with patch(
+        "app.routers.events.EventRepository.fetch_columns_by_filters",
+        new_callable=AsyncMock,
+        return_value=[],
+    ) as mock_fetch:
+        first = await events_client.get("/api/v1/events")
+        etag = first.headers["ETag"]
+        not_modified = await events_client.get(
+            "/api/v1/events", headers={"If-None-Match": etag}
+        )
+        await events.invalidate_events_cache(client_info="web")
+        modified = await events_client.get(
+            "/api/v1/events", headers={"If-None-Match": etag}
+        )
+
+    assert not etag.startswith("W/")
+    assert first.headers["Cache-Control"] == "no-cache"
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == etag
+    assert not_modified.content == b""
+    assert modified.status_code == 200
+    assert modified.headers["ETag"] != etag
+    assert mock_fetch.await_count == 2
+
+
+@pytest.mark.anyio
+async def test_users_conditional_requests_expire_with_cache():
+    """
+    Testing users 304 responses, where the users entity tag changes after
+    backend users changes and after the cache expiration window.
+    """
+    application = FastAPI()
+    application.include_router(router=auth.router, prefix="/api/v1")
+    application.add_middleware(middleware_class=ETagMiddleware)
+    application.dependency_overrides[auth.admin_permission] = lambda: {}
+    FastAPICache.init(
+        backend=InMemoryBackend(), prefix="test-cache", key_builder=request_key_builder
+    )
+    window = auth.USERS_CACHE_EXPIRE
+    try:
+        with patch(
+            "app.routers.auth.fetch_users", new_callable=AsyncMock, return_value={"users": []}
+        ) as mock_fetch:
+            async with AsyncClient(
+                transport=ASGITransport(app=application), base_url="http://test"
+            ) as client:
+                with patch("app.caches.etags.time", return_value=window * 100.0):
+                    first = await client.get("/api/v1/users")
+                    etag = first.headers["ETag"]
+                    not_modified = await client.get(
+                        "/api/v1/users", headers={"If-None-Match": etag}
+                    )
+                    await auth.invalidate_users_cache()
+                    changed = await client.get(
+                        "/api/v1/users", headers={"If-None-Match": etag}
+                    )
+                with patch("app.caches.etags.time", return_value=window * 101.0):
+                    expired = await client.get(
+                        "/api/v1/users", headers={"If-None-Match": changed.headers["ETag"]}
+                    )
+    finally:
+        await FastAPICache.clear()
+        FastAPICache.reset()
+
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == etag
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert expired.status_code == 200  # Keycloak changes are seen after the window
+    assert expired.headers["ETag"] != changed.headers["ETag"]
+    assert mock_fetch.await_count == 3
+
+
+@pytest.mark.anyio
+async def test_key_builder_normalizes_query_and_principal(events_client):  # pylint: disable=W0613
+    """
+    Testing cache keys independence from query order and per-request objects.
+    """
+
+    def route() -> None:
+        """Cached route stub."""
+
+    async def key(query: str, **kwargs: Any) -> str:
+        request = MagicMock()
+        request.url.path = "/api/v1/events/stats"
+        request.query_params.multi_items.return_value = [
+            tuple(item.split("=")) for item in query.split("&")
+        ]
+        return await request_key_builder(
+            route, "prefix:", request=request, args=(), kwargs=kwargs
+        )
+
+    first = await key("date_to=2025-03-02&date_from=2025-03-01", user=CLAIMS, db=object())
+    second = await key("date_from=2025-03-01&date_to=2025-03-02", user=dict(CLAIMS), db=object())
+    other = await key("date_from=2025-03-01&date_to=2025-03-02", user={"azp": "mobile"})
+
+    assert first == second
+    assert first != other
+
+
+@pytest.mark.anyio
+async def test_tiered_backend_serves_hot_keys_locally():
+    """
+    Testing the in-process tier hits, eviction and pub/sub invalidation.
+    """
+    remote = MagicMock()
+    remote.get_with_ttl = AsyncMock(return_value=(60, b"value"))
+    remote.set = AsyncMock()
+    remote.redis.publish = AsyncMock()
+    backend = TieredBackend(remote=remote, max_entries=2, local_expire=5)
+
+    assert await backend.get_with_ttl("first") == (60, b"value")
+    assert (await backend.get_with_ttl("first"))[1] == b"value"
+    remote.get_with_ttl.assert_awaited_once_with("first")
+
+    await backend.set("second", b"second", expire=60)
+    await backend.set("third", b"third", expire=60)
+    assert list(backend.entries) == ["second", "third"]  # Least recent evicted
+    assert remote.redis.publish.await_count == 2
+
+    own_message = remote.redis.publish.await_args.args[1]
+    backend.handle_invalidation(own_message)
+    assert "third" in backend.entries
+
+    backend.handle_invalidation('{"sender": "other", "namespace": null, "key": "third"}')
+    assert list(backend.entries) == ["second"]
+
+
+@pytest.mark.anyio
+async def test_stale_entries_recomputed_by_one_caller():
+    """
+    Testing that only the lock winner recomputes an expired entry.
+
+    The other callers get the stale value, and storing the fresh value
+    releases the lock.
+    """
+    store: dict[str, bytes] = {}
+
+    async def redis_set(key: str, value: bytes, ex: Any = None, nx: bool = False) -> bool:
+        if nx and key in store:
+            return False
+        store[key] = value
+        return True
+
+    redis = MagicMock()
+    redis.get = AsyncMock(side_effect=store.get)
+    redis.set = AsyncMock(side_effect=redis_set)
+    redis.delete = AsyncMock(side_effect=lambda key: store.pop(key, None))
+    backend = StaleWhileRevalidateBackend(redis, stale_expire=60)
+
+    await backend.set("key", b"old", expire=60)
+    assert await backend.get_with_ttl("key") == (60, b"old")
+
+    with patch("app.caches.backends.time", return_value=10**10):
+        assert await backend.get_with_ttl("key") == (0, None)  # Lock winner
+        assert await backend.get_with_ttl("key") == (0, b"old")  # Stale served
+        assert await backend.get("key") == b"old"
+
+    await backend.set("key", b"new", expire=60)
+    assert "key:lock" not in store
+    assert (await backend.get_with_ttl("key"))[1] == b"new"
+
+    assert await backend.set_if_absent("tag", b"first", expire=60) == b"first"
+    assert await backend.set_if_absent("tag", b"second", expire=60) == b"first"
+
+
+def test_compact_coder_compresses_large_values():
+    """
+    Testing compact coder round trips, compression and legacy values decoding.
+    """
+    small = {"id": 1, "name": "Launch"}
+    large = [{"id": number, "name": "Launch", "date": "2025-03-01"} for number in range(100)]
+
+    encoded_small = CompactCoder.encode(small)
+    encoded_large = CompactCoder.encode(large)
+
+    assert encoded_small[:1] == b"\x00"
+    assert encoded_large[:1] == b"\x01"
+    assert len(encoded_large) * 5 < len(json.dumps(large))
+    assert CompactCoder.decode(encoded_small) == small
+    assert CompactCoder.decode(encoded_large) == large
+    assert CompactCoder.decode(json.dumps(small).encode()) == small
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])  # Redis asyncio client only
+async def test_keydb_registry_shares_one_pool(anyio_backend):  # pylint: disable=W0613
+    """
+    Testing that the registry hands out one tuned client and closes it.
+    """
+    registry = KeyDBRegistry()
+
+    client = registry.client()
+
+    assert registry.client() is client
+    assert client.connection_pool.max_connections == KEYDB_MAX_CONNECTIONS
+    await registry.close()
+    assert registry.client() is not client
+    await registry.close()
+
+
+@pytest.mark.anyio
+async def test_access_histogram_windows_expire():
+    """
+    Testing that accesses are counted in the current expiring window and
+    top principals are summed over the recent windows only.
+    """
+    pipeline = MagicMock()
+    pipeline.execute = AsyncMock()
+    client = MagicMock()
+    client.pipeline.return_value.__aenter__.return_value = pipeline
+    client.zunion = AsyncMock(return_value=[b"rare", b"mobile", b"web"])
+    now = CACHE_ACCESS_WINDOW * 1000.5
+
+    with (
+        patch("app.caches.access.keydb_registry.client", return_value=client),
+        patch("app.caches.access.time", return_value=now),
+    ):
+        await record_access(namespace="events", principal="web")
+        top = await fetch_top_principals(namespace="events", count=2)
+
+    key = "fastapi-cache:access:events:1000"
+    pipeline.zincrby.assert_called_once_with(key, 1, "web")
+    pipeline.expire.assert_called_once_with(key, CACHE_ACCESS_WINDOW * (CACHE_ACCESS_WINDOWS + 1))
+    keys = client.zunion.await_args.args[0]
+    assert len(keys) == CACHE_ACCESS_WINDOWS and keys[-1] == key
+    assert keys[0] == f"fastapi-cache:access:events:{1000 - CACHE_ACCESS_WINDOWS + 1}"
+    assert top == ["web", "mobile"]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])  # Budget uses asyncio timeout
+async def test_warm_up_within_budget(anyio_backend):  # pylint: disable=W0613
+    """
+    Testing that failed warm-up steps are skipped and the budget is kept.
+    """
+    finished = []
+
+    async def failing_step(_: FastAPI) -> None:
+        raise ConnectionError("Keycloak is unavailable")
+
+    async def fast_step(_: FastAPI) -> None:
+        finished.append("fast")
+
+    async def slow_step(_: FastAPI) -> None:
+        await asyncio.sleep(10)
+        finished.append("slow")
+
+    with (
+        patch("app.caches.warmup.WARMUP_STEPS", (failing_step, fast_step, slow_step)),
+        patch("app.caches.warmup.CACHE_WARMUP_BUDGET", 0.1),
+    ):
+        await warm_up_cache(FastAPI())
+
+    assert finished == ["fast"]
+
+
+@pytest.mark.anyio
+async def test_warm_up_users_key_matches_live_request():
+    """
+    Testing that the warmed users list is served to the next live request.
+    """
+    application = FastAPI()
+    application.include_router(router=auth.router, prefix="/api/v1")
+    application.add_middleware(middleware_class=ETagMiddleware)
+    application.dependency_overrides[auth.admin_permission] = lambda: {
+        "azp": str(KC_REALM_COMMON_CLIENT)
+    }
+    FastAPICache.init(
+        backend=InMemoryBackend(), prefix="test-cache", key_builder=request_key_builder
+    )
+    users = {"users": [{"username": "admin"}]}
+    try:
+        with (
+            patch("app.caches.etags.time", return_value=auth.USERS_CACHE_EXPIRE * 100.0),
+            patch("app.caches.warmup.fetch_users", new_callable=AsyncMock, return_value=users),
+            patch("app.routers.auth.fetch_users", new_callable=AsyncMock) as mock_fetch,
+        ):
+            await warm_up_users(application)
+            async with AsyncClient(
+                transport=ASGITransport(app=application), base_url="http://test"
+            ) as client:
+                response = await client.get("/api/v1/users")
+    finally:
+        await FastAPICache.clear()
+        FastAPICache.reset()
+
+    assert response.headers["X-FastAPI-Cache"] == "HIT"
+    assert response.json() == users
+    mock_fetch.assert_not_awaited()
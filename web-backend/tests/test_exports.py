@@ -0,0 +1,65 @@
+# test_exports.py
+import json
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+from app.schemas.events import EventFetchSchema
+from app.utils.exporters import export_csv, export_ndjson
+
+EVENTS = [
+    SimpleNamespace(id=1, name="First", date=date(2025, 1, 1), client_info="admin-cli"),
+    SimpleNamespace(id=2, name="Second", date=date(2025, 1, 2), client_info="admin-cli"),
+    SimpleNamespace(id=3, name="Third", date=date(2025, 1, 3), client_info="admin-cli"),
+]
+
+
+async def stream_chunks(chunk_size: int):
+    """
+    Simulates server-side cursor chunks
+
+    :param int chunk_size: Number of records per chunk
+    """
+    for start in range(0, len(EVENTS), chunk_size):
+        yield EVENTS[start : start + chunk_size]
+
+
+@pytest.mark.anyio
+async def test_export_ndjson():
+    """
+    Testing NDJSON export renders one JSON document per record
+    regardless of the chunk boundaries
+    """
+    blocks = [
+        block
+        async for block in export_ndjson(
+            chunks=stream_chunks(chunk_size=2), schema=EventFetchSchema
+        )
+    ]
+
+    assert len(blocks) == 2
+    lines = b"".join(blocks).decode("utf-8").splitlines()
+    assert [json.loads(line)["name"] for line in lines] == ["First", "Second", "Third"]
+    assert json.loads(lines[0])["date"] == "2025-01-01"
+
+
+@pytest.mark.anyio
+async def test_export_csv():
+    """
+    Testing CSV export writes the header once followed by every record
+    """
+    blocks = [
+        block
+        async for block in export_csv(
+            chunks=stream_chunks(chunk_size=1), schema=EventFetchSchema
+        )
+    ]
+
+    lines = b"".join(blocks).decode("utf-8").splitlines()
+    assert lines[0] == "name,date,client_info,id"
+    assert lines[1:] == [
+        "First,2025-01-01,admin-cli,1",
+        "Second,2025-01-02,admin-cli,2",
+        "Third,2025-01-03,admin-cli,3",
+    ]
@@ -0,0 +1,513 @@
+# test_kafka.py
+import asyncio
+import json
+from datetime import date, datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest  # pylint: disable=E0401
+from aiokafka import TopicPartition
+from aiokafka.errors import KafkaTimeoutError
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.brokers.kafka_admin import KafkaAdmin
+from app.brokers.kafka_consumer import KafkaConsumer
+from app.brokers.kafka_producer import KafkaProducer, kafka_producer, pending_deliveries
+from app.brokers.message_codec import SchemaRegistry
+from app.brokers.outbox_relay import OutboxRelay
+from app.brokers.spill_log import SpillLog
+from app.routers import kafka
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])  # Delivery futures are asyncio
+async def test_fire_and_forget_tracks_delivery(anyio_backend):  # pylint: disable=W0613
+    """
+    Testing that fire-and-forget sending returns before delivery and
+    reports failed deliveries to the registered callbacks.
+    """
+    delivery: asyncio.Future[MagicMock] = asyncio.get_running_loop().create_future()
+    producer = KafkaProducer(
+        bootstrap_servers="kafka:9092", topic="events", fire_and_forget=True
+    )
+    producer.producer = MagicMock()
+    producer.producer.send = AsyncMock(return_value=delivery)
+    failures = []
+    producer.add_failure_callback(
+        lambda topic, message, error: failures.append((topic, message, error))
+    )
+
+    assert await producer.send_message(topic="events", message="created") is None
+    assert producer.pending == {delivery}
+    assert pending_deliveries.value() == len(kafka_producer.pending)  # Application producer only
+
+    error = RuntimeError("Broker is unavailable")
+    delivery.set_exception(error)
+    await producer.flush()
+
+    assert not producer.pending
+    assert failures == [("events", b"created", error)]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])  # Delivery futures are asyncio
+async def test_waiting_send_returns_metadata(anyio_backend):  # pylint: disable=W0613
+    """
+    Testing that waiting sending returns the delivered message metadata.
+    """
+    delivery: asyncio.Future[MagicMock] = asyncio.get_running_loop().create_future()
+    metadata = MagicMock(partition=0, offset=42)
+    delivery.set_result(metadata)
+    producer = KafkaProducer(bootstrap_servers="kafka:9092", topic="events")
+    producer.producer = MagicMock()
+    producer.producer.send = AsyncMock(return_value=delivery)
+
+    assert await producer.send_message(topic="events", message=b"created") is metadata
+    assert producer.acks == "all"
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])  # Delivery futures are asyncio
+async def test_send_batch_reports_partitions_and_offsets(anyio_backend):  # pylint: disable=W0613
+    """
+    Testing batch sending with keys and headers, reporting per-message
+    partitions and offsets or errors in the request order.
+    """
+    delivery: asyncio.Future[MagicMock] = asyncio.get_running_loop().create_future()
+    delivery.set_result(MagicMock(partition=3, offset=7))
+    with patch.object(kafka_producer, "producer", MagicMock()) as mock_producer:
+        mock_producer.send = AsyncMock(
+            side_effect=[delivery, KafkaTimeoutError("Producer buffer is full")]
+        )
+        application = FastAPI()
+        application.include_router(router=kafka.router, prefix="/api/v1/kafka")
+        async with AsyncClient(
+            transport=ASGITransport(app=application), base_url="http://test"
+        ) as client:
+            response = await client.post(
+                "/api/v1/kafka/send-batch",
+                json={
+                    "messages": [
+                        {
+                            "topic": "events",
+                            "message": "created",
+                            "key": "web",
+                            "headers": {"source": "api"},
+                        },
+                        {"topic": "audit", "message": "created"},
+                    ]
+                },
+            )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["delivered"], body["failed"]) == (1, 1)
+    assert body["results"][0] == {
+        "topic": "events",
+        "partition": 3,
+        "offset": 7,
+        "error": None,
+    }
+    assert body["results"][1]["topic"] == "audit"
+    assert "buffer is full" in body["results"][1]["error"]
+    assert mock_producer.send.await_args_list[0].kwargs["key"] == b"web"
+    assert mock_producer.send.await_args_list[0].kwargs["headers"] == [("source", b"api")]
+
+
+@pytest.mark.anyio
+async def test_outbox_relay_marks_delivered_messages():
+    """
+    Testing outbox relaying under the relay advisory lock outside of
+    transactions, where messages of one key are sent in order, only
+    delivered ones are marked as published, and a key stops at its first
+    failed message.
+    """
+    mock_session = AsyncMock(spec=AsyncSession)
+    mock_session.execute.return_value.scalar = MagicMock(return_value=True)
+    mock_session.execute.return_value.scalars = MagicMock()
+    mock_session.execute.return_value.scalars.return_value.all.return_value = [
+        MagicMock(id=1, topic="events", payload="Launch was created", key="web"),
+        MagicMock(id=2, topic="events", payload="Review was created", key="web"),
+        MagicMock(id=3, topic="events", payload="Review was updated", key="web"),
+        MagicMock(id=4, topic="events", payload="Demo was created", key="mobile"),
+        MagicMock(id=5, topic="events", payload="Sync was created", key=None),
+        MagicMock(id=6, topic="events", payload="Demo was updated", key="mobile"),
+    ]
+    session_factory = MagicMock()
+    session_factory.return_value.__aenter__.return_value = mock_session
+    mock_producer = MagicMock()
+    mock_producer.send_batch = AsyncMock(
+        side_effect=[
+            [MagicMock(), MagicMock(), MagicMock()],  # Sync, Launch and Demo created
+            [KafkaTimeoutError(), MagicMock()],  # Review created failed, Demo updated
+        ]
+    )
+    relay = OutboxRelay(producer=mock_producer, session_factory=session_factory)
+
+    published = await relay.relay_batch()
+
+    assert published == 4
+    rounds = [
+        [message.message for message in call.args[0]]
+        for call in mock_producer.send_batch.await_args_list
+    ]
+    assert rounds == [
+        ["Sync was created", "Launch was created", "Demo was created"],
+        ["Review was created", "Demo was updated"],
+    ]
+    mock_session.connection.assert_awaited_once_with(
+        execution_options={"isolation_level": "AUTOCOMMIT"}
+    )
+    lock_statement, fetch_statement, mark_statement, unlock_statement = (
+        call.args[0] for call in mock_session.execute.await_args_list
+    )
+    assert "pg_try_advisory_lock" in str(lock_statement)
+    assert "FOR UPDATE" not in str(fetch_statement.compile(dialect=postgresql.dialect()))
+    assert mark_statement.compile().params["param_1"] == [5, 1, 4, 6]
+    assert "pg_advisory_unlock" in str(unlock_statement)
+    mock_session.commit.assert_not_awaited()
+
+    mock_session.execute.return_value.scalar.return_value = False  # Another relay publishes
+    assert await relay.relay_batch() == 0
+    assert mock_producer.send_batch.await_count == 2
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])  # Handlers run in asyncio tasks
+async def test_consumer_keeps_key_order_and_commits_handled(anyio_backend):  # pylint: disable=W0613
+    """
+    Testing batch consuming, where records of one key are handled in order,
+    the offset of the first failed record is committed and the partition
+    is rewound to it.
+    """
+    partition = TopicPartition("events", 0)
+    records = [
+        MagicMock(topic="events", partition=0, offset=offset, key=key)
+        for offset, key in enumerate([b"a", b"b", b"a", b"b", b"a"])
+    ]
+    consumer = KafkaConsumer(bootstrap_servers="kafka:9092", poll_timeout_ms=0)
+    consumer.consumer = MagicMock()
+    consumer.consumer.getmany = AsyncMock(return_value={partition: records})
+    consumer.consumer.commit = AsyncMock()
+    handled: list[tuple[bytes, int]] = []
+
+    @consumer.handler("events")
+    async def handle(record):
+        if record.offset == 3:
+            raise ValueError("Broken record")
+        handled.append((record.key, record.offset))
+
+    polled = await consumer.consume_batch()
+
+    assert polled == 5
+    assert [offset for key, offset in handled if key == b"a"] == [0, 2, 4]
+    assert (b"b", 1) in handled
+    consumer.consumer.commit.assert_awaited_once_with({partition: 3})
+    consumer.consumer.seek.assert_called_once_with(partition, 3)
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])  # Handlers run in asyncio tasks
+async def test_consumer_dead_letters_poison_record(anyio_backend):  # pylint: disable=W0613
+    """
+    Testing that a record failing max attempts times is sent to the
+    dead-letter topic and the partition offset is committed past it.
+    """
+    partition = TopicPartition("events", 0)
+    records = [
+        MagicMock(topic="events", partition=0, offset=offset, key=b"a", value=b"v", headers=())
+        for offset in range(3)
+    ]
+    consumer = KafkaConsumer(
+        bootstrap_servers="kafka:9092",
+        poll_timeout_ms=0,
+        max_attempts=2,
+        dead_letter_topic="events-dead-letter",
+    )
+    consumer.consumer = MagicMock()
+    consumer.consumer.getmany = AsyncMock(return_value={partition: records})
+    consumer.consumer.commit = AsyncMock()
+    consumer.dead_letter_producer = MagicMock()
+    consumer.dead_letter_producer.send_and_wait = AsyncMock()
+    handled: list[int] = []
+
+    @consumer.handler("events")
+    async def handle(record):
+        if record.offset == 0:
+            raise ValueError("Poison record")
+        handled.append(record.offset)
+
+    await consumer.consume_batch()
+    consumer.consumer.commit.assert_not_awaited()
+    consumer.consumer.seek.assert_called_once_with(partition, 0)
+
+    await consumer.consume_batch()
+    consumer.consumer.commit.assert_awaited_once_with({partition: 3})
+    assert handled == [1, 2]
+    assert consumer.dead_letter_producer.send_and_wait.await_args.args == ("events-dead-letter",)
+    assert not consumer.attempts
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])  # Cancellation is asyncio
+async def test_consumer_run_survives_unexpected_errors(anyio_backend):  # pylint: disable=W0613
+    """
+    Testing that the consuming loop logs non-Kafka failures and continues
+    until it is cancelled.
+    """
+    consumer = KafkaConsumer(bootstrap_servers="kafka:9092", poll_timeout_ms=0)
+    with (
+        patch.object(
+            consumer,
+            "consume_batch",
+            new_callable=AsyncMock,
+            side_effect=[RuntimeError("Handler bug"), None, asyncio.CancelledError()],
+        ) as mock_consume,
+        patch("app.brokers.kafka_consumer.logger") as mock_logger,
+    ):
+        with pytest.raises(asyncio.CancelledError):
+            await consumer.run()
+
+    assert mock_consume.await_count == 3
+    mock_logger.exception.assert_called_once()
+
+
+def test_spill_log_rolls_drops_and_recovers(tmp_path):
+    """
+    Testing spill log segments rolling, oldest-first dropping above the size
+    limit, committing of read messages and torn tail recovery on reopening.
+    """
+    spill_log = SpillLog(directory=str(tmp_path), segment_bytes=64, max_bytes=160)
+    keys = [None, b"key-1", None, b"key-3", b"", b"key-5", None, b"key-7"]
+    for index, key in enumerate(keys):
+        spill_log.append(topic="events", value=f"message-{index}".encode(), key=key)
+    assert spill_log.depth == 8 and not spill_log.segments  # Buffered until written
+    assert spill_log.write_buffered() == 8
+
+    assert len(spill_log.segments) > 1
+    assert spill_log.size <= 160
+    messages = spill_log.read(max_messages=100)
+    values = [message.value for message in messages]
+    assert values == [f"message-{index}".encode() for index in range(8 - len(values), 8)]
+    assert [message.key for message in messages] == keys[8 - len(values) :]
+
+    spill_log.commit(messages[:2])
+    assert spill_log.depth == len(values) - 2
+    spill_log.close()
+    last_segment = sorted(spill_log.directory.glob("*.log"))[-1]
+    with last_segment.open("ab") as segment:
+        segment.write(b"\x00\x01torn")
+
+    reopened = SpillLog(directory=str(tmp_path), segment_bytes=64, max_bytes=160)
+    assert reopened.directory == spill_log.directory  # Released directory is taken over
+    reopened_values = [message.value for message in reopened.read(max_messages=100)]
+    assert reopened_values[-len(values) + 2 :] == values[2:]  # Torn tail is truncated
+    assert set(reopened_values) <= set(values)
+    other_process = SpillLog(directory=str(tmp_path))
+    assert other_process.directory != reopened.directory  # Locked directory is skipped
+    other_process.close()
+    reopened.close()
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])  # Delivery futures are asyncio
+async def test_producer_spills_and_drains_in_order(tmp_path, anyio_backend):  # pylint: disable=W0613
+    """
+    Testing messages spilling while Kafka is unavailable, where later
+    messages queue behind spilled ones and are drained in order with their keys.
+    """
+    producer = KafkaProducer(
+        bootstrap_servers="kafka:9092",
+        topic="events",
+        spill_log=SpillLog(directory=str(tmp_path)),
+    )
+    producer.producer = MagicMock()
+    producer.producer.send = AsyncMock(side_effect=KafkaTimeoutError())
+
+    assert await producer.send_message(topic="events", message="first", key="web") is None
+    assert await producer.send_message(topic="events", message="second") is None
+    assert producer.producer.send.await_count == 1
+    assert producer.spill_log is not None and producer.spill_log.depth == 2
+
+    async def deliver(topic, value, key):  # pylint: disable=W0613
+        delivery = asyncio.get_running_loop().create_future()
+        delivery.set_result(MagicMock())
+        return delivery
+
+    producer.producer.send = AsyncMock(side_effect=deliver)
+    assert await producer.drain_spilled() == 2
+    assert [
+        (call.kwargs["key"], call.kwargs["value"])
+        for call in producer.producer.send.await_args_list
+    ] == [(b"web", b"first"), (None, b"second")]
+    assert producer.spill_log.depth == 0
+    producer.spill_log.close()
+
+
+def test_schema_encoding_matches_avro_binary_vectors(tmp_path):
+    """
+    Testing the encoding against Avro specification binary vectors, so the
+    messages are real Avro after the Confluent wire format header.
+    """
+    registry = SchemaRegistry(directory=str(tmp_path))
+    registry.register(
+        {
+            "type": "record",
+            "name": "Vector",
+            "schema_id": 7,
+            "fields": [
+                {"name": "a", "type": "long"},
+                {"name": "b", "type": "string"},
+                {"name": "c", "type": ["null", "string"]},
+                {"name": "d", "type": {"type": "enum", "name": "Kind", "symbols": ["X", "Y"]}},
+                {"name": "e", "type": "boolean"},
+                {"name": "f", "type": "double"},
+                {"name": "g", "type": "long"},
+                {"name": "h", "type": {"type": "int", "logicalType": "date"}},
+            ],
+        }
+    )
+    value = {
+        "a": 27,
+        "b": "foo",
+        "c": None,
+        "d": "Y",
+        "e": True,
+        "f": 1.0,
+        "g": -65,
+        "h": date(1970, 1, 2),
+    }
+
+    payload = registry.encode("Vector", value)
+
+    assert payload == (
+        b"\x00\x00\x00\x00\x07"  # Magic byte and big-endian schema id
+        b"\x36"  # Long 27 as zigzag varint
+        b"\x06foo"  # String length 3 and UTF-8 bytes
+        b"\x00"  # Union branch 0, null
+        b"\x02"  # Enum index 1
+        b"\x01"  # Boolean true
+        b"\x00\x00\x00\x00\x00\x00\xf0\x3f"  # Little-endian IEEE 754 double
+        b"\x81\x01"  # Long -65 as two varint bytes
+        b"\x02"  # Date as int days since the epoch
+    )
+    assert registry.encode("Vector", {**value, "c": "a"})[10:13] == b"\x02\x02a"  # Branch 1
+    assert registry.decode(payload).value == value
+
+
+def test_event_notification_schema_round_trip():
+    """
+    Testing event notifications encoding with the schema id header,
+    compact size, decoding by the writer schema after a new schema version
+    and unknown schemas and malformed messages rejection.
+    """
+    registry = SchemaRegistry()
+    notification = {
+        "action": "CREATED",
+        "event_id": 1234567,
+        "client_info": "web",
+        "name": "Launch",
+        "date": date(2025, 3, 1),
+        "occurred_at": datetime(2025, 3, 1, 12, 30, 15, 250000, tzinfo=timezone.utc),
+    }
+
+    payload = registry.encode("EventNotification", notification)
+
+    assert payload[:5] == b"\x00\x00\x00\x00\x01"
+    assert len(payload) < len(json.dumps(notification, default=str)) // 3
+    registry.register(
+        {
+            "type": "record",
+            "name": "EventNotification",
+            "schema_id": 2,
+            "fields": [{"name": "event_id", "type": "long"}],
+        }
+    )
+    decoded = registry.decode(payload)
+    assert (decoded.subject, decoded.schema_id) == ("EventNotification", 1)
+    assert decoded.value == notification
+    assert registry.encode("EventNotification", {"event_id": -1})[4] == 2
+    with pytest.raises(ValueError):
+        registry.decode(b"Launch was created")
+    with pytest.raises(ValueError, match="Malformed message"):
+        registry.decode(payload[:-3])  # Truncated payload
+    with pytest.raises(ValueError, match="Malformed message"):
+        registry.decode(payload[:5] + b"\x7e" + payload[6:])  # Unknown enum symbol
+
+
+@pytest.mark.anyio
+async def test_ensure_partitions_grows_existing_topic():
+    """
+    Testing that partitions of an existing topic are grown to the configured
+    number, and never shrunk.
+    """
+    admin = KafkaAdmin(bootstrap_servers="kafka:9092")
+    admin_client = MagicMock()
+    admin_client.start = AsyncMock()
+    admin_client.close = AsyncMock()
+    admin_client.describe_topics = AsyncMock(
+        return_value=[{"topic": "events", "partitions": [{}, {}]}]
+    )
+    admin_client.create_partitions = AsyncMock()
+
+    admin.admin_client = admin_client
+    assert await admin.ensure_partitions(topic_name="events", num_partitions=6) == 6
+    new_partitions = admin_client.create_partitions.await_args.args[0]["events"]
+    assert new_partitions.total_count == 6
+
+    assert await admin.ensure_partitions(topic_name="events", num_partitions=1) == 2
+    admin_client.create_partitions.assert_awaited_once()
+
+
+@pytest.mark.anyio
+async def test_topics_endpoint_serves_cached_metadata():
+    """
+    Testing topics metadata endpoint, where the cluster is described once
+    within the metadata TTL and sensitive configs are hidden.
+    """
+    admin_client = MagicMock()
+    admin_client.describe_topics = AsyncMock(
+        return_value=[
+            {
+                "topic": "events",
+                "is_internal": False,
+                "partitions": [
+                    {"partition": 1, "leader": 2, "replicas": [2], "isr": [2]},
+                    {"partition": 0, "leader": 1, "replicas": [1], "isr": [1]},
+                ],
+            }
+        ]
+    )
+    configs_response = MagicMock()
+    configs_response.to_object.return_value = {
+        "resources": [
+            {
+                "resource_name": "events",
+                "config_entries": [
+                    {"config_names": "retention.ms", "config_value": "604800000", "is_sensitive": False},
+                    {"config_names": "sasl.secret", "config_value": "secret", "is_sensitive": True},
+                ],
+            }
+        ]
+    }
+    admin_client.describe_configs = AsyncMock(return_value=[configs_response])
+    application = FastAPI()
+    application.include_router(router=kafka.router, prefix="/api/v1/kafka")
+
+    with patch.object(kafka.kafka_admin, "admin_client", admin_client), patch.object(
+        kafka.kafka_admin, "topics", None
+    ):
+        async with AsyncClient(
+            transport=ASGITransport(app=application), base_url="http://test"
+        ) as client:
+            first = await client.get("/api/v1/kafka/topics")
+            second = await client.get("/api/v1/kafka/topics")
+
+    assert first.status_code == 200
+    assert first.json() == second.json()
+    topic = first.json()[0]
+    assert [partition["partition"] for partition in topic["partitions"]] == [0, 1]
+    assert topic["configs"] == {"retention.ms": "604800000", "sasl.secret": None}
+    admin_client.describe_topics.assert_awaited_once()
@@ -0,0 +1,89 @@
+# test_metrics.py
+from unittest.mock import patch
+
+import pytest  # pylint: disable=E0401
+from fastapi import Depends, FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.utils.metrics import MetricsRegistry, verify_metrics_access
+
+
+def test_metrics_rendering():
+    """
+    Testing metrics rendering in Prometheus exposition format.
+
+    Counters accumulate per label set, gauge callbacks are evaluated on
+    rendering and histogram buckets are cumulative.
+    """
+    registry = MetricsRegistry()
+    counter = registry.counter(name="requests_total", description="Requests")
+    counter.inc(route="events")
+    counter.inc(amount=2, route="events")
+    registry.gauge(name="pool_size", description="Pool size").set_function(
+        lambda: 5, engine="primary"
+    )
+    histogram = registry.histogram(
+        name="wait_seconds", description="Wait", buckets=(0.1, 1.0)
+    )
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+
+    rendered = registry.render()
+
+    assert counter.value(route="events") == 3
+    assert registry.counter(name="requests_total", description="Requests") is counter
+    assert 'requests_total{route="events"} 3.0' in rendered
+    assert 'pool_size{engine="primary"} 5.0' in rendered
+    assert 'wait_seconds_bucket{le="0.1"} 1' in rendered
+    assert 'wait_seconds_bucket{le="1.0"} 2' in rendered
+    assert 'wait_seconds_bucket{le="+Inf"} 2' in rendered
+    assert "wait_seconds_count 2" in rendered
+
+
+def test_metrics_label_values_escaping():
+    """
+    Testing backslashes, double quotes and newlines escaping in label values.
+    """
+    registry = MetricsRegistry()
+    registry.counter(name="errors_total", description="Errors\nby message").inc(
+        message='bad "value"\\\n'
+    )
+
+    rendered = registry.render()
+
+    assert "# HELP errors_total Errors\\nby message" in rendered
+    assert 'errors_total{message="bad \\"value\\"\\\\\\n"} 1.0' in rendered
+
+
+@pytest.mark.anyio
+async def test_metrics_access_is_internal_only():
+    """
+    Testing that metrics are served to internal scrapers with the token
+    and rejected for proxied requests.
+    """
+    application = FastAPI()
+    application.add_api_route(
+        "/metrics", lambda: "ok", dependencies=[Depends(verify_metrics_access)]
+    )
+    async with AsyncClient(
+        transport=ASGITransport(app=application, client=("10.0.0.5", 4000)),
+        base_url="http://test",
+    ) as client:
+        internal = await client.get("/metrics")
+        proxied = await client.get("/metrics", headers={"X-Forwarded-For": "8.8.8.8"})
+        with patch("app.utils.metrics.METRICS_TOKEN", "secret"):
+            without_token = await client.get("/metrics")
+            with_token = await client.get(
+                "/metrics", headers={"Authorization": "Bearer secret"}
+            )
+    async with AsyncClient(
+        transport=ASGITransport(app=application, client=("8.8.8.8", 4000)),
+        base_url="http://test",
+    ) as client:
+        public = await client.get("/metrics")
+
+    assert internal.status_code == 200
+    assert proxied.status_code == 403
+    assert without_token.status_code == 401
+    assert with_token.status_code == 200
+    assert public.status_code == 403